@@ -0,0 +1,133 @@
+"""Time to check whether coco's working board equals the target board,
+scanning `objs_grid` as `compare_boards` did before compared with
+`BoardFingerprint`s.
+
+Boards are filled with random stacks of pieces. The equal boards are
+the worst case for the scan, which has to visit every cell. For the
+fingerprints the time to compare two of them, to compute one from a
+state (once per loaded target) and to update one when a piece is
+placed on the working board are reported.
+
+usage: python -m benchmarks.board_compare [--sizes N ...]
+"""
+
+import argparse
+import copy
+import random
+import time
+
+from coco.config import EMPTYSTATE
+from coco.golmi_client import BoardFingerprint, CellIndex
+
+
+def scan_boards(board1, board2):
+    """compare_boards before the fingerprints."""
+    for state_dict in board2:
+        for item in state_dict:
+            if "grid_config" in item:
+                board2 = state_dict
+                break
+
+    if "objs_grid" not in board1 or "objs_grid" not in board2:
+        return False, "No objs_grid"
+
+    if len(board1["objs_grid"]) != len(board2["objs_grid"]):
+        return False, "Different count of objs_grid"
+
+    for loc, shapes1 in board1["objs_grid"].items():
+        shapes2 = board2["objs_grid"].get(loc)
+        if shapes2 is None:
+            return False, f"Location {loc} not available in board2"
+
+        if len(shapes1) != len(shapes2):
+            return (
+                False,
+                f"Different count of objs in objs_grid for the location: {loc}",
+            )
+
+        for shape1, shape2 in zip(shapes1, shapes2):
+            values1, values2 = board1["objs"][shape1], board2["objs"][shape2]
+            if (values1["type"], values1["color"][0]) != (
+                values2["type"],
+                values2["color"][0],
+            ):
+                return False, f"Different type or color in location {loc}"
+
+    return True, "Equal boards"
+
+
+def random_board(rng, size, height=3):
+    state = copy.deepcopy(EMPTYSTATE)
+    cells = CellIndex(state)
+    for obj_id in range(size * size * height // 2):
+        cells.add(
+            {
+                "block_matrix": [[1]],
+                "color": [rng.choice(["red", "blue", "green"]), "#000000", [0, 0, 0]],
+                "id_n": str(obj_id),
+                "rotation": 0,
+                "type": rng.choice(["screw", "nut", "washer"]),
+                "x": float(rng.randrange(size)),
+                "y": float(rng.randrange(size)),
+            }
+        )
+    return state, cells
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) * 1e6 / repeat
+
+
+def run(size, repeat):
+    rng = random.Random(size)
+    working, cells = random_board(rng, size)
+    target = copy.deepcopy(working)
+    reference = (target, {"player": [], "wizard": []})
+    target_fingerprint = BoardFingerprint.of(target)
+    assert scan_boards(working, reference)[0]
+    assert cells.fingerprint == target_fingerprint
+
+    piece = {
+        "block_matrix": [[1]],
+        "color": ["red", "#000000", [0, 0, 0]],
+        "id_n": "placed",
+        "rotation": 0,
+        "type": "nut",
+        "x": 0.0,
+        "y": 0.0,
+    }
+
+    def place_and_remove():
+        cells.add(piece)
+        cells.remove("placed")
+
+    return {
+        "objs": len(working["objs"]),
+        "scan_us": timed(lambda: scan_boards(working, reference), repeat),
+        "compare_us": timed(lambda: cells.fingerprint == target_fingerprint, repeat),
+        "compute_us": timed(lambda: BoardFingerprint.of(target), max(1, repeat // 10)),
+        # a placement and its removal update the fingerprint twice
+        "update_us": timed(place_and_remove, repeat) / 2,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark board comparison.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 16, 32, 64])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"{'board':>7} {'objs':>6} {'scan':>11} {'fingerprint ==':>15} "
+        f"{'compute':>11} {'update':>10}"
+    )
+    for size in args.sizes:
+        result = run(size, args.repeat)
+        print(
+            f"{size:>3}x{size:<3} {result['objs']:6d} {result['scan_us']:8.1f} us "
+            f"{result['compare_us']:12.2f} us {result['compute_us']:8.1f} us "
+            f"{result['update_us']:7.2f} us"
+        )
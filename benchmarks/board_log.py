@@ -0,0 +1,112 @@
+"""Bytes of working board logs per coco session, the full state after
+every change compared with deltas and periodic snapshots
+(`coco.board_log`).
+
+A session plays the target boards of a sequence in `coco/data/sequences`:
+the wizard builds each target object by object, some objects are placed
+wrongly and removed again, some actions are undone and redone. Every
+reconstructed state of the delta log is checked against the logged
+full state.
+
+usage: python -m benchmarks.board_log [--sessions N] [--snapshot-every N]
+"""
+
+import argparse
+import copy
+import json
+from pathlib import Path
+import random
+
+from coco.board_log import BoardLog, replay
+from coco.config import EMPTYSTATE, STATES
+from coco.golmi_client import CellIndex
+
+
+def size(event, data):
+    """Bytes of a log entry posted to slurk."""
+    return len(json.dumps({"event": event, "data": data}))
+
+
+def play_session(rng, targets, snapshot_every):
+    """Log a session both ways, return the entries of each."""
+    full, deltas = list(), list()
+    board_log = BoardLog(snapshot_every)
+    state = cells = None
+
+    def change(action=None, obj=None):
+        full.append({"event": "working_board_log", "data": copy.deepcopy(state)})
+        if action is not None and not board_log.snapshot_due():
+            data = board_log.delta(action, obj)
+            deltas.append({"event": "working_board_delta", "data": data})
+        else:
+            data = board_log.snapshot(copy.deepcopy(state))
+            deltas.append({"event": "working_board_snapshot", "data": data})
+
+    def add(obj):
+        cells.add(copy.deepcopy(obj))
+        change("add", obj)
+
+    def delete(obj):
+        cells.remove(obj["id_n"])
+        change("delete", obj)
+
+    for target in targets:
+        # a new episode starts on an empty board
+        state = copy.deepcopy(EMPTYSTATE)
+        cells = CellIndex(state)
+        change()
+        for obj in target["objs"].values():
+            if rng.random() < 0.2:
+                # a wrong piece, removed again
+                wrong = {**copy.deepcopy(obj), "id_n": str(1000 + len(full))}
+                add(wrong)
+                delete(wrong)
+            obj = {**obj, "gripped": None}
+            add(obj)
+            if rng.random() < 0.1:
+                # undo and redo
+                delete(obj)
+                add(obj)
+    return full, deltas
+
+
+def check(full, deltas):
+    states = [copy.deepcopy(state) for _, state in replay(deltas)]
+    assert len(states) == len(full)
+    for expected, state in zip(full, states):
+        assert state["objs"] == expected["data"]["objs"]
+        assert state["objs_grid"] == expected["data"]["objs_grid"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark board log sizes.")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--snapshot-every", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sequences = [
+        [json.loads(line)["state"] for line in path.read_text().splitlines()]
+        for path in sorted(Path(STATES).iterdir())
+    ]
+
+    totals = {"full": [0, 0], "deltas": [0, 0]}
+    for _ in range(args.sessions):
+        full, deltas = play_session(rng, rng.choice(sequences), args.snapshot_every)
+        check(full, deltas)
+        for name, entries in [("full", full), ("deltas", deltas)]:
+            totals[name][0] += len(entries)
+            totals[name][1] += sum(size(e["event"], e["data"]) for e in entries)
+
+    print(
+        f"{args.sessions} sessions, a snapshot every {args.snapshot_every} deltas, "
+        "all states reconstructed"
+    )
+    for name, (entries, size_bytes) in totals.items():
+        print(
+            f"{name:<7} {entries / args.sessions:7.1f} entries/session | "
+            f"{size_bytes / args.sessions / 1024:8.1f} KiB/session | "
+            f"{size_bytes / entries:7.0f} B/entry"
+        )
+    print(f"ratio   {totals['full'][1] / totals['deltas'][1]:.1f}x fewer bytes")
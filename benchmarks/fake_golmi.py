@@ -0,0 +1,273 @@
+"""In-process stand-in for the slurk branch of the golmi server.
+
+Boards are kept in memory per golmi room. The REST endpoints used by
+`coco.golmi_client.QuadrupleClient` and the socket.io events to load
+states and configurations are implemented, and after every change the
+new state is sent to the room with `update_state`, as golmi does. Like
+`FakeSlurk` the server runs an event loop in a background thread.
+
+Every REST call is counted per endpoint in `calls`. With `latency`
+every REST response is delayed by a fixed time, which simulates a
+remote server.
+
+usage:
+    golmi = FakeGolmi().start()
+    client = QuadrupleClient(room_id, golmi.address)
+    await client.run(golmi.password)
+"""
+
+import asyncio
+from collections import Counter, defaultdict
+import copy
+import threading
+
+from aiohttp import web
+import socketio
+
+
+def empty_state():
+    return {
+        "grid_config": dict(),
+        "grippers": dict(),
+        "objs": dict(),
+        "objs_grid": dict(),
+        "state_id": None,
+        "targets": dict(),
+        "targets_grid": dict(),
+    }
+
+
+def cells(obj):
+    for row, blocks in enumerate(obj["block_matrix"]):
+        for column, block in enumerate(blocks):
+            if block:
+                yield f"{int(obj['y']) + row}:{int(obj['x']) + column}"
+
+
+class FakeGolmi:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, password="password"):
+        """
+        :param host: Interface to listen on
+        :type host: str
+        :param port: Port to listen on, a free one is picked if 0
+        :type port: int
+        :param latency: Seconds every REST response is delayed
+        :type latency: float
+        :param password: Password the socket.io clients authenticate with
+        :type password: str
+        """
+        self.interface = host
+        self.port = port
+        self.latency = latency
+        self.password = password
+
+        self.states = defaultdict(empty_state)
+        self.calls = Counter()
+        self.events = Counter()
+
+        self.sio = socketio.AsyncServer(
+            async_mode="aiohttp", cors_allowed_origins="*", logger=False
+        )
+        self.app = web.Application(middlewares=[self._count])
+        self.sio.attach(self.app)
+        self._register_routes()
+        self._register_events()
+
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    @property
+    def address(self):
+        """Value for the `golmi_address` of the clients."""
+        return f"http://{self.interface}:{self.port}"
+
+    # lifecycle
+
+    def start(self):
+        """Start serving in a background thread."""
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def _serve(self, ready):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._runner = web.AppRunner(self.app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, self.interface, self.port)
+        self._loop.run_until_complete(site.start())
+        self.port = self._runner.addresses[0][1]
+        ready.set()
+        self._loop.run_forever()
+
+    def stop(self):
+        future = asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop)
+        future.result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    # board logic
+
+    def top_object(self, state, key):
+        stack = state["objs_grid"].get(key)
+        return state["objs"][stack[-1]] if stack else None
+
+    def add_object(self, state, obj):
+        obj = copy.deepcopy(obj)
+        state["objs"][obj["id_n"]] = obj
+        for key in cells(obj):
+            state["objs_grid"].setdefault(key, list()).append(obj["id_n"])
+
+    def delete_object(self, state, obj):
+        state["objs"].pop(obj["id_n"], None)
+        for key in cells(obj):
+            stack = state["objs_grid"].get(key, list())
+            if obj["id_n"] in stack:
+                stack.remove(obj["id_n"])
+            if not stack:
+                state["objs_grid"].pop(key, None)
+        for gripper in state["grippers"].values():
+            if gripper["gripped"] and obj["id_n"] in gripper["gripped"]:
+                gripper["gripped"] = None
+
+    def load_state(self, room, state):
+        new_state = empty_state()
+        new_state.update(copy.deepcopy(state))
+        if not new_state["objs_grid"]:
+            for obj in list(new_state["objs"].values()):
+                for key in cells(obj):
+                    new_state["objs_grid"].setdefault(key, list()).append(obj["id_n"])
+        self.states[room] = new_state
+
+    async def update(self, room):
+        await self.sio.emit("update_state", self.states[room], to=room)
+
+    # socket.io
+
+    def _register_events(self):
+        @self.sio.event
+        async def connect(sid, environ, auth=None):
+            if not auth or auth.get("password") != self.password:
+                return False
+
+        @self.sio.event
+        async def join(sid, data):
+            self.events["join"] += 1
+            await self.sio.enter_room(sid, data["room_id"])
+            await self.sio.save_session(sid, {"room": data["room_id"]})
+            return True
+
+        @self.sio.event
+        async def load_state(sid, state):
+            self.events["load_state"] += 1
+            room = (await self.sio.get_session(sid))["room"]
+            self.load_state(room, state)
+            await self.update(room)
+
+        @self.sio.event
+        async def load_config(sid, config):
+            self.events["load_config"] += 1
+            room = (await self.sio.get_session(sid))["room"]
+            self.states[room]["grid_config"] = dict(config)
+            await self.update(room)
+
+    # REST
+
+    @web.middleware
+    async def _count(self, request, handler):
+        if request.path.startswith("/socket.io"):
+            return await handler(request)
+
+        resource = request.match_info.route.resource
+        name = resource.canonical if resource is not None else request.path
+        self.calls[f"{request.method} {name}"] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await handler(request)
+
+    def _register_routes(self):
+        router = self.app.router
+        router.add_get("/slurk/{room}/state", self.get_state)
+        router.add_get("/slurk/{room}/gripped", self.get_gripped)
+        router.add_post("/slurk/{room}/object", self.post_object)
+        router.add_delete("/slurk/{room}/object", self.delete_object_route)
+        router.add_get("/slurk/grip/{room}/{x}/{y}/{block_size}", self.grip)
+        router.add_get("/slurk/cell/{room}/{x}/{y}/{block_size}", self.get_cell)
+        router.add_get("/slurk/gripper/{room}/{gripper}", self.get_gripper)
+        router.add_post("/slurk/gripper/{room}/{gripper}", self.post_gripper)
+        router.add_delete("/slurk/gripper/{room}/{gripper}", self.delete_gripper)
+
+    def _cell(self, request):
+        block_size = float(request.match_info["block_size"])
+        x = int(float(request.match_info["x"]) // block_size)
+        y = int(float(request.match_info["y"]) // block_size)
+        return x, y
+
+    async def get_state(self, request):
+        return web.json_response(self.states[request.match_info["room"]])
+
+    async def get_gripped(self, request):
+        gripped = dict()
+        for gripper in self.states[request.match_info["room"]]["grippers"].values():
+            gripped.update(gripper["gripped"] or dict())
+        return web.json_response(gripped)
+
+    async def post_object(self, request):
+        room = request.match_info["room"]
+        self.add_object(self.states[room], await request.json())
+        await self.update(room)
+        return web.json_response(True)
+
+    async def delete_object_route(self, request):
+        room = request.match_info["room"]
+        obj = await request.json()
+        if obj["id_n"] not in self.states[room]["objs"]:
+            raise web.HTTPNotFound()
+        self.delete_object(self.states[room], obj)
+        await self.update(room)
+        return web.json_response(True)
+
+    async def grip(self, request):
+        room = request.match_info["room"]
+        state = self.states[room]
+        x, y = self._cell(request)
+        obj = self.top_object(state, f"{y}:{x}")
+        gripped = {obj["id_n"]: copy.deepcopy(obj)} if obj is not None else None
+        state["grippers"]["mouse"] = {"id_n": "mouse", "x": x, "y": y, "gripped": gripped}
+        await self.update(room)
+        return web.json_response(gripped)
+
+    async def get_cell(self, request):
+        state = self.states[request.match_info["room"]]
+        x, y = self._cell(request)
+        stack = state["objs_grid"].get(f"{y}:{x}", list())
+        return web.json_response([state["objs"][obj_id] for obj_id in stack])
+
+    async def get_gripper(self, request):
+        state = self.states[request.match_info["room"]]
+        gripper = state["grippers"].get(request.match_info["gripper"])
+        if gripper is None:
+            raise web.HTTPNotFound()
+        return web.json_response(gripper)
+
+    async def post_gripper(self, request):
+        room = request.match_info["room"]
+        data = await request.json()
+        gripper = {
+            "id_n": request.match_info["gripper"],
+            "x": int(data["x"] // data["block_size"]),
+            "y": int(data["y"] // data["block_size"]),
+            "gripped": None,
+        }
+        self.states[room]["grippers"][gripper["id_n"]] = gripper
+        await self.update(room)
+        return web.json_response(gripper)
+
+    async def delete_gripper(self, request):
+        room = request.match_info["room"]
+        self.states[room]["grippers"].pop(request.match_info["gripper"], None)
+        await self.update(room)
+        return web.json_response(True)
@@ -0,0 +1,657 @@
+"""In-process stand-in for the slurk chat server.
+
+Users, rooms and tasks are kept in memory. The REST endpoints and
+socket.io events used by the bots and the concierge are implemented
+closely enough that unmodified bots can connect to it. The server runs
+an event loop in a background thread, so bots and simulated users in
+the same process talk to it over localhost like to a real slurk.
+
+Setup helpers like `create_user` must be called before the created
+users connect. Alternatively the REST api can be used with `api_token`,
+as `start_bot.py` does against a real slurk.
+
+Every REST call and socket.io event is counted and the time spent
+handling each REST call is recorded per endpoint, see `stats`. With
+`latency` every REST response is delayed by a fixed time, which
+simulates a remote server without making measurements depend on the
+network.
+
+usage:
+    slurk = FakeSlurk().start()
+    layout_id = slurk.create_layout()
+    room_id = slurk.create_room(layout_id)
+    user_id, token = slurk.create_user("Bot", rooms=[room_id])
+    bot = EchoBot(token, user_id, task_id, slurk.host, slurk.port)
+"""
+
+import asyncio
+from collections import Counter, defaultdict
+from datetime import datetime
+import itertools
+import json
+import threading
+import time
+import uuid
+
+from aiohttp import web
+import socketio
+
+
+class FakeSlurk:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0):
+        """
+        :param host: Interface to listen on
+        :type host: str
+        :param port: Port to listen on, a free one is picked if 0
+        :type port: int
+        :param latency: Seconds every REST response is delayed
+        :type latency: float
+        """
+        self.interface = host
+        self.port = port
+        self.latency = latency
+
+        self.users = dict()
+        self.tokens = dict()
+        self.rooms = dict()
+        self.tasks = dict()
+        self.layouts = dict()
+        self.permissions = dict()
+        # tokens that no user registered with yet
+        self.registrations = dict()
+        self.logs = list()
+        self._ids = defaultdict(lambda: itertools.count(1))
+
+        # socket.io sessions
+        self.sessions = dict()
+        self.sids = defaultdict(set)
+
+        # number of calls and seconds spent per endpoint
+        self.calls = Counter()
+        self.durations = defaultdict(list)
+        # socket.io events received from and emitted to the clients
+        self.events = Counter()
+        self.emitted = Counter()
+
+        # token of the admin, who is allowed to use the REST api only
+        self.api_token = str(uuid.uuid4())
+        self.tokens[self.api_token] = None
+
+        self.sio = socketio.AsyncServer(
+            async_mode="aiohttp", cors_allowed_origins="*", logger=False
+        )
+        self.app = web.Application(middlewares=[self._authenticate])
+        self.sio.attach(self.app)
+        self._register_routes()
+        self._register_events()
+
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    @property
+    def host(self):
+        """Value for the `host` argument of the bots."""
+        return f"http://{self.interface}"
+
+    @property
+    def uri(self):
+        return f"{self.host}:{self.port}/slurk/api"
+
+    # setup
+
+    def _next_id(self, kind):
+        return next(self._ids[kind])
+
+    def create_layout(self, **fields):
+        layout_id = self._next_id("layouts")
+        self.layouts[layout_id] = {"id": layout_id, "title": "", **fields}
+        return layout_id
+
+    def create_task(self, name, num_users, layout_id):
+        task_id = self._next_id("tasks")
+        self.tasks[task_id] = {
+            "id": task_id,
+            "name": name,
+            "num_users": num_users,
+            "layout_id": layout_id,
+        }
+        return task_id
+
+    def create_room(self, layout_id):
+        room_id = self._next_id("rooms")
+        self.rooms[room_id] = {
+            "id": room_id,
+            "layout_id": layout_id,
+            "users": set(),
+            # attributes, text and classes set by the bots per element
+            "elements": defaultdict(dict),
+        }
+        return room_id
+
+    def create_permissions(self, **permissions):
+        permissions_id = self._next_id("permissions")
+        self.permissions[permissions_id] = {
+            "id": permissions_id,
+            "api": True,
+            "send_message": True,
+            "send_html_message": True,
+            "send_image": True,
+            "send_command": True,
+            "send_privately": True,
+            "receive_bounding_box": True,
+            **permissions,
+            "version": 0,
+        }
+        return permissions_id
+
+    def create_token(self, permissions_id, room_id=None, task_id=None):
+        """Create a token a user can register with."""
+        token = str(uuid.uuid4())
+        self.registrations[token] = {
+            "id": token,
+            "permissions_id": permissions_id,
+            "room_id": room_id,
+            "task_id": task_id,
+        }
+        return token
+
+    def register_user(self, name, token):
+        """Create a user for a token created with `create_token`.
+        :return: Id of the user
+        :rtype: int
+        """
+        registration = self.registrations.pop(token)
+        room_id = registration["room_id"]
+        rooms = {room_id} if room_id is not None else set()
+
+        user_id = self._next_id("users")
+        self.users[user_id] = {
+            "id": user_id,
+            "name": name,
+            "token": token,
+            "task_id": registration["task_id"],
+            "permissions_id": registration["permissions_id"],
+            "rooms": rooms,
+            "version": 0,
+        }
+        for room_id in rooms:
+            self.rooms[room_id]["users"].add(user_id)
+        self.tokens[token] = user_id
+        return user_id
+
+    def create_user(self, name, task_id=None, rooms=(), **permissions):
+        """Create a user logged in with a new token.
+        :return: Id and token of the user
+        :rtype: tuple
+        """
+        permissions_id = self.create_permissions(**permissions)
+        token = self.create_token(permissions_id, task_id=task_id)
+        user_id = self.register_user(name, token)
+        for room_id in rooms:
+            self.users[user_id]["rooms"].add(room_id)
+            self.rooms[room_id]["users"].add(user_id)
+        return user_id, token
+
+    # lifecycle
+
+    def start(self):
+        """Start serving in a background thread."""
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self
+
+    def _serve(self, ready):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._runner = web.AppRunner(self.app, access_log=None)
+        self._loop.run_until_complete(self._runner.setup())
+        site = web.TCPSite(self._runner, self.interface, self.port)
+        self._loop.run_until_complete(site.start())
+        self.port = self._runner.addresses[0][1]
+        ready.set()
+        self._loop.run_forever()
+
+    def stop(self):
+        future = asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop)
+        future.result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+    # measurements
+
+    def stats(self):
+        """Calls and handling time per endpoint, most called first.
+        :return: Endpoint mapped to the number of calls and the median,
+            95th percentile and maximum time in milliseconds
+        :rtype: dict
+        """
+        stats = dict()
+        for endpoint, calls in self.calls.most_common():
+            durations = sorted(self.durations[endpoint])
+            stats[endpoint] = {
+                "calls": calls,
+                "p50_ms": durations[len(durations) // 2] * 1000,
+                "p95_ms": durations[int(len(durations) * 0.95)] * 1000,
+                "max_ms": durations[-1] * 1000,
+            }
+        return stats
+
+    def reset_stats(self):
+        """Forget all calls and events counted so far, e.g. after the setup."""
+        self.calls.clear()
+        self.durations.clear()
+        self.events.clear()
+        self.emitted.clear()
+
+    def report(self, limit=None):
+        """Print the stats of the `limit` most called endpoints."""
+        for endpoint, stats in itertools.islice(self.stats().items(), limit):
+            print(
+                f"  {stats['calls']:6d} {endpoint:<56} | "
+                f"p50 {stats['p50_ms']:6.2f} ms | p95 {stats['p95_ms']:6.2f} ms"
+            )
+
+    # helpers
+
+    async def _emit(self, event, data, to=None):
+        self.emitted[event] += 1
+        await self.sio.emit(event, data, to=to)
+
+    @staticmethod
+    def _timestamp():
+        return datetime.utcnow().isoformat()
+
+    @staticmethod
+    def _channel(user_id):
+        """socket.io room reaching every connection of a user."""
+        return f"user_{user_id}"
+
+    def _public(self, user_id):
+        user = self.users[user_id]
+        return {"id": user["id"], "name": user["name"]}
+
+    @staticmethod
+    def _etag(entity):
+        return f'"{entity["id"]}-{entity["version"]}"'
+
+    def _response(self, body, entity=None, status=200):
+        headers = {"ETag": self._etag(entity)} if entity is not None else {}
+        return web.json_response(body, status=status, headers=headers)
+
+    def _precondition_failed(self, request, entity):
+        """`True` if an `If-Match` header does not match `entity`."""
+        etag = request.headers.get("If-Match")
+        return etag is not None and etag != self._etag(entity)
+
+    def _get(self, collection, request, key):
+        entity = collection.get(int(request.match_info[key]))
+        if entity is None:
+            raise web.HTTPNotFound()
+        return entity
+
+    @staticmethod
+    async def _body(request):
+        if not request.can_read_body:
+            return dict()
+        return json.loads(await request.text() or "{}")
+
+    def _user_json(self, user):
+        return {
+            "id": user["id"],
+            "name": user["name"],
+            "token_id": user["token"],
+            "rooms": [{"id": room_id} for room_id in sorted(user["rooms"])],
+        }
+
+    async def _status(self, event_type, user_id, room_id):
+        await self._emit(
+            "status",
+            {
+                "type": event_type,
+                "user": self._public(user_id),
+                "room": room_id,
+                "timestamp": self._timestamp(),
+            },
+            to=str(room_id),
+        )
+
+    async def _join(self, user_id, room_id):
+        self.users[user_id]["rooms"].add(room_id)
+        self.rooms[room_id]["users"].add(user_id)
+        for sid in self.sids[user_id]:
+            await self.sio.enter_room(sid, str(room_id))
+            await self._emit("joined_room", {"room": room_id, "user": user_id}, to=sid)
+        await self._status("join", user_id, room_id)
+
+    async def _leave(self, user_id, room_id):
+        self.users[user_id]["rooms"].discard(room_id)
+        self.rooms[room_id]["users"].discard(user_id)
+        for sid in self.sids[user_id]:
+            await self._emit("left_room", {"room": room_id, "user": user_id}, to=sid)
+            await self.sio.leave_room(sid, str(room_id))
+        await self._status("leave", user_id, room_id)
+
+    # REST api
+
+    @web.middleware
+    async def _authenticate(self, request, handler):
+        if request.path.startswith("/socket.io"):
+            return await handler(request)
+
+        resource = request.match_info.route.resource
+        name = resource.canonical if resource is not None else request.path
+        endpoint = f"{request.method} {name}"
+        self.calls[endpoint] += 1
+
+        start = time.perf_counter()
+        try:
+            token = request.headers.get("Authorization", "").replace("Bearer ", "")
+            if token not in self.tokens:
+                raise web.HTTPUnauthorized()
+            return await handler(request)
+        finally:
+            # measured without the simulated latency
+            self.durations[endpoint].append(time.perf_counter() - start)
+            if self.latency:
+                await asyncio.sleep(self.latency)
+
+    def _register_routes(self):
+        api = "/slurk/api"
+        router = self.app.router
+        router.add_post(api + "/layouts", self.post_layout)
+        router.add_get(api + "/layouts/{layout_id}", self.get_layout)
+        router.add_post(api + "/permissions", self.post_permissions)
+        router.add_get(api + "/permissions/{permissions_id}", self.get_permissions)
+        router.add_patch(api + "/permissions/{permissions_id}", self.patch_permissions)
+        router.add_post(api + "/tokens", self.post_token)
+        router.add_get(api + "/tokens/{token_id}", self.get_token)
+        router.add_post(api + "/tasks", self.post_task)
+        router.add_get(api + "/tasks/{task_id}", self.get_task)
+
+        router.add_post(api + "/users", self.post_user)
+        router.add_get(api + "/users/{user_id}", self.get_user)
+        router.add_patch(api + "/users/{user_id}", self.patch_user)
+        router.add_get(api + "/users/{user_id}/task", self.get_user_task)
+        router.add_get(api + "/users/{user_id}/permissions", self.get_user_permissions)
+        router.add_post(api + "/users/{user_id}/rooms/{room_id}", self.join_room)
+        router.add_delete(api + "/users/{user_id}/rooms/{room_id}", self.leave_room)
+
+        router.add_post(api + "/rooms", self.post_room)
+        router.add_get(api + "/rooms/{room_id}", self.get_room)
+        router.add_get(api + "/rooms/{room_id}/users", self.get_room_users)
+        attribute = api + "/rooms/{room_id}/attribute/id/{element}"
+        router.add_patch(attribute, self.set_attribute)
+        router.add_delete(attribute, self.remove_attribute)
+        router.add_patch(api + "/rooms/{room_id}/text/{element}", self.set_text)
+        element_class = api + "/rooms/{room_id}/class/{element}"
+        router.add_post(element_class, self.add_class)
+        router.add_delete(element_class, self.remove_class)
+
+        router.add_get(api + "/logs", self.get_logs)
+        router.add_post(api + "/logs", self.post_log)
+
+    async def post_layout(self, request):
+        layout_id = self.create_layout(**await self._body(request))
+        return web.json_response(self.layouts[layout_id], status=201)
+
+    async def get_layout(self, request):
+        return web.json_response(self._get(self.layouts, request, "layout_id"))
+
+    async def post_permissions(self, request):
+        permissions_id = self.create_permissions(**await self._body(request))
+        permissions = self.permissions[permissions_id]
+        return self._response(permissions, permissions, status=201)
+
+    async def get_permissions(self, request):
+        permissions = self._get(self.permissions, request, "permissions_id")
+        return self._response(permissions, permissions)
+
+    async def post_token(self, request):
+        body = await self._body(request)
+        if body.get("permissions_id") not in self.permissions:
+            raise web.HTTPUnprocessableEntity()
+        token = self.create_token(
+            body["permissions_id"], body.get("room_id"), body.get("task_id")
+        )
+        return web.json_response(self.registrations[token], status=201)
+
+    async def get_token(self, request):
+        token = self.registrations.get(request.match_info["token_id"])
+        if token is None:
+            raise web.HTTPNotFound()
+        return web.json_response(token)
+
+    async def post_task(self, request):
+        body = await self._body(request)
+        task_id = self.create_task(
+            body.get("name"), body.get("num_users"), body.get("layout_id")
+        )
+        return web.json_response(self.tasks[task_id], status=201)
+
+    async def get_task(self, request):
+        return web.json_response(self._get(self.tasks, request, "task_id"))
+
+    async def post_user(self, request):
+        body = await self._body(request)
+        if body.get("token_id") not in self.registrations:
+            raise web.HTTPUnprocessableEntity()
+        user = self.users[self.register_user(body.get("name"), body["token_id"])]
+        return self._response(self._user_json(user), user, status=201)
+
+    async def get_user(self, request):
+        user = self._get(self.users, request, "user_id")
+        return self._response(self._user_json(user), user)
+
+    async def patch_user(self, request):
+        user = self._get(self.users, request, "user_id")
+        if self._precondition_failed(request, user):
+            raise web.HTTPPreconditionFailed()
+        body = await self._body(request)
+        user["name"] = body.get("name", user["name"])
+        user["version"] += 1
+        return self._response(self._user_json(user), user)
+
+    async def get_user_task(self, request):
+        user = self._get(self.users, request, "user_id")
+        return web.json_response(self.tasks.get(user["task_id"]))
+
+    async def get_user_permissions(self, request):
+        user = self._get(self.users, request, "user_id")
+        permissions = self.permissions[user["permissions_id"]]
+        return self._response(permissions, permissions)
+
+    async def patch_permissions(self, request):
+        permissions = self._get(self.permissions, request, "permissions_id")
+        if self._precondition_failed(request, permissions):
+            raise web.HTTPPreconditionFailed()
+        permissions.update(await self._body(request))
+        permissions["version"] += 1
+        return self._response(permissions, permissions)
+
+    async def join_room(self, request):
+        user = self._get(self.users, request, "user_id")
+        room = self._get(self.rooms, request, "room_id")
+        user["version"] += 1
+        await self._join(user["id"], room["id"])
+        return self._response(self._user_json(user), user)
+
+    async def leave_room(self, request):
+        user = self._get(self.users, request, "user_id")
+        room = self._get(self.rooms, request, "room_id")
+        if self._precondition_failed(request, user):
+            raise web.HTTPPreconditionFailed()
+        if room["id"] not in user["rooms"]:
+            raise web.HTTPNotFound()
+        user["version"] += 1
+        await self._leave(user["id"], room["id"])
+        return self._response(self._user_json(user), user)
+
+    async def post_room(self, request):
+        body = await self._body(request)
+        room_id = self.create_room(body.get("layout_id"))
+        return web.json_response(
+            {"id": room_id, "layout_id": body.get("layout_id")}, status=201
+        )
+
+    async def get_room(self, request):
+        room = self._get(self.rooms, request, "room_id")
+        return web.json_response({"id": room["id"], "layout_id": room["layout_id"]})
+
+    async def get_room_users(self, request):
+        room = self._get(self.rooms, request, "room_id")
+        return web.json_response([self._public(i) for i in sorted(room["users"])])
+
+    async def _element(self, request):
+        """Layout element addressed by the request and the request body."""
+        room = self._get(self.rooms, request, "room_id")
+        body = await self._body(request)
+        return room["elements"][request.match_info["element"]], body
+
+    async def set_attribute(self, request):
+        element, body = await self._element(request)
+        element[body["attribute"]] = body.get("value")
+        return web.json_response(body)
+
+    async def remove_attribute(self, request):
+        element, body = await self._element(request)
+        element.pop(body["attribute"], None)
+        return web.json_response(body)
+
+    async def set_text(self, request):
+        element, body = await self._element(request)
+        element["text"] = body["text"]
+        return web.json_response(body)
+
+    async def add_class(self, request):
+        element, body = await self._element(request)
+        element.setdefault("class", set()).add(body["class"])
+        return web.json_response(body)
+
+    async def remove_class(self, request):
+        element, body = await self._element(request)
+        element.setdefault("class", set()).discard(body["class"])
+        return web.json_response(body)
+
+    async def get_logs(self, request):
+        logs = self.logs
+        if "room_id" in request.query:
+            room_id = int(request.query["room_id"])
+            logs = [entry for entry in logs if entry.get("room_id") == room_id]
+        return web.json_response(logs)
+
+    async def post_log(self, request):
+        entry = await self._body(request)
+        self.logs.append(entry)
+        return web.json_response(entry, status=201)
+
+    # socket.io events
+
+    def _register_events(self):
+        self.sio.on("connect", self.on_connect)
+        self.sio.on("disconnect", self.on_disconnect)
+        self.sio.on("text", self.on_text)
+        self.sio.on("message_command", self.on_message_command)
+        self.sio.on("image", self.on_image)
+        self.sio.on("mouse", self.on_mouse)
+        self.sio.on("room_created", self.on_room_created)
+
+    def _message(self, sid, data, **fields):
+        user_id = self.sessions[sid]
+        return {
+            "user": self._public(user_id),
+            "room": data.get("room"),
+            "timestamp": self._timestamp(),
+            **fields,
+        }
+
+    @staticmethod
+    def _target(data):
+        if data.get("receiver_id") is not None:
+            return FakeSlurk._channel(data["receiver_id"])
+        return str(data["room"])
+
+    async def on_connect(self, sid, environ, auth=None):
+        token = environ.get("HTTP_AUTHORIZATION", "").replace("Bearer ", "")
+        if token not in self.tokens:
+            raise socketio.exceptions.ConnectionRefusedError("invalid token")
+
+        user_id = self.tokens[token]
+        self.sessions[sid] = user_id
+        self.sids[user_id].add(sid)
+        self.events["connect"] += 1
+
+        await self.sio.enter_room(sid, self._channel(user_id))
+        for room_id in self.users[user_id]["rooms"]:
+            await self.sio.enter_room(sid, str(room_id))
+            await self._status("join", user_id, room_id)
+
+    async def on_disconnect(self, sid, *args):
+        user_id = self.sessions.pop(sid, None)
+        if user_id is None:
+            return
+        self.sids[user_id].discard(sid)
+        self.events["disconnect"] += 1
+        if not self.sids[user_id]:
+            for room_id in self.users[user_id]["rooms"]:
+                await self._status("leave", user_id, room_id)
+
+    async def on_text(self, sid, data):
+        self.events["text"] += 1
+        await self._emit(
+            "text_message",
+            self._message(
+                sid,
+                data,
+                message=data["message"],
+                private=data.get("receiver_id") is not None,
+                html=data.get("html", False),
+            ),
+            to=self._target(data),
+        )
+        return True
+
+    async def on_message_command(self, sid, data):
+        self.events["message_command"] += 1
+        await self._emit(
+            "command",
+            self._message(sid, data, command=data["command"]),
+            to=self._target(data),
+        )
+        return True
+
+    async def on_image(self, sid, data):
+        self.events["image"] += 1
+        fields = {key: data.get(key) for key in ["url", "width", "height"]}
+        await self._emit(
+            "image_message",
+            self._message(
+                sid, data, private=data.get("receiver_id") is not None, **fields
+            ),
+            to=self._target(data),
+        )
+        return True
+
+    async def on_mouse(self, sid, data):
+        self.events["mouse"] += 1
+        fields = {key: data.get(key) for key in ["type", "coordinates", "element_id"]}
+        await self._emit(
+            "mouse", self._message(sid, data, **fields), to=str(data["room"])
+        )
+        return True
+
+    async def on_room_created(self, sid, data):
+        self.events["room_created"] += 1
+        room_id = data["room"]
+        await self._emit(
+            "new_task_room",
+            {
+                "room": room_id,
+                "task": data["task"],
+                "users": [
+                    self._public(i) for i in sorted(self.rooms[room_id]["users"])
+                ],
+            },
+        )
@@ -0,0 +1,132 @@
+"""Clicks per second coco's wizard can make when `QuadrupleClient`
+requests every read from golmi compared with reading the local copies
+of the boards.
+
+The clicks are those of coco's mouse handler: the wizard alternately
+picks an object on the selection board and places it on the working
+board, which checks the placement rules on the target cells. All
+requests go to a `FakeGolmi` server on localhost, `--latency` delays
+every response to simulate a remote golmi.
+
+usage: python -m benchmarks.golmi_mirror [--clicks N] [--latency SECONDS]
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from coco.config import CONFIG, EMPTYSTATE, RULES, SELECTIONSTATE
+from coco.golmi_client import QuadrupleClient
+from coco.utils import MoveEvaluator, new_obj_name
+
+from benchmarks.fake_golmi import FakeGolmi
+
+BLOCK_SIZE = 20
+
+
+async def select_click(client, x, y):
+    """The wizard picks the object on a cell of the selection board."""
+    await client.grip_object(x=x, y=y, block_size=BLOCK_SIZE, board="selector")
+    await client.remove_selection("wizard_working", "mouse")
+    await client.remove_cell_grippers()
+
+
+async def place_click(client, evaluator, x, y):
+    """The wizard places the picked object, returns if it was allowed."""
+    selected = await client.get_gripped_object("selector")
+    current_state = await client.get_state("wizard_working")
+    if not selected:
+        return False
+
+    obj = list(selected.values()).pop()
+    obj["id_n"] = new_obj_name(current_state, client.get_cell_index("wizard_working"))
+    obj["x"] = x // BLOCK_SIZE
+    obj["y"] = y // BLOCK_SIZE
+    obj["gripped"] = None
+
+    allowed, _ = await evaluator.is_allowed(obj, client, x, y, BLOCK_SIZE)
+    if allowed:
+        await client.add_object(obj)
+        await client.get_state("wizard_working")
+
+    await client.remove_selection("wizard_selection", "mouse")
+    await client.remove_cell_grippers()
+    return allowed
+
+
+async def run(golmi, clicks, mirror, check_consistency=False):
+    client = QuadrupleClient(
+        f"{mirror}-{check_consistency}",
+        golmi.address,
+        mirror=mirror,
+        check_consistency=check_consistency,
+    )
+    await client.run(golmi.password)
+    await client.load_config(CONFIG)
+    await client.load_state(SELECTIONSTATE, "selector")
+    await client.clear_state("wizard_working")
+
+    evaluator = MoveEvaluator(RULES)
+    selectable = [
+        (obj["x"] * BLOCK_SIZE, obj["y"] * BLOCK_SIZE)
+        for obj in SELECTIONSTATE["objs"].values()
+    ]
+    cells = int(CONFIG["width"] * CONFIG["height"])
+
+    golmi.calls.clear()
+    placed = 0
+    start = time.perf_counter()
+    for i in range(clicks // 2):
+        await select_click(client, *selectable[i % len(selectable)])
+        cell = (7 * i) % cells
+        x = (cell % int(CONFIG["width"])) * BLOCK_SIZE
+        y = (cell // int(CONFIG["width"])) * BLOCK_SIZE
+        placed += await place_click(client, evaluator, x, y)
+        # keep the board from filling up
+        if i % 64 == 63:
+            await client.clear_state("wizard_working")
+    elapsed = time.perf_counter() - start
+
+    await client.disconnect()
+    return {
+        "clicks_per_s": 2 * (clicks // 2) / elapsed,
+        "requests_per_click": sum(golmi.calls.values()) / max(1, clicks),
+        "placed": placed,
+        "inconsistencies": sum(client.inconsistencies.values()),
+    }
+
+
+async def main(args):
+    golmi = FakeGolmi(latency=args.latency).start()
+    results = dict()
+    results["golmi"] = await run(golmi, args.clicks, mirror=False)
+    results["mirror"] = await run(golmi, args.clicks, mirror=True)
+    results["checked"] = await run(
+        golmi, args.clicks, mirror=True, check_consistency=True
+    )
+    golmi.stop()
+
+    print(f"{args.clicks} clicks, {args.latency * 1000:.1f} ms golmi latency")
+    for name, result in results.items():
+        print(
+            f"{name:<8} {result['clicks_per_s']:8.1f} clicks/s | "
+            f"{result['requests_per_click']:5.2f} requests/click | "
+            f"placed {result['placed']:4d} | "
+            f"inconsistencies {result['inconsistencies']}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark golmi board mirrors.")
+    parser.add_argument("--clicks", type=int, default=400, help="clicks per run")
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.002,
+        help="seconds every golmi request is delayed",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s:%(message)s")
+    asyncio.run(main(args))
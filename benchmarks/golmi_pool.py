@@ -0,0 +1,132 @@
+"""Time to create the golmi clients of many simultaneous rooms and the
+threads they hold, with and without a shared `GolmiPool`.
+
+coco's `QuadrupleClient` connects the sockets of its four boards and
+opens an HTTP session per room, or with a `GolmiPool` takes connected
+spare sockets and shares one HTTP session between all rooms. The rooms
+arrive `--interval` seconds apart, the pool is warmed by its first room.
+recolage's `GolmiClient` used to connect a second socket per room that
+was never used nor disconnected; its sync clients hold threads.
+
+All clients connect to a `FakeGolmi` server on localhost.
+
+usage: python -m benchmarks.golmi_pool [--rooms N] [--interval SECONDS]
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import threading
+import time
+
+import socketio
+
+from coco.golmi_client import GolmiPool, QuadrupleClient
+from recolage.config import DEMO_BOARD
+from recolage.golmi_client import GolmiClient
+
+from benchmarks.fake_golmi import FakeGolmi
+
+
+class RecolageBot:
+    version = "no_feedback"
+
+
+def demo_socket_run(client, address, room_id, auth):
+    """recolage's `GolmiClient.run` before, with the unused socket."""
+    client.socket.connect(address, auth={"password": auth})
+    client.socket.call("join", {"room_id": room_id})
+
+    client.demo_socket = socketio.Client()
+    client.demo_socket.connect(address, auth={"password": auth})
+    client.socket.call("join", {"room_id": f"{room_id}_demo"})
+    client.socket.emit("load_config", DEMO_BOARD["config"])
+    client.socket.emit("load_state", DEMO_BOARD["state"])
+
+
+async def create_room(golmi, room_id, pool):
+    start = time.perf_counter()
+    client = QuadrupleClient(room_id, golmi.address, pool=pool)
+    await client.run(golmi.password)
+    return client, time.perf_counter() - start
+
+
+async def run_coco(golmi, rooms, interval, pooled):
+    pool = GolmiPool(golmi.address, golmi.password) if pooled else None
+    if pool is not None:
+        client, _ = await create_room(golmi, "warm", pool)
+        await client.disconnect()
+        await asyncio.sleep(0.2)
+
+    threads = threading.active_count()
+    tasks = list()
+    for i in range(rooms):
+        tasks.append(asyncio.ensure_future(create_room(golmi, f"{pooled}-{i}", pool)))
+        await asyncio.sleep(interval)
+    results = await asyncio.gather(*tasks)
+    threads = threading.active_count() - threads
+
+    for client, _ in results:
+        await client.disconnect()
+    if pool is not None:
+        await pool.close()
+
+    latencies = [latency * 1000 for _, latency in results]
+    return {
+        "mean_ms": statistics.mean(latencies),
+        "max_ms": max(latencies),
+        "threads": threads,
+    }
+
+
+def run_recolage(golmi, rooms, demo_socket):
+    threads = threading.active_count()
+    clients = list()
+    start = time.perf_counter()
+    for i in range(rooms):
+        client = GolmiClient(None, RecolageBot(), i)
+        if demo_socket:
+            demo_socket_run(client, golmi.address, f"r{i}", golmi.password)
+        else:
+            client.run(golmi.address, f"r{i}", golmi.password)
+        clients.append(client)
+    elapsed = (time.perf_counter() - start) * 1000 / rooms
+    threads = threading.active_count() - threads
+
+    for client in clients:
+        client.disconnect()
+        if demo_socket:
+            client.demo_socket.disconnect()
+    return {"mean_ms": elapsed, "threads": threads}
+
+
+async def main(args):
+    golmi = FakeGolmi().start()
+    print(f"{args.rooms} rooms, {args.interval * 1000:.0f} ms apart")
+    for name, pooled in (("coco", False), ("coco pool", True)):
+        result = await run_coco(golmi, args.rooms, args.interval, pooled)
+        print(
+            f"{name:<17} {result['mean_ms']:7.1f} ms/room mean "
+            f"{result['max_ms']:7.1f} ms max | {result['threads']:4d} threads"
+        )
+
+    for name, demo_socket in (("recolage before", True), ("recolage", False)):
+        result = await asyncio.to_thread(run_recolage, golmi, args.rooms, demo_socket)
+        print(
+            f"{name:<17} {result['mean_ms']:7.1f} ms/room mean "
+            f"{'':>15} | {result['threads']:4d} threads"
+        )
+    golmi.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark golmi connections.")
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument(
+        "--interval", type=float, default=0.02, help="seconds between new rooms"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s:%(message)s")
+    asyncio.run(main(args))
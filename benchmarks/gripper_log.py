@@ -0,0 +1,89 @@
+"""Log events and bytes of the gripper movements in recolage's
+show_gripper rooms, one `gripper_movement` event per golmi update as
+before compared with the trajectories of the `GripperRecorder`.
+
+Every room moves its gripper by keyboard for `--seconds` seconds with
+`--rate` updates per second, the gripper often stays on the same cell
+between updates. Time is simulated, the trajectories are flushed every
+`GRIPPER_LOG_INTERVAL` seconds.
+
+usage: python -m benchmarks.gripper_log [--rooms N] [--seconds N] [--rate N]
+"""
+
+import argparse
+import json
+import random
+import time
+
+from recolage import golmi_client
+from recolage.config import GRIPPER_LOG_INTERVAL
+from recolage.golmi_client import GripperRecorder
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return 1700000000 + self.now
+
+
+def walk(rng, updates):
+    x, y = 12.5, 12.5
+    for _ in range(updates):
+        if rng.random() < 0.4:
+            x += rng.choice([-0.5, 0.5])
+        elif rng.random() < 0.4:
+            y += rng.choice([-0.5, 0.5])
+        yield x, y
+
+
+def run(rooms, seconds, rate):
+    clock = Clock()
+    golmi_client.time = clock
+    rng = random.Random(0)
+    before, after = list(), list()
+    record_s = 0.0
+    stats = dict()
+    for _ in range(rooms):
+        clock.now = 0.0
+        recorder = GripperRecorder(after.append, interval=3600)
+        flushed = 0.0
+        for x, y in walk(rng, int(seconds * rate)):
+            clock.now += 1 / rate
+            before.append({"coordinates": {"x": x, "y": y}})
+            start = time.perf_counter()
+            recorder.record(x, y)
+            if clock.now - flushed >= GRIPPER_LOG_INTERVAL:
+                recorder.flush("interval")
+                flushed = clock.now
+            record_s += time.perf_counter() - start
+        for key, value in recorder.close().items():
+            stats[key] = stats.get(key, 0) + value
+    golmi_client.time = time
+    return before, after, stats, record_s
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark gripper logs.")
+    parser.add_argument("--rooms", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=60)
+    parser.add_argument("--rate", type=float, default=30)
+    args = parser.parse_args()
+
+    before, after, stats, record_s = run(args.rooms, args.seconds, args.rate)
+    print(
+        f"{args.rooms} rooms, {args.seconds:.0f} s at {args.rate:.0f} updates/s, "
+        f"trajectories every {GRIPPER_LOG_INTERVAL} s"
+    )
+    print(
+        f"gripper_movement   {len(before):6d} events {len(json.dumps(before)) / 1024:7.1f} KiB"
+    )
+    print(
+        f"gripper_trajectory {len(after):6d} events {len(json.dumps(after)) / 1024:7.1f} KiB | "
+        f"{stats['suppressed']} suppressed, "
+        f"{record_s * 1e6 / stats['updates']:.2f} us/update"
+    )
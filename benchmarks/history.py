@@ -0,0 +1,124 @@
+"""Memory of coco's undo/redo history for long wizard sessions, the
+linked list of `ActionNode`s kept before compared with the
+`ActionHistory` ring.
+
+The simulated wizard places pieces of the selection board on random
+cells, removes some of them again and undoes and redoes actions. As in
+coco every added object is a new dict, and the object of a removal is
+read from the board again, so it is an equal copy of the added one. The
+memory still allocated after the session is reported, with the time per
+action.
+
+usage: python -m benchmarks.history [--actions N] [--depths N ...]
+"""
+
+import argparse
+import copy
+import random
+import time
+import tracemalloc
+
+from coco.config import SELECTIONSTATE
+from coco.utils import ActionHistory
+
+
+class ActionNode:
+    """The action history before `ActionHistory`."""
+
+    def __init__(self, action, obj):
+        self.action = action
+        self.obj = obj
+        self.parent = None
+        self.child = None
+
+    def next_state(self):
+        if self.child is not None:
+            return self.child
+        return None
+
+    def previous_state(self):
+        if self.parent is not None:
+            return self.parent
+        return None
+
+    def add_action(self, action, object):
+        new_node = ActionNode(action, object)
+        new_node.parent = self
+        self.child = new_node
+        return new_node
+
+    @classmethod
+    def new_tree(cls):
+        return cls("root", None)
+
+
+class NodeHistory:
+    """`ActionNode` behind the calls of `ActionHistory`."""
+
+    def __init__(self):
+        self.root = self.current = ActionNode.new_tree()
+
+    def add(self, action, obj):
+        self.current = self.current.add_action(action, obj)
+
+    def undo(self):
+        previous = self.current.previous_state()
+        if previous is not None:
+            self.current = previous
+
+    def redo(self):
+        following = self.current.next_state()
+        if following is not None:
+            self.current = following
+
+
+def session(history, actions, seed=0):
+    rng = random.Random(seed)
+    pieces = list(SELECTIONSTATE["objs"].values())
+    board = dict()
+    next_id = 0
+    for _ in range(actions):
+        choice = rng.random()
+        if choice < 0.1:
+            history.undo()
+        elif choice < 0.15:
+            history.redo()
+        elif board and choice < 0.35:
+            obj_id = rng.choice(list(board))
+            history.add("delete", copy.deepcopy(board.pop(obj_id)))
+        else:
+            obj = copy.deepcopy(rng.choice(pieces))
+            obj["id_n"] = str(next_id)
+            obj["x"] = float(rng.randrange(8))
+            obj["y"] = float(rng.randrange(8))
+            obj["gripped"] = None
+            next_id += 1
+            board[obj["id_n"]] = obj
+            history.add("add", obj)
+    return history
+
+
+def measure(create, actions):
+    tracemalloc.start()
+    start = time.perf_counter()
+    history = session(create(), actions)
+    elapsed = (time.perf_counter() - start) * 1e6 / actions
+    kept, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del history
+    return kept / 1024, elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the action history.")
+    parser.add_argument("--actions", type=int, default=10000)
+    parser.add_argument("--depths", type=int, nargs="+", default=[100, 500, 10000])
+    args = parser.parse_args()
+
+    print(f"{args.actions} actions per session")
+    kib, us = measure(NodeHistory, args.actions)
+    print(f"{'ActionNode':<20} {kib:8.0f} KiB kept | {us:5.2f} us/action")
+    for depth in args.depths:
+        kib, us = measure(lambda: ActionHistory(depth), args.actions)
+        name = f"ActionHistory({depth})"
+        print(f"{name:<20} {kib:8.0f} KiB kept | {us:5.2f} us/action")
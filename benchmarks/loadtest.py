@@ -0,0 +1,397 @@
+"""Load test of a task bot behind the concierge with simulated users.
+
+A `FakeSlurk` server, the concierge bot and the task bot run in this
+process. Simulated users (one socket.io connection each) join the
+waiting room in pairs, get paired by the concierge and then play
+`--rounds` rounds against the task bot. For every request sent by a
+user the time until the bot's answer arrives is measured.
+
+Scenarios:
+    echo    every user sends private messages, echo sends them back
+    wordle  both users of a pair submit the same guess, wordle answers
+            the first with a waiting notice and the pair with the
+            evaluated guess
+
+usage: python -m benchmarks.loadtest --bot echo [--pairs N] [--rounds N]
+"""
+
+import argparse
+import asyncio
+from collections import Counter, defaultdict
+import logging
+import os
+import sys
+import threading
+import time
+
+import socketio
+
+from benchmarks.fake_slurk import FakeSlurk
+
+
+def percentile(values, p):
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class SimulatedUser:
+    """A participant connected with its own socket.io client.
+
+    Every received event is matched against the pending expectations,
+    so an answer is timed from the moment it arrives.
+    """
+
+    def __init__(self, uri, user_id, token, timeout):
+        self.uri = uri
+        self.id = user_id
+        self.token = token
+        self.timeout = timeout
+        self.sio = socketio.AsyncClient()
+        self.sio.on("*", self._on_event)
+        self._expected = list()
+
+    async def connect(self):
+        await self.sio.connect(
+            self.uri,
+            headers={"Authorization": f"Bearer {self.token}", "user": str(self.id)},
+            namespaces="/",
+            wait_timeout=self.timeout,
+        )
+
+    async def disconnect(self):
+        await self.sio.disconnect()
+
+    async def _on_event(self, event, data=None):
+        received = time.perf_counter()
+        for expected in list(self._expected):
+            predicate, future = expected
+            if future.done():
+                self._expected.remove(expected)
+            elif predicate(event, data):
+                future.set_result((received, data))
+                self._expected.remove(expected)
+
+    def expect(self, predicate):
+        """Future resolved with the time and data of the first event
+        for which `predicate(event, data)` holds."""
+        future = asyncio.get_running_loop().create_future()
+        self._expected.append((predicate, future))
+        return future
+
+    async def wait(self, future):
+        return await asyncio.wait_for(future, self.timeout)
+
+    async def request(self, event, data, predicate):
+        """Emit an event and return the seconds until the answer."""
+        future = self.expect(predicate)
+        start = time.perf_counter()
+        await self.sio.emit(event, data)
+        received, _ = await self.wait(future)
+        return received - start
+
+
+class Scenario:
+    """Starts a task bot and describes how a pair plays against it."""
+
+    bot_name = "Bot"
+    bot_in_waiting_room = False
+    max_rounds = None
+
+    def __init__(self, slurk, task_id, waiting_room):
+        self.slurk = slurk
+        self.task_id = task_id
+        self.waiting_room = waiting_room
+        self.bot_id, self.bot_token = slurk.create_user(
+            self.bot_name,
+            rooms=[waiting_room] if self.bot_in_waiting_room else [],
+        )
+
+    def start_bot(self):
+        raise NotImplementedError
+
+    def is_ready(self, room_id):
+        """Predicate for the event telling that the bot took over the room."""
+        return lambda event, data: (
+            event == "status"
+            and data["room"] == room_id
+            and data["type"] == "join"
+            and data["user"]["id"] == self.bot_id
+        )
+
+    async def play(self, room_id, players, round_number):
+        """Play one round, return the measured latencies."""
+        raise NotImplementedError
+
+
+class EchoScenario(Scenario):
+    bot_name = "Echo"
+
+    def start_bot(self):
+        from echo.__main__ import EchoBot
+
+        self.bot = EchoBot(
+            self.bot_token, self.bot_id, self.task_id, self.slurk.host, self.slurk.port
+        )
+        run_in_thread(lambda: asyncio.run(self.bot.run()))
+
+    async def play(self, room_id, players, round_number):
+        latencies = list()
+        for player in players:
+            message = f"{player.id}-{round_number}"
+            latencies.append(
+                await player.request(
+                    "text",
+                    {"room": room_id, "message": message, "receiver_id": self.bot_id},
+                    lambda event, data: event == "text_message"
+                    and data["user"]["id"] == self.bot_id
+                    and data["message"] == message,
+                )
+            )
+        return latencies
+
+
+class WordleScenario(Scenario):
+    bot_name = "Wordle"
+    bot_in_waiting_room = True
+    # the game is lost once all six guesses are used
+    max_rounds = 5
+
+    def start_bot(self):
+        sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "wordle"))
+        from lib.wordle_bot import WordleBot
+
+        self.bot = WordleBot(
+            self.bot_token, str(self.bot_id), self.slurk.host, self.slurk.port
+        )
+        self.bot.task_id = self.task_id
+        self.bot.waiting_room = self.waiting_room
+        run_in_thread(self.bot.run)
+
+    def is_ready(self, room_id):
+        return lambda event, data: (
+            event == "command"
+            and data["room"] == room_id
+            and data["command"] == {"command": "wordle_init"}
+        )
+
+    def wrong_guess(self, room_id):
+        """A valid guess that does not end the round."""
+        word, _, _ = self.bot.sessions[room_id].images[0]
+        for guess in sorted(self.bot.wordlist):
+            if len(guess) == len(word) and guess != word:
+                return guess
+
+    async def play(self, room_id, players, round_number):
+        first, second = players
+        command = {
+            "guess": self.wrong_guess(room_id),
+            "remaining": 6 - round_number,
+        }
+        latencies = list()
+        latencies.append(
+            await first.request(
+                "message_command",
+                {"command": command, "room": room_id},
+                lambda event, data: event == "text_message"
+                and data["user"]["id"] == self.bot_id
+                and "wait for your partner" in data["message"],
+            )
+        )
+        latencies.append(
+            await second.request(
+                "message_command",
+                {"command": command, "room": room_id},
+                lambda event, data: event == "command"
+                and data["user"]["id"] == self.bot_id
+                and data["command"].get("command") == "wordle_guess",
+            )
+        )
+        return latencies
+
+
+SCENARIOS = {"echo": EchoScenario, "wordle": WordleScenario}
+
+
+def run_in_thread(target):
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+def start_concierge(slurk, waiting_room):
+    from concierge.concierge import ConciergeBot
+
+    user_id, token = slurk.create_user("Concierge", rooms=[waiting_room])
+    concierge = ConciergeBot(token, str(user_id), slurk.host, slurk.port)
+    run_in_thread(concierge.run)
+    return concierge
+
+
+async def pair_up(scenario, user, results):
+    """Connect a user and return the task room it is moved to."""
+    start = time.perf_counter()
+    moved = user.expect(
+        lambda event, data: event == "joined_room"
+        and data["room"] != scenario.waiting_room
+    )
+    try:
+        await user.connect()
+        received, data = await user.wait(moved)
+    except asyncio.TimeoutError:
+        results["errors"]["not paired"] += 1
+        return None
+    except socketio.exceptions.ConnectionError:
+        results["errors"]["connection refused"] += 1
+        return None
+    results["pairing"].append(received - start)
+    return data["room"]
+
+
+async def play_pair(scenario, pair, room_id, ready, args, results):
+    try:
+        await pair[0].wait(ready)
+    except asyncio.TimeoutError:
+        results["errors"]["bot did not join"] += 1
+        return
+
+    for round_number in range(args.rounds):
+        try:
+            latencies = await scenario.play(room_id, pair, round_number)
+        except asyncio.TimeoutError:
+            results["errors"]["timeout"] += 1
+            return
+        except Exception as error:
+            logging.exception(error)
+            results["errors"][type(error).__name__] += 1
+            return
+        results["response"].extend(latencies)
+
+
+async def run(scenario, args):
+    slurk = scenario.slurk
+    results = {"pairing": list(), "response": list(), "errors": Counter()}
+
+    users = list()
+    for i in range(2 * args.pairs):
+        user_id, token = slurk.create_user(
+            f"Player {i}", task_id=scenario.task_id, rooms=[scenario.waiting_room]
+        )
+        users.append(SimulatedUser(slurk.uri, user_id, token, args.timeout))
+
+    # every user waits for the bot to take over its task room
+    ready = [
+        user.expect(
+            lambda event, data: data is not None
+            and data.get("room") not in {None, scenario.waiting_room}
+            and scenario.is_ready(data["room"])(event, data)
+        )
+        for user in users
+    ]
+
+    async def join(index, user):
+        # spread the users over the ramp-up time
+        await asyncio.sleep(args.ramp * index / len(users))
+        return await pair_up(scenario, user, results)
+
+    start = time.perf_counter()
+    rooms = await asyncio.gather(*[join(i, user) for i, user in enumerate(users)])
+    results["pairing_time"] = time.perf_counter() - start
+
+    # the concierge pairs users first come, first served, so the
+    # pairs are only known once the users arrived in their rooms
+    pairs = defaultdict(list)
+    for user, room_id, future in zip(users, rooms, ready):
+        if room_id is not None:
+            pairs[room_id].append((user, future))
+    for room_id, pair in list(pairs.items()):
+        if len(pair) != 2:
+            results["errors"]["incomplete pair"] += len(pair)
+            del pairs[room_id]
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[
+            play_pair(
+                scenario, [user for user, _ in pair], room_id, pair[0][1], args, results
+            )
+            for room_id, pair in pairs.items()
+        ]
+    )
+    results["play_time"] = time.perf_counter() - start
+
+    for user in users:
+        await user.disconnect()
+    return results
+
+
+def report(name, args, results, slurk):
+    print(f"{name}: {args.pairs} pairs, {args.rounds} rounds per pair")
+    for key in ["pairing", "response"]:
+        values = [value * 1000 for value in results[key]]
+        print(
+            f"{key:<10} n {len(values):6d} | p50 {percentile(values, 50):8.1f} ms | "
+            f"p95 {percentile(values, 95):8.1f} ms | p99 {percentile(values, 99):8.1f} ms"
+        )
+    throughput = len(results["response"]) / max(results["play_time"], 1e-9)
+    print(f"throughput {throughput:8.1f} answers/s")
+    requests = len(results["response"])
+    errors = sum(results["errors"].values())
+    print(
+        f"errors     {errors} ({errors / max(1, errors + requests):.1%})"
+        + "".join(f" | {key}: {value}" for key, value in results["errors"].items())
+    )
+    print("slurk api calls:")
+    slurk.report(limit=8)
+    print(
+        "socket.io events: "
+        + ", ".join(f"{event} {count}" for event, count in slurk.events.most_common())
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test a task bot.")
+    parser.add_argument("--bot", choices=sorted(SCENARIOS), required=True)
+    parser.add_argument("--pairs", type=int, default=20, help="simultaneous pairs")
+    parser.add_argument("--rounds", type=int, default=5, help="rounds per pair")
+    parser.add_argument(
+        "--ramp", type=float, default=1.0, help="seconds until all pairs joined"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=30.0, help="seconds to wait for an answer"
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="seconds every slurk api call is delayed",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s:%(message)s")
+    scenario_class = SCENARIOS[args.bot]
+    if scenario_class.max_rounds is not None:
+        args.rounds = min(args.rounds, scenario_class.max_rounds)
+
+    slurk = FakeSlurk(latency=args.latency).start()
+    layout_id = slurk.create_layout()
+    waiting_room = slurk.create_room(layout_id)
+    task_id = slurk.create_task(args.bot, 2, layout_id)
+
+    scenario = scenario_class(slurk, task_id, waiting_room)
+    scenario.start_bot()
+    concierge = start_concierge(slurk, waiting_room)
+    # some bots log every socket.io event
+    for name in ["socketio.client", "engineio.client"]:
+        logging.getLogger(name).setLevel(logging.ERROR)
+    # give the bots time to connect
+    time.sleep(1)
+
+    results = asyncio.run(run(scenario, args))
+    report(args.bot, args, results, slurk)
+    print(f"concierge: {concierge.matchmaker.stats()}")
+
+    # bots keep non-daemon timer threads running
+    sys.stdout.flush()
+    os._exit(0)
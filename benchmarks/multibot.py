@@ -0,0 +1,92 @@
+"""Memory needed by several task bots, each in its own process compared
+with all of them hosted in one process by `host_bots.BotHost`.
+
+The bots are only created, not connected, so the numbers cover the
+interpreter, the imported dependencies and the state of a bot.
+
+usage: python -m benchmarks.multibot [--bots NAME ...]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+from benchmarks.timers import rss_kib
+
+BOTS = {
+    "testbot": "testbot.__main__:EchoBot",
+    "strict_turn_taking": "strict_turn_taking.__main__:StrictTurnTakingBot",
+    "drawing_game": "drawing_game.drawing_game_bot:DrawingBot",
+    "recolage": "recolage.__main__:RecolageBot",
+    "recolageval": "recolageval.__main__:RecolagEval",
+}
+TOKEN = "00000000-0000-0000-0000-000000000000"
+
+
+def measure_separate(name):
+    """Resident memory of a process running one bot on its own."""
+    from host_bots import load_bot_class
+
+    if name is not None:
+        bot_class = load_bot_class(BOTS[name])
+        bot_class(TOKEN, 1, 1, "http://localhost", None)
+    return {"rss_kib": rss_kib()}
+
+
+def measure_hosted(names):
+    """Resident memory of one process and the increase per hosted bot."""
+    from host_bots import BotHost, load_bot_class
+
+    bot_host = BotHost(TOKEN, 1, "http://localhost", None)
+    result = {"base_kib": rss_kib(), "bots": dict()}
+    for task, name in enumerate(names, start=1):
+        before = rss_kib()
+        bot_host.add(load_bot_class(BOTS[name]), task)
+        result["bots"][name] = rss_kib() - before
+    result["rss_kib"] = rss_kib()
+    return result
+
+
+def run(*args):
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.multibot", *args],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return json.loads(output.stdout.splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bot memory.")
+    parser.add_argument(
+        "--bots", nargs="+", choices=sorted(BOTS), default=list(BOTS), metavar="NAME"
+    )
+    parser.add_argument("--separate", help=argparse.SUPPRESS)
+    parser.add_argument("--hosted", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.separate is not None:
+        name = None if args.separate == "none" else args.separate
+        print(json.dumps(measure_separate(name)))
+        sys.exit()
+    if args.hosted:
+        print(json.dumps(measure_hosted(args.bots)))
+        sys.exit()
+
+    empty = run("--separate", "none")["rss_kib"]
+    hosted = run("--hosted", "--bots", *args.bots)
+    print(f"{'bot':<20} {'own process':>12} {'hosted':>12}")
+    print(
+        f"{'(no bot)':<20} {empty / 1024:8.1f} MiB {hosted['base_kib'] / 1024:8.1f} MiB"
+    )
+    total = 0
+    for name in args.bots:
+        separate = run("--separate", name)["rss_kib"]
+        total += separate
+        print(
+            f"{name:<20} {separate / 1024:8.1f} MiB "
+            f"{hosted['bots'][name] / 1024:+8.1f} MiB"
+        )
+    print(f"{'total':<20} {total / 1024:8.1f} MiB {hosted['rss_kib'] / 1024:8.1f} MiB")
@@ -0,0 +1,224 @@
+"""Time to find coco's patterns (connectors, bridges and screws) on
+full working boards, the `Pattern.detect` matched on every cell before
+compared with the compiled patterns and the `PatternDetector`.
+
+Boards are tiled with copies of all the pattern files side by side. The
+former `detect` is called for every pattern on every cell, the compiled
+patterns scan the whole board once (`PatternDetector.scan`), and the
+detector matches only the cells of each placed piece again while the
+board is built (`PatternDetector.update`, time per placed piece).
+
+usage: python -m benchmarks.patterns [--sizes N ...]
+"""
+
+import argparse
+import copy
+import itertools
+import json
+from pathlib import Path
+import time
+
+from coco.config import EMPTYSTATE, ROOT
+from coco.golmi_client import CellIndex, object_cells
+from coco.utils import PATTERNS, PatternDetector
+
+PATTERN_FILES = Path(f"{ROOT}/data/patterns")
+
+
+class DictPattern(dict):
+    """Pattern before it was compiled into a signature."""
+
+    n_elements = 0
+    name = ""
+
+    @property
+    def cells(self):
+        return len(self.keys())
+
+    def detect(self, this_cell, board):
+        coor, cell = this_cell
+        objs = [board["objs"][i]["type"] for i in cell]
+        if objs in self.values():
+            for coordinate, part in self.items():
+                if objs == part:
+                    # there is a match, try to match the other cells from the pattern
+                    rest_pattern = copy.deepcopy(self)
+                    rest_pattern.pop(coordinate)
+
+                    if not rest_pattern:
+                        # pattern only has one cell
+                        return True
+                    else:
+                        # collect the other cells from the board
+                        # that could complete this pattern
+                        other_board_cells = dict()
+                        for other_c in rest_pattern.keys():
+                            # obtain the other coordinates from this pattern
+                            other_x, other_y = map(int, other_c.split(":"))
+
+                            # coordinate of this cell
+                            this_x, this_y = map(int, coordinate.split(":"))
+
+                            # calculate relative position of other cell to current cell
+                            movement = (this_x - other_x, this_y - other_y)
+
+                            # index other cells on the board
+                            board_x, board_y = map(int, coor.split(":"))
+                            other_board_coor = (
+                                f"{board_x + movement[0]}:{board_y + movement[1]}"
+                            )
+
+                            if other_board_coor in board["objs_grid"]:
+                                # get the name of the bjects on the other cell
+                                other_board_cells[other_board_coor] = board[
+                                    "objs_grid"
+                                ][other_board_coor]
+
+                        board_pattern_named = {coor: objs}
+                        board_pattern_ids = {coor: cell}
+
+                        # convert other cells from the board from obj_ids to object name
+                        for key, value in other_board_cells.items():
+                            board_pattern_named[key] = [
+                                board["objs"][i]["type"] for i in value
+                            ]
+                            board_pattern_ids[key] = value
+
+                        if len(board_pattern_named.values()) == len(self.values()):
+                            board_pieces = list(board_pattern_named.values())
+                            pattern_pieces = list(self.values())
+                            board_pieces.sort()
+                            pattern_pieces.sort()
+
+                            if pattern_pieces == board_pieces:
+                                # we have the same object names, make sure the pattern on the board
+                                # is composed by the same number of objects of this pattern
+                                flatten = itertools.chain.from_iterable(
+                                    board_pattern_ids.values()
+                                )
+                                n = len(set([i for i in flatten]))
+                                if n == self.n_elements:
+                                    return True
+        return False
+
+
+def get_dict_patterns():
+    patterns = list()
+    for filename in PATTERN_FILES.iterdir():
+        if filename.suffix == ".json":
+            pattern_dict = json.loads(filename.read_text())
+
+            this_pattern = DictPattern()
+            for position, objs in pattern_dict["objs_grid"].items():
+                this_pattern[position] = [pattern_dict["objs"][i]["type"] for i in objs]
+
+            flatten = itertools.chain.from_iterable(pattern_dict["objs_grid"].values())
+            n = len(set([i for i in flatten]))
+            this_pattern.n_elements = n
+            this_pattern.name = filename.stem
+
+            patterns.append(this_pattern)
+
+    return patterns
+
+
+def pattern_pieces():
+    """Pieces of every pattern file in stacking order, moved to 0:0."""
+    pieces = list()
+    for filename in sorted(PATTERN_FILES.glob("*.json")):
+        state = json.loads(filename.read_text())
+        level = dict()
+        for stack in state["objs_grid"].values():
+            for height, obj_id in enumerate(stack):
+                level[obj_id] = height
+        objs = [state["objs"][obj_id] for obj_id in level]
+        min_x = min(obj["x"] for obj in objs)
+        min_y = min(obj["y"] for obj in objs)
+        pieces.append(
+            [
+                {
+                    **state["objs"][obj_id],
+                    "x": state["objs"][obj_id]["x"] - min_x,
+                    "y": state["objs"][obj_id]["y"] - min_y,
+                }
+                for obj_id in sorted(level, key=lambda i: (level[i], i))
+            ]
+        )
+    return pieces
+
+
+def full_board(size):
+    """Pieces tiling a board with the patterns, in placing order."""
+    objs = list()
+    tiles = itertools.cycle(pattern_pieces())
+    for y in range(0, size - 1, 2):
+        for x in range(0, size - 1, 2):
+            for obj in next(tiles):
+                objs.append(
+                    {
+                        **obj,
+                        "id_n": str(len(objs)),
+                        "x": obj["x"] + x,
+                        "y": obj["y"] + y,
+                    }
+                )
+    return objs
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return (time.perf_counter() - start) * 1000 / repeat, result
+
+
+def dict_scan(patterns, board):
+    found = 0
+    for cell in board["objs_grid"].items():
+        for pattern in patterns:
+            found += pattern.detect(cell, board)
+    return found
+
+
+def run(size, repeat):
+    objs = full_board(size)
+    state = copy.deepcopy(EMPTYSTATE)
+    cells = CellIndex(state)
+    detector = PatternDetector(PATTERNS)
+    elapsed = 0
+    for obj in objs:
+        cells.add(obj)
+        start = time.perf_counter()
+        detector.update(state, object_cells(obj))
+        elapsed += time.perf_counter() - start
+    update_us = elapsed * 1e6 / len(objs)
+
+    dict_patterns = get_dict_patterns()
+    dict_ms, dict_found = timed(lambda: dict_scan(dict_patterns, state), repeat)
+    scan_ms, found = timed(lambda: PatternDetector(PATTERNS).scan(state), repeat)
+    assert len(found) == len(detector.found)
+    return {
+        "objs": len(objs),
+        "dict_ms": dict_ms,
+        "dict_found": dict_found,
+        "scan_ms": scan_ms,
+        "found": len(found),
+        "update_us": update_us,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark coco's pattern matcher.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        result = run(size, args.repeat)
+        print(
+            f"{size:>3}x{size:<3} {result['objs']:5d} objs | "
+            f"detect per cell {result['dict_ms']:8.2f} ms "
+            f"({result['dict_found']} cells matched) | "
+            f"scan {result['scan_ms']:6.2f} ms ({result['found']} patterns) | "
+            f"update {result['update_us']:5.1f} us/piece"
+        )
@@ -0,0 +1,135 @@
+"""Time and memory to sample the boards of a new recolage room, parsing
+the whole board file per room as the `Dataloader` did before compared
+with the `BoardIndex` saved next to the board file.
+
+The boards of `recolage/data/boards.jsonl` are repeated with new state
+ids into a temporary file of `--sizes` boards. Startup is the time to
+build the index from the board file and to load the saved index, as a
+restarted bot does. The former parsing is skipped above `--parse-limit`
+boards, it holds all of them in memory.
+
+usage: python -m benchmarks.recolage_boards [--sizes N ...] [--rooms N]
+"""
+
+import argparse
+from itertools import cycle
+import json
+from pathlib import Path
+import random
+import tempfile
+import time
+import tracemalloc
+
+from recolage.config import BOARDS, BOARDS_PER_ROOM
+from board_index import BoardIndex
+from recolage.dataloader import Dataloader
+
+
+class ParsingDataloader(Dataloader):
+    """Dataloader before the `BoardIndex`."""
+
+    def _sample_boards(self):
+        self.clear()
+        board_ids = set()
+        boards = self._read_board_file()
+        images_per_level = self._n // 3
+
+        for level in cycle(["easy", "medium", "hard"]):
+            if boards.get(level):
+                for board in random.sample(boards[level], images_per_level):
+                    state_id = board["state"]["state_id"]
+
+                    if state_id not in board_ids:
+                        self.append(board)
+                        board_ids.add(state_id)
+
+                    if len(self) == self._n:
+                        return
+
+    def _read_board_file(self):
+        boards = dict(easy=list(), medium=list(), hard=list())
+        with self._path.open("r", encoding="utf-8") as infile:
+            for line in infile:
+                board = json.loads(line)
+                level = board["board_info"]["difficoulty"]
+
+                state = board["state"]
+                target_id = str(board["target"])
+                state["targets"][target_id] = state["objs"][target_id]
+
+                boards[level].append(board)
+        return boards
+
+
+def write_boards(path, size):
+    lines = BOARDS.read_text(encoding="utf-8").splitlines()
+    with path.open("w", encoding="utf-8") as outfile:
+        for state_id, line in zip(range(size), cycle(lines)):
+            board = json.loads(line)
+            board["state"]["state_id"] = state_id
+            outfile.write(json.dumps(board) + "\n")
+
+
+def measure(create, rooms):
+    """Mean milliseconds and peak MiB allocated per room."""
+    start = time.perf_counter()
+    for _ in range(rooms):
+        create()
+    elapsed = (time.perf_counter() - start) * 1000 / rooms
+
+    tracemalloc.start()
+    create()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def run(size, rooms, parse_limit):
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "boards.jsonl"
+        write_boards(path, size)
+        result = {"size_mib": path.stat().st_size / 2**20}
+
+        start = time.perf_counter()
+        BoardIndex(path).boards()
+        result["build_s"] = time.perf_counter() - start
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        BoardIndex.get(path).boards()
+        result["load_s"] = time.perf_counter() - start
+        result["index_mib"] = tracemalloc.get_traced_memory()[0] / 2**20
+        tracemalloc.stop()
+
+        result["index_ms"], result["index_room_mib"] = measure(
+            lambda: Dataloader(path, BOARDS_PER_ROOM), rooms
+        )
+        BoardIndex.indices.pop(path)
+
+        if size <= parse_limit:
+            result["parse_ms"], result["parse_mib"] = measure(
+                lambda: ParsingDataloader(path, BOARDS_PER_ROOM), max(1, rooms // 10)
+            )
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark recolage boards.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--rooms", type=int, default=50, help="rooms per size")
+    parser.add_argument("--parse-limit", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{BOARDS_PER_ROOM} boards per room")
+    for size in args.sizes:
+        result = run(size, args.rooms, args.parse_limit)
+        parse = "skipped"
+        if "parse_ms" in result:
+            parse = f"{result['parse_ms']:8.1f} ms {result['parse_mib']:7.1f} MiB/room"
+        print(
+            f"{size:>6} boards {result['size_mib']:6.0f} MiB | "
+            f"build {result['build_s']:6.2f} s, load {result['load_s']:5.3f} s "
+            f"{result['index_mib']:5.1f} MiB | "
+            f"index {result['index_ms']:5.2f} ms {result['index_room_mib']:4.1f} MiB/room | "
+            f"parse {parse}"
+        )
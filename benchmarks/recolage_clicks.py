@@ -0,0 +1,95 @@
+"""Time to find the piece under a click in recolage, asking golmi over
+HTTP on every click as the `mouse` handler did before compared with the
+`PieceIndex` of the board loaded by the room's `GolmiClient`.
+
+Golmi is stood in for by a local HTTP server answering from the
+objs_grid of the board, so the requests only measure the round trip on
+this machine, a remote golmi server adds its network latency. Building
+the index when a board is loaded is reported as well.
+
+usage: python -m benchmarks.recolage_clicks [--clicks N]
+"""
+
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import threading
+import time
+
+import requests
+
+from board_index import select_target
+from recolage.config import BOARDS
+from recolage.golmi_client import PieceIndex
+from recolage.shapes import scale
+
+BLOCK_SIZE = 28.8
+
+
+def golmi_handler(board):
+    config, state = board["config"], board["state"]
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            _, _, _, x, y, block_size = self.path.split("/")
+            cell_size = float(block_size) / scale(config)
+            key = f"{int(float(y) // cell_size)}:{int(float(x) // cell_size)}"
+            stack = state["objs_grid"].get(key)
+            piece = {stack[-1]: state["objs"][stack[-1]]} if stack else dict()
+            body = json.dumps(piece).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark recolage clicks.")
+    parser.add_argument("--clicks", type=int, default=500)
+    args = parser.parse_args()
+
+    with BOARDS.open(encoding="utf-8") as infile:
+        board = select_target(json.loads(infile.readline()))
+    rng = random.Random(0)
+    clicks = [
+        (
+            rng.uniform(0, board["config"]["width"]) * BLOCK_SIZE,
+            rng.uniform(0, board["config"]["height"]) * BLOCK_SIZE,
+        )
+        for _ in range(args.clicks)
+    ]
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), golmi_handler(board))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    address = f"http://127.0.0.1:{server.server_port}"
+
+    start = time.perf_counter()
+    remote = [
+        requests.get(f"{address}/slurk/room/{x}/{y}/{BLOCK_SIZE}").json()
+        for x, y in clicks
+    ]
+    http_us = (time.perf_counter() - start) * 1e6 / len(clicks)
+    server.shutdown()
+
+    start = time.perf_counter()
+    for _ in range(100):
+        index = PieceIndex(board["state"], board["config"])
+    build_us = (time.perf_counter() - start) * 1e6 / 100
+
+    start = time.perf_counter()
+    local = [index.piece(x, y, BLOCK_SIZE) for x, y in clicks]
+    local_us = (time.perf_counter() - start) * 1e6 / len(clicks)
+    assert local == remote
+
+    print(f"{args.clicks} clicks on one board")
+    print(
+        f"golmi request {http_us:8.1f} us/click | "
+        f"PieceIndex {local_us:5.2f} us/click, {build_us:6.1f} us per loaded board"
+    )
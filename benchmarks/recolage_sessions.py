@@ -0,0 +1,92 @@
+"""Memory held by the boards of many concurrent recolage rooms, each
+room parsing its own copies of the boards compared with the frozen
+boards shared through the `BoardIndex`.
+
+Every room samples `BOARDS_PER_ROOM` boards as recolage's `Session`
+does and keeps them until all rooms are created. The board file is
+`recolage/data/boards.jsonl` or, with `--sizes`, its boards repeated
+with new state ids into a file of that many boards, so fewer boards
+are sampled by more than one room. Loading a board on golmi makes a
+mutable copy of it, the time for that copy is reported as well.
+
+usage: python -m benchmarks.recolage_sessions [--rooms N] [--sizes N ...]
+"""
+
+import argparse
+import copy
+import json
+from pathlib import Path
+import tempfile
+import time
+import tracemalloc
+
+from recolage.config import BOARDS, BOARDS_PER_ROOM
+from board_index import BoardIndex, select_target
+from recolage.dataloader import Dataloader
+
+from benchmarks.recolage_boards import write_boards
+
+
+class ParsedIndex(BoardIndex):
+    """`BoardIndex` returning a new parsed board on every read."""
+
+    def read(self, offset):
+        with self.path.open("rb") as infile:
+            infile.seek(offset)
+            return select_target(json.loads(infile.readline()))
+
+
+def create_rooms(path, rooms, index_class):
+    BoardIndex.indices[path] = index_class(path)
+    BoardIndex.indices[path].boards()
+    return [Dataloader(path, BOARDS_PER_ROOM) for _ in range(rooms)]
+
+
+def measure(path, rooms, index_class):
+    start = time.perf_counter()
+    create_rooms(path, rooms, index_class)
+    elapsed = (time.perf_counter() - start) * 1000 / rooms
+
+    tracemalloc.start()
+    sessions = create_rooms(path, rooms, index_class)
+    kept, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for boards in sessions:
+        copy.deepcopy(boards[0])
+    load_ms = (time.perf_counter() - start) * 1000 / rooms
+
+    BoardIndex.indices.pop(path)
+    return {"kept_mib": kept / 2**20, "room_ms": elapsed, "load_ms": load_ms}
+
+
+def run(path, rooms):
+    results = dict()
+    for name, index_class in (("parsed", ParsedIndex), ("shared", BoardIndex)):
+        results[name] = measure(path, rooms, index_class)
+    return results
+
+
+def report(name, results):
+    for variant, result in results.items():
+        print(
+            f"{name:<14} {variant:<7} {result['kept_mib']:7.1f} MiB kept | "
+            f"{result['room_ms']:6.2f} ms/room | "
+            f"{result['load_ms']:5.2f} ms copy per board load"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark recolage sessions.")
+    parser.add_argument("--rooms", type=int, default=100)
+    parser.add_argument("--sizes", type=int, nargs="*", default=[10000])
+    args = parser.parse_args()
+
+    print(f"{args.rooms} rooms, {BOARDS_PER_ROOM} boards per room")
+    report(f"{BOARDS.name}", run(BOARDS, args.rooms))
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "boards.jsonl"
+            write_boards(path, size)
+            report(f"{size} boards", run(path, args.rooms))
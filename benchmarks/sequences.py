@@ -0,0 +1,106 @@
+"""Time and memory to sample the boards of a new coco room, parsing a
+whole sequence file per room as the `Dataloader` did before compared
+with the shared `SequenceIndex`.
+
+The sequence files in `coco/data/sequences` are repeated `--factors`
+times into a temporary directory, so every level has that many more
+boards to choose from. The index is built once per set, its build time
+and memory are reported separately.
+
+usage: python -m benchmarks.sequences [--factors N ...] [--rooms N]
+"""
+
+import argparse
+from collections import defaultdict
+import json
+from pathlib import Path
+import random
+import tempfile
+import time
+import tracemalloc
+
+from coco.config import SEQUENCES_PER_ROOM, STATES
+from coco.dataloader import Dataloader, SequenceIndex
+
+
+def parse_boards(path):
+    """Boards of a room as `Dataloader.read_boards` sampled them before."""
+    boards = list()
+    all_sequences = list(path.iterdir())
+    for sequence in random.sample(all_sequences, SEQUENCES_PER_ROOM):
+        buffer = defaultdict(list)
+        with sequence.open(encoding="utf-8") as infile:
+            for line in infile:
+                board = json.loads(line)
+                buffer[int(board["level"])].append(board)
+        for level, level_boards in sorted(buffer.items()):
+            board = random.choice(level_boards)
+            boards.append((board["state"], board["instructions"]))
+    return boards
+
+
+def write_sequences(directory, factor):
+    for sequence in sorted(Path(STATES).iterdir()):
+        lines = sequence.read_text(encoding="utf-8").splitlines()
+        with (directory / sequence.name).open("w", encoding="utf-8") as outfile:
+            for _ in range(factor):
+                outfile.write("\n".join(lines) + "\n")
+
+
+def measure(create, rooms):
+    """Mean milliseconds and peak KiB allocated per room."""
+    start = time.perf_counter()
+    for _ in range(rooms):
+        create()
+    elapsed = (time.perf_counter() - start) * 1000 / rooms
+
+    tracemalloc.start()
+    create()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024
+
+
+def run(factor, rooms):
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+        write_sequences(directory, factor)
+        size = sum(path.stat().st_size for path in directory.iterdir())
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        SequenceIndex.get(directory).sequences()
+        build = (time.perf_counter() - start) * 1000
+        index_kib = tracemalloc.get_traced_memory()[0] / 1024
+        tracemalloc.stop()
+
+        parse_ms, parse_kib = measure(lambda: parse_boards(directory), rooms)
+        index_ms, index_room_kib = measure(lambda: Dataloader(directory), rooms)
+        SequenceIndex.indices.pop(directory)
+
+    return {
+        "size_kib": size / 1024,
+        "build_ms": build,
+        "index_kib": index_kib,
+        "parse_ms": parse_ms,
+        "parse_kib": parse_kib,
+        "index_ms": index_ms,
+        "index_room_kib": index_room_kib,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark coco board sampling.")
+    parser.add_argument("--factors", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--rooms", type=int, default=50, help="rooms per set")
+    args = parser.parse_args()
+
+    print(f"{args.rooms} rooms per set")
+    for factor in args.factors:
+        result = run(factor, args.rooms)
+        print(
+            f"x{factor:<4} {result['size_kib']:8.0f} KiB sequences | "
+            f"parse {result['parse_ms']:8.2f} ms {result['parse_kib']:8.0f} KiB/room | "
+            f"index {result['index_ms']:6.2f} ms {result['index_room_kib']:5.0f} KiB/room | "
+            f"build once {result['build_ms']:7.1f} ms {result['index_kib']:5.0f} KiB"
+        )
@@ -0,0 +1,92 @@
+"""Size of recolage's `board_log` events with the full boards compared
+with the compact boards of `recolage.shapes`, and the time to compute
+the occupancy of a board from its block matrices in Python loops
+compared with the vectorized `occupancy` on the shape masks.
+
+All boards of `recolage/data/boards.jsonl` are logged once, sizes are
+reported as json and gzipped json, as the log files are stored.
+
+usage: python -m benchmarks.shapes [--repeat N]
+"""
+
+import argparse
+import copy
+import gzip
+import json
+import time
+
+import numpy as np
+
+from board_index import select_target
+from recolage.config import BOARDS
+from recolage.shapes import ShapeTable, compact_board, expand_board, occupancy, scale
+
+
+def loop_occupancy(board):
+    """Occupancy from the block matrices of a full board."""
+    config = board["config"]
+    factor = scale(config)
+    height = int(config["height"] * factor)
+    width = int(config["width"] * factor)
+    counts = [[0] * width for _ in range(height)]
+    for obj in board["state"]["objs"].values():
+        for row, blocks in enumerate(obj["block_matrix"]):
+            for column, block in enumerate(blocks):
+                if not block:
+                    continue
+                top = int((obj["y"] + row) * factor)
+                left = int((obj["x"] + column) * factor)
+                for y in range(top, top + factor):
+                    for x in range(left, left + factor):
+                        if 0 <= y < height and 0 <= x < width:
+                            counts[y][x] += 1
+    return counts
+
+
+def log_size(boards):
+    logs = "\n".join(
+        json.dumps({"event": "board_log", "data": {"board": board}}) for board in boards
+    )
+    return len(logs.encode("utf-8")), len(gzip.compress(logs.encode("utf-8")))
+
+
+def timed(function, boards, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for board in boards:
+            function(board)
+    return (time.perf_counter() - start) * 1e6 / (repeat * len(boards))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark compact recolage boards.")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with BOARDS.open(encoding="utf-8") as infile:
+        boards = [select_target(json.loads(line)) for line in infile if line.strip()]
+    table = ShapeTable()
+    compact = [compact_board(board, table) for board in boards]
+    assert [expand_board(board) for board in compact] == boards
+    for board, counts in zip(boards, compact):
+        assert (np.array(loop_occupancy(board)) == occupancy(counts, table)).all()
+
+    full_bytes, full_gzip = log_size(boards)
+    compact_bytes, compact_gzip = log_size(compact)
+    print(f"{len(boards)} boards, {len(table)} shapes")
+    print(
+        f"board_log  full {full_bytes / len(boards):7.0f} B/board "
+        f"({full_gzip / len(boards):5.0f} B gzip) | "
+        f"compact {compact_bytes / len(boards):7.0f} B/board "
+        f"({compact_gzip / len(boards):5.0f} B gzip)"
+    )
+
+    copies = [copy.deepcopy(board) for board in boards]
+    print(
+        f"compact {timed(lambda board: compact_board(board, table), copies, args.repeat):7.1f} us/board | "
+        f"expand {timed(expand_board, compact, args.repeat):7.1f} us/board"
+    )
+    print(
+        f"occupancy  loop {timed(loop_occupancy, boards, args.repeat):7.1f} us/board | "
+        f"vectorized {timed(lambda board: occupancy(board, table), compact, args.repeat):7.1f} us/board"
+    )
@@ -0,0 +1,149 @@
+"""Threads and memory needed by room timers of many concurrent rooms,
+one `threading.Timer` per timer compared with `templates.ScheduledTimer`
+on the shared scheduler thread.
+
+Every room gets the timers of a recolage room: an inactivity timeout
+and a timer for each of its two players leaving the room. Every
+timeout timer is then reset a few times, as it is on every message.
+Each implementation runs in its own process, so memory is not shared.
+
+usage: python -m benchmarks.timers [--rooms N] [--resets N]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+
+from templates import ScheduledTimer
+
+ROOM_TIMEOUT = 60 * 60
+LEAVE_TIMEOUT = 5 * 60
+
+
+def rss_kib():
+    """Resident set size of this process in KiB."""
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+class ThreadRoomTimer:
+    """Timers of a room as the bots created them before."""
+
+    def __init__(self, room_id):
+        self.room_id = room_id
+        self.start_timer()
+        self.left_room = dict()
+
+    def start_timer(self):
+        self.timer = threading.Timer(ROOM_TIMEOUT, print, args=[self.room_id])
+        self.timer.start()
+
+    def reset(self):
+        self.timer.cancel()
+        self.start_timer()
+
+    def user_left(self, user):
+        self.left_room[user] = threading.Timer(LEAVE_TIMEOUT, print, args=[user])
+        self.left_room[user].start()
+
+    def cancel_all_timers(self):
+        self.timer.cancel()
+        for timer in self.left_room.values():
+            timer.cancel()
+
+
+class ScheduledRoomTimer(ThreadRoomTimer):
+    def start_timer(self):
+        self.timer = ScheduledTimer(ROOM_TIMEOUT, print, args=[self.room_id])
+        self.timer.start()
+
+    def reset(self):
+        self.timer.reset()
+
+    def user_left(self, user):
+        self.left_room[user] = ScheduledTimer(LEAVE_TIMEOUT, print, args=[user])
+        self.left_room[user].start()
+
+
+def run(implementation, rooms, resets):
+    room_timer = {"thread": ThreadRoomTimer, "scheduled": ScheduledRoomTimer}[
+        implementation
+    ]
+    # start the scheduler thread before measuring
+    ScheduledTimer(0, lambda: None).start()
+    time.sleep(0.1)
+
+    threads_before = threading.active_count()
+    rss_before = rss_kib()
+
+    start = time.perf_counter()
+    timers = list()
+    for room_id in range(rooms):
+        timer = room_timer(room_id)
+        timer.user_left(2 * room_id)
+        timer.user_left(2 * room_id + 1)
+        timers.append(timer)
+    create = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(resets):
+        for timer in timers:
+            timer.reset()
+    reset = time.perf_counter() - start
+
+    result = {
+        "threads": threading.active_count() - threads_before,
+        "rss_kib": rss_kib() - rss_before,
+        "create_ms": create * 1000,
+        "reset_us": reset * 1e6 / max(1, resets * rooms),
+    }
+    for timer in timers:
+        timer.cancel_all_timers()
+    return result
+
+
+def report(name, result):
+    print(
+        f"{name:<10} threads {result['threads']:6d} | "
+        f"rss {result['rss_kib'] / 1024:7.1f} MiB | "
+        f"create {result['create_ms']:8.1f} ms | "
+        f"reset {result['reset_us']:7.2f} us"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark room timers.")
+    parser.add_argument("--rooms", type=int, default=1000, help="concurrent rooms")
+    parser.add_argument("--resets", type=int, default=10, help="resets per room")
+    parser.add_argument("--implementation", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.implementation is not None:
+        print(json.dumps(run(args.implementation, args.rooms, args.resets)))
+        sys.exit()
+
+    print(f"{args.rooms} rooms, 3 timers per room, {args.resets} resets per room")
+    for implementation in ["thread", "scheduled"]:
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.timers",
+                "--rooms",
+                str(args.rooms),
+                "--resets",
+                str(args.resets),
+                "--implementation",
+                implementation,
+            ],
+            capture_output=True,
+            check=True,
+            text=True,
+        )
+        report(implementation, json.loads(output.stdout))
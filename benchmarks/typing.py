@@ -0,0 +1,111 @@
+"""Typing events and timers of coco's typing indicator for many rooms
+of clicking wizards, creating a new `AsyncTimer` on every click as
+`send_typing_input` did before compared with the `TypingIndicator`.
+
+The wizards click in bursts, `--gap` seconds apart on average, with
+pauses longer than the typing delay between bursts. Reported are the
+clicks received, the typing events sent and the timer callbacks
+scheduled on the event loop. The typing delay is scaled down from
+coco's 3 seconds to `--delay`.
+
+usage: python -m benchmarks.typing [--rooms N] [--clicks N]
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+import random
+
+from templates import AsyncTimer
+
+from coco.utils import TypingIndicator
+
+
+class TimerTyping:
+    """send_typing_input before the `TypingIndicator`."""
+
+    def __init__(self, function, args=None, delay=3):
+        self.function = function
+        self.args = args if args is not None else []
+        self.delay = delay
+        self.timer = None
+
+    async def click(self):
+        # no need to send a new start typing event if the old one is still running
+        timer = self.timer
+        if timer is None or timer.is_alive() is False:
+            await self.function(True, *self.args)
+
+        # cancel old timer to avoid overlapping events
+        if timer is not None:
+            timer.cancel()
+
+        # start a new timer for the stop typing event
+        self.timer = AsyncTimer(self.delay, self.function, args=[False, *self.args])
+        self.timer.start()
+
+
+async def wizard(typing, clicks, gap, delay, rng):
+    for _ in range(clicks):
+        if rng.random() < 0.05:
+            await asyncio.sleep(delay * 2)
+        else:
+            await asyncio.sleep(rng.expovariate(1 / gap))
+        await typing.click()
+
+
+async def run(indicator, args):
+    loop = asyncio.get_running_loop()
+    stats = Counter()
+    call_at = loop.call_at
+
+    def is_timer(handle):
+        return isinstance(getattr(handle._callback, "__self__", None), AsyncTimer)
+
+    def counted_call_at(when, callback, *call_args, **kwargs):
+        handle = call_at(when, callback, *call_args, **kwargs)
+        # the wizards' sleeps are scheduled as well
+        if is_timer(handle):
+            stats["scheduled"] += 1
+        return handle
+
+    loop.call_at = counted_call_at
+
+    async def send(value, room_id):
+        stats["start" if value else "stop"] += 1
+
+    rooms = [
+        indicator(send, args=[room_id], delay=args.delay)
+        for room_id in range(args.rooms)
+    ]
+    await asyncio.gather(
+        *(
+            wizard(typing, args.clicks, args.gap, args.delay, random.Random(i))
+            for i, typing in enumerate(rooms)
+        )
+    )
+    await asyncio.sleep(args.delay * 2)
+    loop.call_at = call_at
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark coco's typing events.")
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--clicks", type=int, default=200, help="clicks per room")
+    parser.add_argument(
+        "--gap", type=float, default=0.005, help="mean seconds between clicks"
+    )
+    parser.add_argument("--delay", type=float, default=0.05, help="typing delay")
+    args = parser.parse_args()
+
+    print(f"{args.rooms} rooms, {args.rooms * args.clicks} clicks")
+    for name, indicator in (
+        ("AsyncTimer", TimerTyping),
+        ("TypingIndicator", TypingIndicator),
+    ):
+        stats = asyncio.run(run(indicator, args))
+        print(
+            f"{name:<16} {stats['start']:5d} start {stats['stop']:5d} stop | "
+            f"{stats['scheduled']:6d} timer callbacks scheduled"
+        )
@@ -0,0 +1,166 @@
+"""Boards of the recolage bots in jsonl files, indexed by level and
+shared read-only between the rooms of a process."""
+
+import json
+import logging
+import sys
+import weakref
+
+
+def select_target(board):
+    """add the target object of a board to the targets of its state"""
+    state = board["state"]
+    target_id = str(board["target"])
+    target_obj = state["objs"][target_id]
+    state["targets"][target_id] = target_obj
+    return board
+
+
+class FrozenDict(dict):
+    """Read-only dict of a shared board, `deepcopy` returns a
+    mutable copy to change, e.g. the grippers before loading it."""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("shared boards are read-only, change a deepcopy")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+def freeze(value, interned=None, memo=None):
+    """Read-only copy of parsed json, lists become tuples. Equal strings
+    and the equal tuples of one call, e.g. the block matrices of the
+    pieces of a board, are shared. Tuples are only interned per call,
+    so they are freed together with the board."""
+    if interned is None:
+        interned = dict()
+    if memo is None:
+        memo = dict()
+    if id(value) in memo:
+        return memo[id(value)]
+
+    if isinstance(value, dict):
+        frozen = FrozenDict(
+            (sys.intern(key), freeze(item, interned, memo))
+            for key, item in value.items()
+        )
+    elif isinstance(value, list):
+        frozen = tuple(freeze(item, interned, memo) for item in value)
+        try:
+            frozen = interned.setdefault(frozen, frozen)
+        except TypeError:
+            # contains dicts
+            pass
+    elif isinstance(value, str):
+        frozen = sys.intern(value)
+    else:
+        return value
+
+    memo[id(value)] = frozen
+    return frozen
+
+
+def thaw(value):
+    """Mutable copy of a frozen board."""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+class BoardIndex:
+    """Byte offsets and state ids of the boards in a jsonl file, by level.
+
+    The index is saved next to the board file and only built again when
+    the board file changed, so a room only reads the boards it samples.
+    A board read is frozen and shared by all the rooms using it.
+    """
+
+    indices = dict()
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = path.with_name(f"{path.name}.index.json")
+        # modification time and size of the indexed board file
+        self.version = None
+        # level -> [offset, state_id] of its boards
+        self.levels = dict()
+        self.count = 0
+        # offset -> frozen board, kept while a room holds it
+        self.cache = weakref.WeakValueDictionary()
+
+    @classmethod
+    def get(cls, path):
+        """Shared index of a board file."""
+        if path not in cls.indices:
+            cls.indices[path] = cls(path)
+        return cls.indices[path]
+
+    def boards(self):
+        """Offsets and state ids of the boards by level."""
+        stat = self.path.stat()
+        version = [stat.st_mtime_ns, stat.st_size]
+        if self.version != version:
+            # offsets of the cached boards may have changed
+            self.cache.clear()
+            if not self.load(version):
+                self.build(version)
+                self.save()
+        return self.levels
+
+    def load(self, version):
+        """Load the saved index if it belongs to this board file."""
+        try:
+            saved = json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            return False
+
+        if saved.get("version") != version:
+            return False
+        self.version = version
+        self.levels = saved["levels"]
+        self.count = saved["count"]
+        return True
+
+    def build(self, version):
+        levels = dict()
+        count = 0
+        offset = 0
+        with self.path.open("rb") as infile:
+            for line in infile:
+                if line.strip():
+                    board = json.loads(line)
+                    level = board["board_info"]["difficoulty"]
+                    levels.setdefault(level, list()).append(
+                        [offset, board["state"]["state_id"]]
+                    )
+                    count += 1
+                offset += len(line)
+
+        self.version = version
+        self.levels = levels
+        self.count = count
+
+    def save(self):
+        index = {"version": self.version, "count": self.count, "levels": self.levels}
+        try:
+            self.index_path.write_text(json.dumps(index))
+        except OSError as error:
+            logging.warning(f"Could not save board index {self.index_path}: {error}")
+
+    def read(self, offset):
+        board = self.cache.get(offset)
+        if board is None:
+            with self.path.open("rb") as infile:
+                infile.seek(offset)
+                board = select_target(json.loads(infile.readline()))
+            board = freeze(board)
+            self.cache[offset] = board
+        return board
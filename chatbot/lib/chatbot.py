@@ -11,8 +11,6 @@ import random
 import string
 from time import sleep
 
-import requests
-
 from lib.config import *
 from templates import TaskBot
 
@@ -64,12 +62,8 @@ class Chatbot(TaskBot):
         def status(data):
             """Triggered if a user enters or leaves a room."""
             # check whether the user is eligible to join this task
-            task = requests.get(
-                f"{self.uri}/users/{data['user']['id']}/task",
-                headers={"Authorization": f"Bearer {self.token}"},
-            )
-            self.request_feedback(task, "set task instruction title")
-            if not task.json() or task.json()["id"] != int(self.task_id):
+            task = self.api.get_user_task(data["user"]["id"])
+            if not task or task["id"] != int(self.task_id):
                 return
 
         @self.sio.event
@@ -163,7 +157,7 @@ class Chatbot(TaskBot):
                     {**usr, "msg_n": 0, "status": "joined"}
                 )
 
-            response = requests.post(
+            response = self.http.post(
                 f"{self.uri}/users/{self.user}/rooms/{room_id}",
                 headers={"Authorization": f"Bearer {self.token}"},
             )
@@ -234,7 +228,7 @@ class Chatbot(TaskBot):
 
         code = "".join(random.choices(string.ascii_uppercase + string.digits, k=6))
         # post code to logs
-        response = requests.post(
+        response = self.http.post(
             f"{self.uri}/logs",
             json={
                 "event": "confirmation_log",
@@ -284,38 +278,17 @@ class Chatbot(TaskBot):
             },
         )
         sleep(TIME_CLOSE*2*60)
+        self.flush_logs()
         self.room_to_read_only(room_id)
 
         # remove users from room
         for usr in self.players_per_room[room_id]:
-            response = requests.get(
-                f"{self.uri}/users/{usr['id']}",
-                headers={"Authorization": f"Bearer {self.token}"},
-            )
-            self.request_feedback(response, "get user")
-            etag = response.headers["ETag"]
-
-            response = requests.delete(
-                f"{self.uri}/users/{usr['id']}/rooms/{room_id}",
-                headers={"If-Match": etag, "Authorization": f"Bearer {self.token}"},
-            )
-            self.request_feedback(response, "remove user from task room")
+            self.api.remove_user_from_room(usr["id"], room_id)
 
         # remove any task room specific objects
         self.players_per_room.pop(room_id)
+        self.log_round_trips(room_id)
 
     def room_to_read_only(self, room_id):
         """Set room to read only."""
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "readonly", "value": "True"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        self.request_feedback(response, "set room to read_only")
-
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "placeholder", "value": "This room is read-only"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        self.request_feedback(response, "inform user that room is read_only")
+        self.api.room_to_read_only(room_id)
@@ -1,23 +1,23 @@
+import asyncio
 import logging
 import os
 import random
 import string
-from threading import Timer
-from time import sleep
 
-import requests
-
-from templates import TaskBot
+from templates import AsyncTaskBot, AsyncTimer
 from .config import *
+from .dataloader import SequenceIndex
 from .utils import *
 
 
-class CoCoBot(TaskBot):
+class CoCoBot(AsyncTaskBot):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.received_waiting_token = set()
         self.sessions = SessionManager()
         self.move_evaluator = MoveEvaluator(RULES)
+        # index the board sequences before the first room is created
+        SequenceIndex.get(STATES).sequences()
 
     def post_init(self, waiting_room, golmi_server, golmi_password):
         """
@@ -29,37 +29,25 @@ class CoCoBot(TaskBot):
         self.golmi_server = golmi_server
         self.golmi_password = golmi_password
 
-    def modify_layout(self, room_id, receiver_id=None):
-        base_json = {"receiver_id": receiver_id} if receiver_id is not None else {}
-
+    async def modify_layout(self, room_id, receiver_id=None):
         # Adjust height value for title bar adjustments- handled in both the first and third API calls
         titlebar_height = "height: 45px"
         titlebar_width_height = "width:30%; top: 45px"
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/header",
-            headers={"Authorization": f"Bearer {self.token}"},
-            # json={"attribute": "style", "value": f"height: 40px", **base_json},
-            json={"attribute": "style", "value": titlebar_height, **base_json},
+        await self.api.set_attribute(
+            room_id, "header", "style", titlebar_height, receiver_id
         )
-
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/sidebar",
-            headers={"Authorization": f"Bearer {self.token}"},
-            json={
-                "attribute": "style",
-                "value": f"height: 90%; width:70%; top: 40px",
-                **base_json,
-            },
+        await self.api.set_attribute(
+            room_id,
+            "sidebar",
+            "style",
+            f"height: 90%; width:70%; top: 40px",
+            receiver_id,
         )
-
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/content",
-            headers={"Authorization": f"Bearer {self.token}"},
-            # json={"attribute": "style", "value": f"width:30%; top: 40px", **base_json},
-            json={"attribute": "style", "value": titlebar_width_height, **base_json},
+        await self.api.set_attribute(
+            room_id, "content", "style", titlebar_width_height, receiver_id
         )
 
-    def on_task_room_creation(self, data):
+    async def on_task_room_creation(self, data):
         """This function is executed as soon as 2 users are paired and a new
         task took is created
         """
@@ -72,14 +60,14 @@ class CoCoBot(TaskBot):
         if task_id is not None and task_id == self.task_id:
             # update points on title
             logging.debug(f"Updating titlebar during task creation,{room_id}")
-            self.update_title_points(room_id)
+            await self.update_title_points(room_id)
 
             logging.debug(
                 f"Calling modify_Layout for room {room_id} task_id = {task_id}"
             )
             # move the chat | task area divider
-            self.modify_layout(room_id)
-            sleep(0.5)
+            await self.modify_layout(room_id)
+            await asyncio.sleep(0.5)
 
             for usr in data["users"]:
                 self.received_waiting_token.discard(usr["id"])
@@ -100,7 +88,7 @@ class CoCoBot(TaskBot):
             for usr, role in zip(data["users"], roles):
                 this_session.add_user({**usr, "role": role["role"], "status": "joined"})
 
-                self.rename_user(usr["id"], role["name"])
+                await self.rename_user(usr["id"], role["name"])
 
                 # cancel waiting-room-timers
                 if usr["id"] in self.sessions.waiting_room_timers:
@@ -109,84 +97,59 @@ class CoCoBot(TaskBot):
                     self.sessions.waiting_room_timers.pop(usr["id"])
 
             # join the newly created room
-            response = requests.post(
-                f"{self.uri}/users/{self.user}/rooms/{room_id}",
-                headers={"Authorization": f"Bearer {self.token}"},
-            )
-            if not response.ok:
-                logging.error(
-                    f"Could not let coco bot join room: {response.status_code}"
-                )
-                response.raise_for_status()
+            await self.api.join_room(self.user, room_id)
 
             # create and connect the golmi client
-            client = QuadrupleClient(str(room_id), self.golmi_server)
-            client.run(self.golmi_password)
+            client = QuadrupleClient(
+                str(room_id),
+                self.golmi_server,
+                pool=GolmiPool.get(self.golmi_server, self.golmi_password),
+            )
+            await client.run(self.golmi_password)
             this_session.golmi_client = client
 
             # send roles
-            self.send_roles(room_id)
+            await self.send_roles(room_id)
 
-    def rename_user(self, user_id, name):
-        response = requests.get(
-            f"{self.uri}/users/{user_id}",
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            logging.error(f"Could not get user: {response.status_code}")
-            response.raise_for_status()
-        etag = response.headers["ETag"]
-
-        response = requests.patch(
-            f"{self.uri}/users/{user_id}",
-            headers={"If-Match": etag, "Authorization": f"Bearer {self.token}"},
-            json={"name": name},
-        )
-        if not response.ok:
-            logging.error(f"Could not rename user: {user_id}")
-            response.raise_for_status()
+    async def rename_user(self, user_id, name):
+        await self.api.rename_user(user_id, name)
 
-    def send_typing_input(self, room_id):
+    async def send_typing_input(self, room_id):
         """Send typing events when the wizard is working on the boards"""
         this_session = self.sessions[room_id]
-        player, wizard = this_session.players
-        if player["role"] != "player":
-            player, wizard = wizard, player
+        typing = this_session.timer.typing
+        if typing is None:
 
-        def send_typing(value, room_id, user):
-            self.sio.emit(
-                "message_command",
-                {
-                    "command": {"event": "typing", "value": value},
-                    "room": room_id,
-                    "receiver_id": user["id"],
-                },
-            )
+            async def send_typing(value, room_id):
+                # roles are switched between episodes
+                player, wizard = this_session.players
+                if player["role"] != "player":
+                    player, wizard = wizard, player
 
-        # no need to send a new start typing event if the old one is still running
-        timer = this_session.timer.typing_timer
-        if timer is None or timer.is_alive() is False:
-            send_typing(True, room_id, wizard)
+                await self.sio.emit(
+                    "message_command",
+                    {
+                        "command": {"event": "typing", "value": value},
+                        "room": room_id,
+                        "receiver_id": wizard["id"],
+                    },
+                )
 
-        # cancel old timer to avoid overlapping events
-        if timer is not None:
-            timer.cancel()
+            # clicks of a burst only send one start and one stop event
+            typing = TypingIndicator(send_typing, args=[room_id])
+            this_session.timer.typing = typing
 
-        # start a new timer for the stop typing event
-        this_session.timer.typing_timer = Timer(
-            3, send_typing, args=[False, room_id, wizard]
-        )
-        this_session.timer.typing_timer.start()
+        await typing.click()
 
     def register_callbacks(self):
         @self.sio.event
-        def joined_room(data):
+        async def joined_room(data):
             """Triggered once after the bot joins a room."""
             room_id = data["room"]
             if room_id in self.sessions:
                 # read out task greeting
                 for line in TASK_GREETING:
-                    self.sio.emit(
+                    await self.sio.emit(
                         "text",
                         {
                             "message": COLOR_MESSAGE.format(
@@ -196,10 +159,10 @@ class CoCoBot(TaskBot):
                             "html": True,
                         },
                     )
-                    sleep(0.5)
+                    await asyncio.sleep(0.5)
 
         @self.sio.event
-        def text_message(data):
+        async def text_message(data):
             room_id = data["room"]
             user_id = data["user"]["id"]
 
@@ -211,19 +174,11 @@ class CoCoBot(TaskBot):
             this_session.timer.reset()
 
         @self.sio.event
-        def status(data):
+        async def status(data):
             """Triggered if a user enters or leaves a room."""
             # check whether the user is eligible to join this task
-            task = requests.get(
-                f"{self.uri}/users/{data['user']['id']}/task",
-                headers={"Authorization": f"Bearer {self.token}"},
-            )
-            if not task.ok:
-                logging.error(
-                    f"Could not set task instruction title: {task.status_code}"
-                )
-                task.raise_for_status()
-            if not task.json() or task.json()["id"] != int(self.task_id):
+            task = await self.api.get_user_task(data["user"]["id"])
+            if not task or task["id"] != int(self.task_id):
                 return
 
             room_id = data["room"]
@@ -234,7 +189,7 @@ class CoCoBot(TaskBot):
                 if data["type"] == "join":
                     if user_id not in self.sessions.waiting_room_timers:
                         # start no_partner timer
-                        timer = Timer(
+                        timer = AsyncTimer(
                             WAITING_ROOM_TIMER * 60,
                             self.timeout_waiting_room,
                             args=[data["user"]],
@@ -262,9 +217,9 @@ class CoCoBot(TaskBot):
                     curr_usr, other_usr = other_usr, curr_usr
 
                 if data["type"] == "join":
-                    sleep(0.5)
+                    await asyncio.sleep(0.5)
                     # inform game partner about the rejoin event
-                    self.sio.emit(
+                    await self.sio.emit(
                         "text",
                         {
                             "message": COLOR_MESSAGE.format(
@@ -280,13 +235,13 @@ class CoCoBot(TaskBot):
                     this_session.timer.user_joined(curr_usr["id"])
 
                     # update layout
-                    self.modify_layout(room_id, curr_usr["id"])
+                    await self.modify_layout(room_id, curr_usr["id"])
 
                     # check if the user has a role, if so, send role command
                     role = curr_usr["role"]
                     if role is not None:
                         golmi_rooms = this_session.golmi_client.rooms.json
-                        self.sio.emit(
+                        await self.sio.emit(
                             "message_command",
                             {
                                 "command": {
@@ -317,7 +272,7 @@ class CoCoBot(TaskBot):
                         this_session.game_over is False
                         and this_session.submited_survey[user_id] is False
                     ):
-                        self.sio.emit(
+                        await self.sio.emit(
                             "text",
                             {
                                 "message": COLOR_MESSAGE.format(
@@ -340,7 +295,7 @@ class CoCoBot(TaskBot):
                         self.sessions[room_id].timer.user_left(curr_usr["id"])
 
         @self.sio.event
-        def mouse(data):
+        async def mouse(data):
             """capture mouse clicks on the board"""
             room_id = data["room"]
             user_id = data["user"]["id"]
@@ -363,8 +318,8 @@ class CoCoBot(TaskBot):
 
             # the wizard picks an object from the selection board
             if board == "wizard_selection":
-                self.send_typing_input(room_id)
-                this_client.grip_object(
+                await self.send_typing_input(room_id)
+                await this_client.grip_object(
                     x=data["coordinates"]["x"],
                     y=data["coordinates"]["y"],
                     block_size=data["coordinates"]["block_size"],
@@ -372,8 +327,8 @@ class CoCoBot(TaskBot):
                 )
 
                 # remove selected objects from wizard's working board
-                this_client.remove_selection("wizard_working", "mouse")
-                this_client.remove_cell_grippers()
+                await this_client.remove_selection("wizard_working", "mouse")
+                await this_client.remove_cell_grippers()
 
                 self.log_event(
                     "user_selection",
@@ -390,7 +345,7 @@ class CoCoBot(TaskBot):
 
             # right click actions
             if data["coordinates"]["button"] == "right":
-                selected = this_client.get_entire_cell(
+                selected = await this_client.get_entire_cell(
                     x=data["coordinates"]["x"],
                     y=data["coordinates"]["y"],
                     block_size=data["coordinates"]["block_size"],
@@ -399,26 +354,24 @@ class CoCoBot(TaskBot):
 
                 if selected:
                     obj = selected.pop()
-                    action, obj = this_client.delete_object(obj)
+                    action, obj = await this_client.delete_object(obj)
 
                     if action is not False:
-                        current_action = this_session.current_action
-                        this_session.current_action = current_action.add_action(
-                            action, obj
-                        )
+                        this_session.history.add(action, obj)
 
                         # the state changes, log it
-                        current_state = this_client.get_state("wizard_working")
-                        self.log_event("working_board_log", current_state, room_id)
+                        await self.log_board_change(room_id, action, obj)
                 return
 
             # select multiple cells with ctrl button
             if data["coordinates"]["ctrl"] is True:
-                this_client.remove_selection("wizard_selection", "mouse")
-                this_client.remove_selection("wizard_working", "mouse")
+                await this_client.remove_selection("wizard_selection", "mouse")
+                await this_client.remove_selection("wizard_working", "mouse")
 
-                gripper_on_board = this_client.get_gripper("cell", "wizard_working")
-                current_state = this_client.get_state("wizard_working")
+                gripper_on_board = await this_client.get_gripper(
+                    "cell", "wizard_working"
+                )
+                current_state = await this_client.get_state("wizard_working")
 
                 # coordinates
                 this_x = data["coordinates"]["x"]
@@ -426,27 +379,21 @@ class CoCoBot(TaskBot):
                 block_size = data["coordinates"]["block_size"]
 
                 # obtain new name for this gripper
-                taken = [int(i.split("_")[-1]) for i in current_state["grippers"]]
-                taken.sort()
-
-                if not taken:
-                    gripper_id = 0
-                else:
-                    highest = taken[-1]
-                    possible = set(range(highest + 2))
-                    new_ids = list(possible - set(taken))
-                    new_ids.sort()
-                    gripper_id = new_ids[0]
+                gripper_id = smallest_free_id(
+                    int(i.split("_")[-1]) for i in current_state["grippers"]
+                )
 
                 for gripper in current_state["grippers"].values():
                     if (
                         gripper["x"] == this_x // block_size
                         and gripper["y"] == this_y // block_size
                     ):
-                        this_client.remove_gripper(gripper["id_n"], "wizard_working")
+                        await this_client.remove_gripper(
+                            gripper["id_n"], "wizard_working"
+                        )
                         return
 
-                this_client.add_gripper(
+                await this_client.add_gripper(
                     gripper=f"cell_{gripper_id}",
                     x=data["coordinates"]["x"],
                     y=data["coordinates"]["y"],
@@ -470,15 +417,14 @@ class CoCoBot(TaskBot):
             # left click actions
             # if data["coordinates"]["ctrl"] is False:
             # send typing message
-            self.send_typing_input(room_id)
+            await self.send_typing_input(room_id)
 
             # check if the user selected an object on his selection board
-            selected = this_client.get_gripped_object("selector")
-            current_state = this_client.get_state("wizard_working")
+            selected = await this_client.get_gripped_object("selector")
             if selected:
                 # wizard wants to place a new object
                 obj = list(selected.values()).pop()
-                id_n = new_obj_name(current_state)
+                id_n = await next_obj_name(this_client, "wizard_working")
 
                 x = data["coordinates"]["x"]
                 y = data["coordinates"]["y"]
@@ -490,11 +436,11 @@ class CoCoBot(TaskBot):
                 obj["y"] = y // block_size
                 obj["gripped"] = None
 
-                allowed_move, reason = self.move_evaluator.is_allowed(
+                allowed_move, reason = await self.move_evaluator.is_allowed(
                     obj, this_client, x, y, block_size
                 )
                 if allowed_move is False:
-                    self.sio.emit(
+                    await self.sio.emit(
                         "text",
                         {
                             "message": COLOR_MESSAGE.format(
@@ -508,22 +454,20 @@ class CoCoBot(TaskBot):
                     )
                     return
 
-                action, obj = this_client.add_object(obj)
+                action, obj = await this_client.add_object(obj)
                 if action is not False:
-                    current_action = this_session.current_action
-                    this_session.current_action = current_action.add_action(action, obj)
+                    this_session.history.add(action, obj)
 
                     # the state changes, log it
-                    current_state = this_client.get_state("wizard_working")
-                    self.log_event("working_board_log", current_state, room_id)
+                    await self.log_board_change(room_id, action, obj)
 
                 # ungrip any selected object
-                this_client.remove_selection("wizard_selection", "mouse")
-                this_client.remove_cell_grippers()
+                await this_client.remove_selection("wizard_selection", "mouse")
+                await this_client.remove_cell_grippers()
 
             else:
                 # no object is selected
-                current_state = this_client.get_state("wizard_working")
+                current_state = await this_client.get_state("wizard_working")
 
                 # objects are selected with ctrl, cell deep copy
                 if any("cell" in i for i in current_state["grippers"].keys()):
@@ -534,7 +478,7 @@ class CoCoBot(TaskBot):
                         if "cell" in name:
                             cell_index = int(name.split("_")[-1])
                             clicks.append((cell_index, (gripper["x"], gripper["y"])))
-                            cell_objects = this_client.get_entire_cell(
+                            cell_objects = await this_client.get_entire_cell(
                                 x=gripper["x"],
                                 y=gripper["y"],
                                 block_size=1,
@@ -556,13 +500,13 @@ class CoCoBot(TaskBot):
                     new_y = data["coordinates"]["y"] // block_size
                     already_placed = set()
 
-                    backup_state = this_client.get_state("wizard_working")
+                    # the board has not changed since its state was requested
+                    backup_state = current_state
 
                     # start placing the selected objects from the bottom up
                     for i in range(highest_index):
                         for cell, position in zip(cells_to_copy, positions):
-                            current_state = this_client.get_state("wizard_working")
-                            id_n = new_obj_name(current_state)
+                            id_n = await next_obj_name(this_client, "wizard_working")
 
                             old_x, old_y = position
                             translation_x = first_x - old_x
@@ -583,11 +527,11 @@ class CoCoBot(TaskBot):
                                 (
                                     allowed_move,
                                     reason,
-                                ) = self.move_evaluator.is_allowed(
+                                ) = await self.move_evaluator.is_allowed(
                                     obj, this_client, obj["x"], obj["y"], 1
                                 )
                                 if allowed_move is False:
-                                    self.sio.emit(
+                                    await self.sio.emit(
                                         "text",
                                         {
                                             "message": COLOR_MESSAGE.format(
@@ -599,42 +543,34 @@ class CoCoBot(TaskBot):
                                             "html": True,
                                         },
                                     )
-                                    this_client.remove_cell_grippers()
+                                    await this_client.remove_cell_grippers()
 
                                     # load the state before positioning any object
-                                    this_client.load_state(
+                                    await this_client.load_state(
                                         backup_state, "wizard_working"
                                     )
+                                    await self.log_board_change(room_id)
                                     return
 
-                                action, obj = this_client.add_object(obj)
+                                action, obj = await this_client.add_object(obj)
                                 if action is not False:
-                                    current_action = this_session.current_action
-                                    this_session.current_action = (
-                                        current_action.add_action(action, obj)
-                                    )
+                                    this_session.history.add(action, obj)
 
                                     # the state changes, log it
-                                    current_state = this_client.get_state(
-                                        "wizard_working"
-                                    )
-                                    self.log_event(
-                                        "working_board_log",
-                                        current_state,
-                                        room_id,
-                                    )
+                                    await self.log_board_change(room_id, action, obj)
                                 else:
                                     # invalid positioning, stop (probably not needed)
-                                    this_client.load_state(
+                                    await this_client.load_state(
                                         backup_state, "wizard_working"
                                     )
+                                    await self.log_board_change(room_id)
                                     return
 
-                    this_client.remove_cell_grippers()
+                    await this_client.remove_cell_grippers()
                     return
 
                 # no deep copy, let's select this object
-                this_client.grip_object(
+                await this_client.grip_object(
                     x=data["coordinates"]["x"],
                     y=data["coordinates"]["y"],
                     block_size=data["coordinates"]["block_size"],
@@ -642,7 +578,7 @@ class CoCoBot(TaskBot):
                 )
 
         @self.sio.event
-        def command(data):
+        async def command(data):
             """Parse user commands."""
             room_id = data["room"]
             user_id = data["user"]["id"]
@@ -672,22 +608,23 @@ class CoCoBot(TaskBot):
 
                 # clear board
                 if event == "clear_board":
-                    right_user = self.check_role(user_id, "wizard", room_id)
+                    right_user = await self.check_role(user_id, "wizard", room_id)
                     if right_user is False:
                         return
 
-                    this_client.clear_state("wizard_working")
-                    this_session.current_action = ActionNode.new_tree()
+                    await this_client.clear_state("wizard_working")
+                    this_session.history.clear()
+                    await self.log_board_change(room_id)
 
                 elif event == "show_progress":
-                    right_user = self.check_role(user_id, "wizard", room_id)
+                    right_user = await self.check_role(user_id, "wizard", room_id)
                     if right_user is False:
                         return
 
                     # only show update if board has changed since last checkpoint
-                    current_state = this_client.get_state("wizard_working")
+                    current_state = await this_client.get_state("wizard_working")
                     if current_state == this_session.checkpoint:
-                        self.sio.emit(
+                        await self.sio.emit(
                             "text",
                             {
                                 "message": COLOR_MESSAGE.format(
@@ -701,11 +638,11 @@ class CoCoBot(TaskBot):
                         )
                         return
 
-                    this_client.copy_working_state()
-                    current_state = this_client.get_state("wizard_working")
+                    await this_client.copy_working_state()
+                    current_state = await this_client.get_state("wizard_working")
                     this_session.checkpoint = current_state
 
-                    self.sio.emit(
+                    await self.sio.emit(
                         "text",
                         {
                             "message": COLOR_MESSAGE.format(
@@ -718,7 +655,7 @@ class CoCoBot(TaskBot):
                         },
                     )
 
-                    self.sio.emit(
+                    await self.sio.emit(
                         "text",
                         {
                             "message": COLOR_MESSAGE.format(
@@ -732,17 +669,17 @@ class CoCoBot(TaskBot):
                     )
 
                 elif event == "revert_session":
-                    right_user = self.check_role(user_id, "wizard", room_id)
+                    right_user = await self.check_role(user_id, "wizard", room_id)
                     if right_user is False:
                         return
 
                     # undo should not work anymore after reverting
-                    this_session.current_action = ActionNode.new_tree()
+                    this_session.history.clear()
 
                     client = this_session.golmi_client
-                    client.load_state(this_session.checkpoint, "wizard_working")
+                    await client.load_state(this_session.checkpoint, "wizard_working")
 
-                    self.sio.emit(
+                    await self.sio.emit(
                         "text",
                         {
                             "message": COLOR_MESSAGE.format(
@@ -756,12 +693,11 @@ class CoCoBot(TaskBot):
                     )
 
                     # the state changes, log it
-                    current_state = this_client.get_state("wizard_working")
-                    self.log_event("working_board_log", current_state, room_id)
+                    await self.log_board_change(room_id)
 
                 elif event == "confirm_next_episode":
                     if this_session.can_load_next_episode is False:
-                        self.sio.emit(
+                        await self.sio.emit(
                             "text",
                             {
                                 "message": COLOR_MESSAGE.format(
@@ -780,62 +716,59 @@ class CoCoBot(TaskBot):
 
                         elif data["command"]["answer"] == "yes":
                             # load next state
-                            self.load_next_state(room_id)
+                            await self.load_next_state(room_id)
 
                 elif event == "undo":
-                    right_user = self.check_role(user_id, "wizard", room_id)
+                    right_user = await self.check_role(user_id, "wizard", room_id)
                     if right_user is False:
                         return
 
-                    last_command = this_session.current_action
+                    last_command = this_session.history.last()
 
-                    if last_command.action == "root":
+                    if last_command is None:
                         return
 
                     if last_command.action == "add":
-                        action, obj = this_client.delete_object(last_command.obj)
+                        action, obj = await this_client.delete_object(last_command.obj)
                     elif last_command.action == "delete":
-                        action, obj = this_client.add_object(last_command.obj)
+                        action, obj = await this_client.add_object(last_command.obj)
 
                     # register new last actiond
                     if action is not False:
-                        current_state = last_command.previous_state()
-                        if current_state is not None:
-                            this_session.current_action = current_state
+                        this_session.history.undo()
 
-                            # the state changes, log it
-                            current_state = this_client.get_state("wizard_working")
-                            self.log_event("working_board_log", current_state, room_id)
+                        # the state changes, log it
+                        await self.log_board_change(room_id, action, obj)
 
                 elif event == "redo":
-                    right_user = self.check_role(user_id, "wizard", room_id)
+                    right_user = await self.check_role(user_id, "wizard", room_id)
                     if right_user is False:
                         return
 
-                    current_state = this_session.current_action
-                    current_state = current_state.next_state()
+                    current_state = this_session.history.redo()
 
                     if current_state is not None:
-                        this_session.current_action = current_state
-
                         if current_state.action == "add":
-                            action, obj = this_client.add_object(current_state.obj)
+                            action, obj = await this_client.add_object(
+                                current_state.obj
+                            )
                         elif current_state.action == "delete":
-                            action, obj = this_client.delete_object(current_state.obj)
+                            action, obj = await this_client.delete_object(
+                                current_state.obj
+                            )
 
                         # register new last actiond
                         if action is not False:
                             # the state changes, log it
-                            current_state = this_client.get_state("wizard_working")
-                            self.log_event("working_board_log", current_state, room_id)
+                            await self.log_board_change(room_id, action, obj)
 
                 elif event == "next_state":
-                    right_user = self.check_role(user_id, "player", room_id)
+                    right_user = await self.check_role(user_id, "player", room_id)
                     if right_user is False:
                         return
 
                     if this_session.can_load_next_episode is True:
-                        self.sio.emit(
+                        await self.sio.emit(
                             "text",
                             {
                                 "message": COLOR_MESSAGE.format(
@@ -862,7 +795,7 @@ class CoCoBot(TaskBot):
                         message=next_episode_warning_message,
                         color=WARNING_COLOR,
                     )
-                    self.sio.emit(
+                    await self.sio.emit(
                         "text",
                         {
                             "message": (
@@ -879,7 +812,7 @@ class CoCoBot(TaskBot):
 
                 elif event == "delete":
                     this_client = this_session.golmi_client
-                    current_state = this_client.get_state("wizard_working")
+                    current_state = await this_client.get_state("wizard_working")
 
                     if "mouse" not in current_state["grippers"]:
                         return
@@ -888,22 +821,18 @@ class CoCoBot(TaskBot):
                     obj_id = list(obj.keys())[0]
                     obj = obj[obj_id]
 
-                    action, obj = this_client.delete_object(obj)
+                    action, obj = await this_client.delete_object(obj)
 
                     if action is not False:
-                        current_action = this_session.current_action
-                        this_session.current_action = current_action.add_action(
-                            action, obj
-                        )
+                        this_session.history.add(action, obj)
 
                         # the state changes, log it
-                        current_state = this_client.get_state("wizard_working")
-                        self.log_event("working_board_log", current_state, room_id)
+                        await self.log_board_change(room_id, action, obj)
                     return
 
                 elif event == "submit_survey":
                     if this_session.submited_survey[user_id] is True:
-                        self.sio.emit(
+                        await self.sio.emit(
                             "text",
                             {
                                 "message": COLOR_MESSAGE.format(
@@ -923,13 +852,13 @@ class CoCoBot(TaskBot):
                     this_session.submited_survey[user_id] = True
 
                     self.log_event("survey_result", survey_data, room_id)
-                    self.terminate_experiment(room_id, user_id)
-                    self.remove_user_from_room(user_id, room_id)
+                    await self.terminate_experiment(room_id, user_id)
+                    await self.remove_user_from_room(user_id, room_id)
                     return
 
             else:
                 # commands from the user
-                self.sio.emit(
+                await self.sio.emit(
                     "text",
                     {
                         "message": COLOR_MESSAGE.format(
@@ -942,7 +871,7 @@ class CoCoBot(TaskBot):
                     },
                 )
 
-    def check_role(self, user_id, wanted_role, room_id):
+    async def check_role(self, user_id, wanted_role, room_id):
         this_session = self.sessions[room_id]
         curr_usr, other_usr = this_session.players
         if curr_usr["id"] != user_id:
@@ -953,7 +882,7 @@ class CoCoBot(TaskBot):
 
         else:
             # inform user
-            self.sio.emit(
+            await self.sio.emit(
                 "text",
                 {
                     "message": COLOR_MESSAGE.format(
@@ -967,7 +896,7 @@ class CoCoBot(TaskBot):
 
             return False
 
-    def send_roles(self, room_id):
+    async def send_roles(self, room_id):
         this_session = self.sessions[room_id]
         curr_usr, other_usr = this_session.players
 
@@ -975,7 +904,7 @@ class CoCoBot(TaskBot):
         for user in this_session.players:
             role = user["role"]
 
-            self.sio.emit(
+            await self.sio.emit(
                 "message_command",
                 {
                     "command": {
@@ -991,9 +920,9 @@ class CoCoBot(TaskBot):
                     "receiver_id": user["id"],
                 },
             )
-        self.load_state(room_id)
+        await self.load_state(room_id)
 
-    def switch_roles(self, room_id):
+    async def switch_roles(self, room_id):
         this_session = self.sessions[room_id]
         golmi_rooms = this_session.golmi_client.rooms.json
         curr_usr, other_usr = this_session.players
@@ -1005,7 +934,7 @@ class CoCoBot(TaskBot):
         for user in this_session.players:
             role = user["role"]
 
-            self.sio.emit(
+            await self.sio.emit(
                 "message_command",
                 {
                     "command": {
@@ -1022,8 +951,8 @@ class CoCoBot(TaskBot):
                 },
             )
 
-            self.rename_user(user["id"], names[role])
-            self.sio.emit(
+            await self.rename_user(user["id"], names[role])
+            await self.sio.emit(
                 "text",
                 {
                     "message": COLOR_MESSAGE.format(
@@ -1036,14 +965,21 @@ class CoCoBot(TaskBot):
                 },
             )
 
-    def load_next_state(self, room_id):
+    async def load_next_state(self, room_id):
         this_session = self.sessions[room_id]
         this_client = this_session.golmi_client
 
         # log points for current state
-        working_state = this_client.get_state("wizard_working")
+        working_state = await this_client.get_state("wizard_working")
         reference_state = this_session.states.pop(0)
-        current_points = self.calculate_points(working_state, reference_state)
+        # fingerprints of the boards are kept up to date, compare them
+        working_board = this_client.get_fingerprint("wizard_working")
+        if working_board is None:
+            working_board = working_state
+        reference_board = this_session.target_fingerprint
+        if reference_board is None:
+            reference_board = reference_state
+        current_points = self.calculate_points(working_board, reference_board)
 
         this_session.points += current_points
         if this_session.states:
@@ -1058,19 +994,20 @@ class CoCoBot(TaskBot):
             },
             room_id,
         )
+        self.log_event("action_history", this_session.history.to_json(), room_id)
 
         # update points on title
         logging.debug(
             f"Updating title bar with current scores {this_session.points}, {this_session.total_episodes}"
         )
-        self.update_title_points(room_id)
+        await self.update_title_points(room_id)
 
         this_session.timer.reset()
 
         # no more states, jump to survey
         if not this_session.states:
             # self.close_game(room_id)
-            self.sio.emit(
+            await self.sio.emit(
                 "message_command",
                 {
                     "command": {"event": "survey", "survey": SURVEY},
@@ -1078,7 +1015,7 @@ class CoCoBot(TaskBot):
                 },
             )
 
-            self.sio.emit(
+            await self.sio.emit(
                 "text",
                 {
                     "message": COLOR_MESSAGE.format(
@@ -1090,22 +1027,22 @@ class CoCoBot(TaskBot):
                 },
             )
 
-            self.room_to_read_only(
+            await self.room_to_read_only(
                 room_id,
                 remove_users=False,
                 status_message="Complete the survey to end the experiment",
             )
             for user in this_session.players:
-                self.set_message_privilege(user["id"], False)
+                await self.set_message_privilege(user["id"], False)
             return
 
         # switch roles
         if isinstance(this_session.states[0], str) is True:
             if this_session.states[0] == "switch":
-                self.switch_roles(room_id)
+                await self.switch_roles(room_id)
                 this_session.states.pop(0)
 
-        self.sio.emit(
+        await self.sio.emit(
             "text",
             {
                 "message": COLOR_MESSAGE.format(
@@ -1115,9 +1052,9 @@ class CoCoBot(TaskBot):
                 "html": True,
             },
         )
-        self.load_state(room_id)
+        await self.load_state(room_id)
 
-    def load_state(self, room_id, from_disconnect=False):
+    async def load_state(self, room_id, from_disconnect=False):
         """load the current board on the golmi server"""
         this_session = self.sessions[room_id]
         # get current state
@@ -1126,22 +1063,24 @@ class CoCoBot(TaskBot):
         client = this_session.golmi_client
 
         # load configuration and selector board
-        client.load_config(CONFIG)
-        client.load_state(SELECTIONSTATE, "selector")
+        await client.load_config(CONFIG)
+        await client.load_state(SELECTIONSTATE, "selector")
 
         # load new target state
-        client.load_state(this_state, "target")
+        await client.load_state(this_state, "target")
 
         # clear working states
         for to_clear in ["wizard_working", "player_working"]:
-            client.clear_state(to_clear)
+            await client.clear_state(to_clear)
 
+        this_session.target_fingerprint = BoardFingerprint.of(this_state)
         self.log_event("target_board_log", this_state, room_id)
+        await self.log_board_change(room_id)
 
         # send to frontend instructions
         for user in this_session.players:
             role = user["role"]
-            self.sio.emit(
+            await self.sio.emit(
                 "message_command",
                 {
                     "command": {
@@ -1154,7 +1093,42 @@ class CoCoBot(TaskBot):
                 },
             )
 
-    def update_title_points(self, room_id):
+    async def log_board_change(self, room_id, action=None, obj=None):
+        """Log a change of the wizard's working board: the action and
+        its object if given, periodically and for any other change the
+        full state."""
+        this_session = self.sessions[room_id]
+        await self.detect_patterns(room_id, action, obj)
+
+        board_log = this_session.board_log
+        if action is not None and not board_log.snapshot_due():
+            self.log_event(
+                "working_board_delta", board_log.delta(action, obj), room_id
+            )
+            return
+
+        state = await this_session.golmi_client.get_state("wizard_working")
+        self.log_event("working_board_snapshot", board_log.snapshot(state), room_id)
+
+    async def detect_patterns(self, room_id, action=None, obj=None):
+        """Log the patterns completed by a change of the wizard's
+        working board, only the cells of the changed object are
+        matched again when the board's cell index is available."""
+        this_session = self.sessions[room_id]
+        client = this_session.golmi_client
+        cells = client.get_cell_index("wizard_working")
+        if cells is not None and action is not None:
+            completed = this_session.patterns.update(
+                {"objs": cells.objs, "objs_grid": cells.grid}, object_cells(obj)
+            )
+        else:
+            state = await client.get_state("wizard_working")
+            completed = this_session.patterns.scan(state)
+
+        for name, ids in completed:
+            self.log_event("pattern_completed", {"pattern": name, "objs": ids}, room_id)
+
+    async def update_title_points(self, room_id):
         logging.debug(f"inside update_title_points, {room_id} {self.sessions}")
         if room_id not in self.sessions:
             points = 0
@@ -1174,13 +1148,7 @@ class CoCoBot(TaskBot):
             "text": f"{correct_points} | Current Episode: {total_episodes+1}/{MAX_EPISODES_PER_SESSION}"
         }
 
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/text/title",
-            # json={"text": f"Score: {score} 🏆 | Correct: {correct} ✅"},
-            json=points_json,
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        self.request_feedback(response, "setting point stand in title")
+        await self.api.set_text(room_id, "title", points_json["text"])
 
     def calculate_points(self, working_board, reference_board):
         equality, _ = compare_boards(working_board, reference_board)
@@ -1188,52 +1156,46 @@ class CoCoBot(TaskBot):
             return 1
         return 0
 
-    def terminate_experiment(self, room_id, user_id):
+    async def terminate_experiment(self, room_id, user_id):
         this_session = self.sessions[room_id]
-        self.confirmation_code(room_id, "success", user_id)
+        await self.confirmation_code(room_id, "success", user_id)
 
         # if possible close game for everyone
         if this_session.can_close_room:
-            self.close_game(room_id)
+            await self.close_game(room_id)
             return
 
         this_session.can_close_room = True
 
-    def timeout_waiting_room(self, user):
+    async def timeout_waiting_room(self, user):
         # get layout_id
-        response = requests.get(
-            f"{self.uri}/tasks/{self.task_id}",
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        layout_id = response.json()["layout_id"]
+        response = await self.api.request("GET", f"tasks/{self.task_id}", "get_task")
+        layout_id = (await response.json())["layout_id"]
 
         # create a new task room for this user
-        room = requests.post(
-            f"{self.uri}/rooms",
-            headers={"Authorization": f"Bearer {self.token}"},
-            json={"layout_id": layout_id},
+        room = await self.api.request(
+            "POST", "rooms", "create_room", json={"layout_id": layout_id}
         )
-        room = room.json()
+        room = await room.json()
 
         # remove user from waiting_room
-        self.remove_user_from_room(user["id"], self.waiting_room)
+        await self.remove_user_from_room(user["id"], self.waiting_room)
 
         # move user to new task room
-        response = requests.post(
-            f"{self.uri}/users/{user['id']}/rooms/{room['id']}",
-            headers={"Authorization": f"Bearer {self.token}"},
+        response = await self.api.request(
+            "POST", f"users/{user['id']}/rooms/{room['id']}", "join_room", room["id"]
         )
         if not response.ok:
-            LOG.error(f"Could not let user join room: {response.status_code}")
+            logging.error(f"Could not let user join room: {response.status}")
             exit(4)
 
-        sleep(2)
+        await asyncio.sleep(2)
 
         completion_token = "".join(
             random.choices(string.ascii_uppercase + string.digits, k=6)
         )
 
-        self.sio.emit(
+        await self.sio.emit(
             "text",
             {
                 "message": COLOR_MESSAGE.format(
@@ -1262,16 +1224,16 @@ class CoCoBot(TaskBot):
         )
 
         # remove user from new task_room
-        self.remove_user_from_room(user["id"], room["id"])
+        await self.remove_user_from_room(user["id"], room["id"])
 
-    def confirmation_code(self, room_id, status, user_id=None):
+    async def confirmation_code(self, room_id, status, user_id=None):
         this_session = self.sessions[room_id]
 
         if user_id is not None:
             completion_token = "".join(
                 random.choices(string.ascii_uppercase + string.digits, k=6)
             )
-            self.sio.emit(
+            await self.sio.emit(
                 "text",
                 {
                     "message": COLOR_MESSAGE.format(
@@ -1305,7 +1267,7 @@ class CoCoBot(TaskBot):
             completion_token = "".join(
                 random.choices(string.ascii_uppercase + string.digits, k=6)
             )
-            self.sio.emit(
+            await self.sio.emit(
                 "text",
                 {
                     "message": COLOR_MESSAGE.format(
@@ -1333,9 +1295,9 @@ class CoCoBot(TaskBot):
                 room_id,
             )
 
-    def timeout_close_game(self, room_id, status):
+    async def timeout_close_game(self, room_id, status):
         if room_id in self.sessions:
-            self.sio.emit(
+            await self.sio.emit(
                 "text",
                 {
                     "message": COLOR_MESSAGE.format(
@@ -1346,13 +1308,13 @@ class CoCoBot(TaskBot):
                     "room": room_id,
                 },
             )
-            self.confirmation_code(room_id, status)
-            self.close_game(room_id)
+            await self.confirmation_code(room_id, status)
+            await self.close_game(room_id)
 
-    def close_game(self, room_id):
+    async def close_game(self, room_id):
         """Erase any data structures no longer necessary."""
         this_session = self.sessions[room_id]
-        self.sio.emit(
+        await self.sio.emit(
             "text",
             {
                 "message": COLOR_MESSAGE.format(
@@ -1365,85 +1327,42 @@ class CoCoBot(TaskBot):
         )
         if room_id in self.sessions:
             this_session.game_over = True
-            self.room_to_read_only(room_id)
+            if this_session.timer.typing is not None:
+                self.log_event(
+                    "typing_events", dict(this_session.timer.typing.stats), room_id
+                )
+            await self.flush_logs()
+            await self.room_to_read_only(room_id)
 
             # remove any task room specific objects
-            self.sessions.clear_session(room_id)
-
-    def remove_user_from_room(self, user_id, room_id):
-        response = requests.get(
-            f"{self.uri}/users/{user_id}",
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            logging.error(f"Could not get user: {response.status_code}")
-            response.raise_for_status()
-        etag = response.headers["ETag"]
+            await self.sessions.clear_session(room_id)
+        self.log_round_trips(room_id)
 
+    async def remove_user_from_room(self, user_id, room_id):
         try:
-            response = requests.delete(
-                f"{self.uri}/users/{user_id}/rooms/{room_id}",
-                headers={"If-Match": etag, "Authorization": f"Bearer {self.token}"},
-            )
-            if not response.ok:
-                logging.error(
-                    f"Could not remove user from task room: {response.status_code}"
-                )
-                response.raise_for_status()
+            await self.api.remove_user_from_room(user_id, room_id)
             logging.debug("Removing user from task room was successful.")
         except:
             logging.debug(f"User {user_id} not in room {room_id}")
 
-    def room_to_read_only(
+    async def room_to_read_only(
         self, room_id, remove_users=True, status_message="This room is read-only"
     ):
         """Set room to read only."""
         this_session = self.sessions[room_id]
-        # set room to read-only
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "readonly", "value": "True"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            logging.error(f"Could not set room to read_only: {response.status_code}")
-            response.raise_for_status()
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "placeholder", "value": status_message},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            logging.error(f"Could not set room to read_only: {response.status_code}")
-            response.raise_for_status()
+        await self.api.room_to_read_only(room_id, status_message)
 
         # remove user from room
         if remove_users is True:
             if room_id in self.sessions:
                 for usr in this_session.players:
-                    self.remove_user_from_room(usr["id"], room_id)
+                    await self.remove_user_from_room(usr["id"], room_id)
 
-    def set_message_privilege(self, user_id, value):
+    async def set_message_privilege(self, user_id, value):
         """
         change user's permission to send messages
         """
-        # get permission_id based on user_id
-        response = requests.get(
-            f"{self.uri}/users/{user_id}/permissions",
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        self.request_feedback(response, "retrieving user's permissions")
-
-        permission_id = response.json()["id"]
-        requests.patch(
-            f"{self.uri}/permissions/{permission_id}",
-            json={"send_message": value},
-            headers={
-                "If-Match": response.headers["ETag"],
-                "Authorization": f"Bearer {self.token}",
-            },
-        )
-        self.request_feedback(response, "changing user's message permission")
+        await self.api.set_message_privilege(user_id, value)
 
 
 if __name__ == "__main__":
@@ -1492,4 +1411,4 @@ if __name__ == "__main__":
     bot = CoCoBot(args.token, args.user, args.task, args.host, args.port)
     bot.post_init(args.waiting_room, args.golmi_server, args.golmi_password)
     # connect to chat server
-    bot.run()
+    asyncio.run(bot.run())
@@ -0,0 +1,142 @@
+"""Log of the wizard's working board as deltas with periodic snapshots.
+
+Instead of the full state after every change, only the action and the
+object of the change (`working_board_delta`) are logged, as in the
+`ActionHistory`. Every `BOARD_SNAPSHOT_EVERY` deltas, and whenever
+the board changes in another way (cleared, reverted, new episode), the
+full state is logged (`working_board_snapshot`). `replay` turns such a
+log back into the full states. The sequence numbers count the changes
+of a room, so a log of several rooms is split by room first.
+
+usage: python -m coco.board_log LOGS.json > states.jsonl
+"""
+
+import argparse
+import copy
+import json
+
+from .config import BOARD_SNAPSHOT_EVERY
+from .golmi_client import CellIndex
+
+BOARD_EVENTS = {"working_board_snapshot", "working_board_delta", "working_board_log"}
+
+
+class BoardLog:
+    def __init__(self, snapshot_every=BOARD_SNAPSHOT_EVERY):
+        """
+        :param snapshot_every: Deltas logged between two snapshots
+        :type snapshot_every: int
+        """
+        self.snapshot_every = snapshot_every
+        self.seq = 0
+        # deltas since the last snapshot, None before the first one
+        self.deltas = None
+
+    def snapshot_due(self):
+        return self.deltas is None or self.deltas >= self.snapshot_every
+
+    def snapshot(self, state):
+        """Data of a `working_board_snapshot` event."""
+        self.seq += 1
+        self.deltas = 0
+        return {"seq": self.seq, "state": state}
+
+    def delta(self, action, obj):
+        """Data of a `working_board_delta` event.
+        :param action: "add" or "delete"
+        :type action: str
+        """
+        self.seq += 1
+        self.deltas += 1
+        # the object is kept in the action history and may change
+        # before the log is posted
+        return {"seq": self.seq, "action": action, "obj": copy.deepcopy(obj)}
+
+
+def apply_delta(cells, delta):
+    """Apply the action of a delta to the `CellIndex` of a state."""
+    if delta["action"] == "add":
+        cells.add(copy.deepcopy(delta["obj"]))
+    elif delta["action"] == "delete":
+        cells.remove(delta["obj"]["id_n"])
+    else:
+        raise ValueError(f"Unknown action: {delta['action']}")
+
+
+def replay(entries):
+    """Full working board states of a room's log.
+
+    :param entries: Log entries of a room in the order of their `seq`,
+        each with `event` and `data` as returned by slurk's logs api
+    :type entries: iterable
+    :return: Generator of (entry, state) after every board change,
+        the states are not copied
+    """
+    state = cells = None
+    for entry in entries:
+        event = entry["event"]
+        if event == "working_board_snapshot":
+            state = copy.deepcopy(entry["data"]["state"])
+            cells = CellIndex(state)
+        elif event == "working_board_log":
+            # full states logged before deltas were introduced
+            state = copy.deepcopy(entry["data"])
+            cells = CellIndex(state)
+        elif event == "working_board_delta":
+            if state is None:
+                raise ValueError(f"Delta {entry['data']['seq']} before any snapshot")
+            apply_delta(cells, entry["data"])
+        else:
+            continue
+        yield entry, state
+
+
+def room_logs(entries):
+    """Working board log entries of every room, in the order of their
+    `seq`.
+
+    :param entries: Log entries of one or more rooms, with the
+        `room_id` given by slurk's logs api
+    :type entries: iterable
+    :return: dict of room id to the room's entries
+    """
+    rooms = dict()
+    for entry in entries:
+        if entry["event"] in BOARD_EVENTS:
+            rooms.setdefault(entry.get("room_id"), list()).append(entry)
+
+    for room_entries in rooms.values():
+        # logs are posted in the background, so their creation dates can
+        # be out of order, sort by the sequence number where it exists
+        room_entries.sort(key=lambda entry: entry.get("date_created") or "")
+        room_entries.sort(key=lambda entry: entry["data"].get("seq", 0))
+    return rooms
+
+
+def read_entries(path):
+    """Log entries from a json list or from json lines."""
+    with open(path, encoding="utf-8") as infile:
+        text = infile.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Reconstruct the working boards of a coco room log."
+    )
+    parser.add_argument("logs", help="json list or json lines of log entries")
+    args = parser.parse_args()
+
+    for room_id, entries in room_logs(read_entries(args.logs)).items():
+        for entry, state in replay(entries):
+            print(
+                json.dumps(
+                    {
+                        "room_id": room_id,
+                        "date_created": entry.get("date_created"),
+                        "state": state,
+                    }
+                )
+            )
@@ -27,6 +27,10 @@ BOARDS_PER_ROOM = 20
 BOARDS_PER_LEVEL = 2
 SEQUENCES_PER_ROOM = 1
 MAX_EPISODES_PER_SESSION = 3  # This is used to display in the titlebar to know the number of episodes played in a session
+BOARD_SNAPSHOT_EVERY = 20  # working board deltas logged between two full snapshots
+HISTORY_DEPTH = 500  # wizard actions that can be undone
+GOLMI_SPARE_SOCKETS = 16  # golmi sockets connected in advance for new rooms
+MIRROR_TIMEOUT = 2  # seconds to wait for golmi's update of a change before resyncing
 
 # points system
 STARTING_POINTS = 0
@@ -37,6 +41,7 @@ NEGATIVE_REWARD = -5  # wrong piece selected
 TIMEOUT_TIMER = 5
 LEAVE_TIMER = 3
 WAITING_ROOM_TIMER = 5
+TYPING_TIMER = 3  # seconds without a click until the wizard stops typing
 
 # data
 # The board width and height to be updated inside the class: QuadrupleClient -> load_config() in golmi_client.py
@@ -8,6 +8,64 @@ import requests
 from .config import *
 
 
+class SequenceIndex:
+    """Byte offsets of the boards in the sequence files, by level.
+
+    A file is parsed once and again only after it changed, so sampling
+    the boards of a room only reads the chosen boards.
+    """
+
+    indices = dict()
+
+    def __init__(self, path):
+        self.path = path
+        # sequence file -> (modification time and size, offsets by level)
+        self.files = dict()
+
+    @classmethod
+    def get(cls, path):
+        """Shared index of a directory of sequence files."""
+        if path not in cls.indices:
+            cls.indices[path] = cls(path)
+        return cls.indices[path]
+
+    def sequences(self):
+        """Sequence files mapped to the offsets of their boards by level."""
+        sequences = dict()
+        for sequence in self.path.iterdir():
+            stat = sequence.stat()
+            version = (stat.st_mtime_ns, stat.st_size)
+            cached = self.files.get(sequence)
+            if cached is None or cached[0] != version:
+                cached = (version, self.index_file(sequence))
+                self.files[sequence] = cached
+            sequences[sequence] = cached[1]
+        return sequences
+
+    def levels(self, sequence):
+        if sequence not in self.files:
+            self.sequences()
+        return self.files[sequence][1]
+
+    @staticmethod
+    def index_file(sequence):
+        buffer = defaultdict(list)
+        offset = 0
+        with sequence.open("rb") as infile:
+            for line in infile:
+                if line.strip():
+                    level = int(json.loads(line)["level"])
+                    buffer[level].append(offset)
+                offset += len(line)
+        return dict(sorted(buffer.items()))
+
+    @staticmethod
+    def read(sequence, offset):
+        with sequence.open("rb") as infile:
+            infile.seek(offset)
+            return json.loads(infile.readline())
+
+
 class Dataloader(list):
     def __init__(self, path):
         self.path = path
@@ -28,30 +86,22 @@ class Dataloader(list):
         )
 
     def read_boards(self):
-        all_sequences = list(self.path.iterdir())
+        index = SequenceIndex.get(self.path)
+        all_sequences = list(index.sequences())
         sequences = random.sample(all_sequences, SEQUENCES_PER_ROOM)
 
         for i, sequence in enumerate(sequences):
-            buffer = defaultdict(list)
-            with sequence.open(encoding="utf-8") as infile:
-                for line in infile:
-                    board = json.loads(line)
-                    level = int(board["level"])
-                    buffer[level].append(board)
-
-                sorted_dict = dict(sorted(buffer.items()))
-
-                for level, boards in sorted_dict.items():
-                    board = random.choice(boards)
-                    self.append(
-                        (board["state"], board["instructions"])
-                    )
-
-                    # TODO: This has to be moved out of this for loop - recheck the functionality
-                    # switch roles ar the end of the sequence except for the last one
-                    # Commenting for now, check later
-                    # if i != len(sequences) - 1:
-                    #    self.append("switch")
+            for level, offsets in index.levels(sequence).items():
+                board = index.read(sequence, random.choice(offsets))
+                self.append(
+                    (board["state"], board["instructions"])
+                )
+
+                # TODO: This has to be moved out of this for loop - recheck the functionality
+                # switch roles ar the end of the sequence except for the last one
+                # Commenting for now, check later
+                # if i != len(sequences) - 1:
+                #    self.append("switch")
 
     def get_boards(self):
         """sample random boards for a room"""
@@ -1,38 +1,300 @@
+import asyncio
+from collections import Counter
+import copy
+import hashlib
+import heapq
 import logging
 from dataclasses import dataclass, asdict
+import time
 
-import requests
+import aiohttp
 import socketio
 
-from .config import EMPTYSTATE, SELECTIONSTATE
+from .config import EMPTYSTATE, GOLMI_SPARE_SOCKETS, MIRROR_TIMEOUT, SELECTIONSTATE
+
+
+def object_cells(obj):
+    """Keys of the `objs_grid` cells ("y:x") covered by an object."""
+    for row, blocks in enumerate(obj["block_matrix"]):
+        for column, block in enumerate(blocks):
+            if block:
+                yield f"{int(obj['y']) + row}:{int(obj['x']) + column}"
+
+
+def build_objs_grid(objs):
+    """Stack of object ids on each cell, stacked in the order of `objs`."""
+    grid = dict()
+    for obj_id, obj in objs.items():
+        for key in object_cells(obj):
+            grid.setdefault(key, list()).append(obj_id)
+    return grid
+
+
+def cell_signature(objs, stack):
+    """Type and color of the objects on a cell, bottom to top."""
+    return tuple((objs[obj_id]["type"], objs[obj_id]["color"][0]) for obj_id in stack)
+
+
+class BoardFingerprint:
+    """Hashable fingerprint of the type and color stacks on a board.
+
+    The digest is the sum of the hashes of all non-empty cells, so it
+    is updated in constant time when the stack of a cell changes and
+    two fingerprints are compared by their digests alone. `diff` lists
+    the differing cells.
+    """
+
+    MODULUS = 2**64
+
+    def __init__(self):
+        self.cells = dict()
+        self.digest = 0
+
+    @classmethod
+    def of(cls, state):
+        fingerprint = cls()
+        for key, stack in state["objs_grid"].items():
+            fingerprint.set(key, cell_signature(state["objs"], stack))
+        return fingerprint
+
+    @staticmethod
+    def cell_hash(key, signature):
+        data = repr((key, signature)).encode()
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+    def set(self, key, signature):
+        """Replace the signature of a cell ("y:x")."""
+        old = self.cells.pop(key, None)
+        if old:
+            self.digest = (self.digest - self.cell_hash(key, old)) % self.MODULUS
+        if signature:
+            self.cells[key] = signature
+            self.digest = (self.digest + self.cell_hash(key, signature)) % self.MODULUS
+
+    def diff(self, other):
+        """Cells whose stacks differ, mapped to both signatures."""
+        return {
+            key: (self.cells.get(key, ()), other.cells.get(key, ()))
+            for key in self.cells.keys() | other.cells.keys()
+            if self.cells.get(key) != other.cells.get(key)
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, BoardFingerprint):
+            return NotImplemented
+        return self.digest == other.digest
+
+    def __hash__(self):
+        return self.digest
+
+    def __repr__(self):
+        return f"BoardFingerprint({self.digest:016x}, {len(self.cells)} cells)"
+
+
+class IdAllocator:
+    """Smallest free non-negative id in logarithmic time.
+
+    Free ids below the highest id ever used are kept in a heap, ids
+    that were taken again since they were freed are skipped lazily.
+    """
+
+    def __init__(self, used=()):
+        self.used = set()
+        self.free = list()
+        self.next = 0
+        for used_id in sorted(used):
+            self.reserve(used_id)
+
+    def peek(self):
+        """The id `allocate` would return."""
+        while self.free and self.free[0] in self.used:
+            heapq.heappop(self.free)
+        return self.free[0] if self.free else self.next
+
+    def allocate(self):
+        new_id = self.peek()
+        self.reserve(new_id)
+        return new_id
+
+    def reserve(self, used_id):
+        if used_id >= self.next:
+            for gap in range(self.next, used_id):
+                heapq.heappush(self.free, gap)
+            self.next = used_id + 1
+        self.used.add(used_id)
+
+    def release(self, used_id):
+        if used_id in self.used:
+            self.used.remove(used_id)
+            heapq.heappush(self.free, used_id)
+
+
+class CellIndex:
+    """Objects stacked on the cells of a board state, bottom to top.
+
+    Keeps the `objs` and `objs_grid` of the state up to date when
+    objects are added or removed, together with the cells each object
+    covers, so neither a cell nor the cells of an object are looked up
+    by scanning the board. The `BoardFingerprint` of the board and the
+    `IdAllocator` of the numerical object ids are updated along.
+    """
+
+    def __init__(self, state):
+        self.objs = state["objs"]
+        self.grid = state["objs_grid"]
+        self.covered = dict()
+        for key, stack in self.grid.items():
+            for obj_id in stack:
+                self.covered.setdefault(obj_id, list()).append(key)
+        self.fingerprint = BoardFingerprint.of(state)
+        self.ids = IdAllocator(int(obj_id) for obj_id in self.objs if obj_id.isdigit())
+
+    def stack(self, x, y):
+        """Ids of the objects on a cell."""
+        return self.grid.get(f"{int(y)}:{int(x)}", list())
+
+    def height(self, x, y):
+        return len(self.stack(x, y))
+
+    def cell(self, x, y):
+        return [self.objs[obj_id] for obj_id in self.stack(x, y)]
+
+    def top(self, x, y):
+        stack = self.stack(x, y)
+        return self.objs[stack[-1]] if stack else None
+
+    def is_covered(self, obj_id):
+        """If another object lies on any cell of an object."""
+        return any(self.grid[key][-1] != obj_id for key in self.covered.get(obj_id, ()))
+
+    def add(self, obj):
+        obj_id = obj["id_n"]
+        if obj_id in self.objs:
+            self.remove(obj_id)
+        self.objs[obj_id] = obj
+        if obj_id.isdigit():
+            self.ids.reserve(int(obj_id))
+        self.covered[obj_id] = list(object_cells(obj))
+        for key in self.covered[obj_id]:
+            self.grid.setdefault(key, list()).append(obj_id)
+            self.fingerprint.set(key, cell_signature(self.objs, self.grid[key]))
+
+    def remove(self, obj_id):
+        if self.objs.pop(obj_id, None) is not None and obj_id.isdigit():
+            self.ids.release(int(obj_id))
+        for key in self.covered.pop(obj_id, ()):
+            stack = self.grid[key]
+            stack.remove(obj_id)
+            self.fingerprint.set(key, cell_signature(self.objs, stack))
+            if not stack:
+                del self.grid[key]
 
 
 class GolmiClient:
     def __init__(self):
-        self.socket = socketio.Client()
+        self.socket = socketio.AsyncClient()
+        # local copy of the board, kept up to date by the updates
+        # golmi sends to every client in the room after each change
+        self.state = None
+        self.cells = None
+        # the board was changed in a way only golmi can compute,
+        # the copy is outdated until the next update arrives
+        self.stale = True
+        # changes sent to golmi whose update did not arrive yet, older
+        # updates must not overwrite the changes applied locally since
+        self.pending = 0
+        # when the oldest of the pending updates was expected
+        self.pending_since = None
+        self.socket.on("update_state", self.on_update_state)
+
+    async def on_update_state(self, state):
+        self.cancel_update()
+        if self.pending == 0:
+            self.set_state(state)
+
+    def expect_update(self):
+        if self.pending == 0:
+            self.pending_since = time.monotonic()
+        self.pending += 1
+
+    def cancel_update(self):
+        self.pending = max(0, self.pending - 1)
+        if self.pending == 0:
+            self.pending_since = None
+
+    def check_pending(self, timeout=MIRROR_TIMEOUT):
+        """Golmi may merge or skip updates, or fail a change without
+        one. If updates are missing for `timeout` seconds the copy is
+        outdated until it is fetched again, see `resync`."""
+        if self.pending and time.monotonic() - self.pending_since > timeout:
+            logging.warning(f"{self.pending} golmi updates missing, resyncing")
+            self.pending = 0
+            self.pending_since = None
+            self.stale = True
+
+    def resync(self, state):
+        """Replace the copy with a state fetched from golmi."""
+        self.pending = 0
+        self.pending_since = None
+        self.set_state(state)
+
+    def set_state(self, state):
+        state = copy.deepcopy(state)
+        state.setdefault("objs", dict())
+        state.setdefault("grippers", dict())
+        if not state.get("objs_grid") and state["objs"]:
+            state["objs_grid"] = build_objs_grid(state["objs"])
+        state.setdefault("objs_grid", dict())
+        self.state = state
+        self.cells = CellIndex(state)
+        self.stale = False
+
+    def add_object(self, obj):
+        if self.state is not None:
+            self.cells.add(copy.deepcopy(obj))
 
-    def run(self, address, room_id, auth):
-        self.socket.connect(address, auth={"password": auth})
-        self.socket.call("join", {"room_id": room_id})
+    def delete_object(self, obj):
+        if self.state is not None:
+            self.cells.remove(obj["id_n"])
 
-    def random_init(self, random_config):
-        self.socket.emit("random_init", random_config)
+    def remove_gripper(self, gripper_id):
+        if self.state is not None:
+            self.state["grippers"].pop(gripper_id, None)
 
-    def load_config(self, config):
-        self.socket.emit("load_config", config)
+    async def run(self, address, room_id, auth, pool=None):
+        if pool is not None:
+            # a connected socket that did not join a room yet
+            self.socket = await pool.acquire()
+            self.socket.on("update_state", self.on_update_state)
+        else:
+            await self.socket.connect(address, auth={"password": auth})
+        await self.socket.call("join", {"room_id": room_id})
 
-    def update_config(self, config):
-        self.socket.emit("update_config", config)
+    async def random_init(self, random_config):
+        self.expect_update()
+        await self.socket.emit("random_init", random_config)
 
-    def disconnect(self):
-        self.socket.emit("disconnect")
-        self.socket.disconnect()
+    async def load_config(self, config):
+        self.expect_update()
+        await self.socket.emit("load_config", config)
+        self.stale = True
 
-    def load_state(self, state):
-        self.socket.emit("load_state", state)
+    async def update_config(self, config):
+        self.expect_update()
+        await self.socket.emit("update_config", config)
+        self.stale = True
 
-    def emit(self, *args, **kwargs):
-        self.socket.emit(*args, **kwargs)
+    async def disconnect(self):
+        await self.socket.emit("disconnect")
+        await self.socket.disconnect()
+
+    async def load_state(self, state):
+        self.expect_update()
+        await self.socket.emit("load_state", state)
+        self.set_state(state)
+
+    async def emit(self, *args, **kwargs):
+        await self.socket.emit(*args, **kwargs)
 
 
 @dataclass
@@ -47,9 +309,132 @@ class Rooms:
         return asdict(self)
 
 
+class Response:
+    """Response of golmi with its body, which is read before
+    the connection is given back to the pool."""
+
+    def __init__(self, response, body):
+        self.response = response
+        self.status = response.status
+        self.ok = response.ok
+        self.body = body
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        self.response.raise_for_status()
+
+
+class GolmiPool:
+    """Connections to a golmi server shared by the rooms of a bot.
+
+    All rooms send their requests through one HTTP session, so the
+    keep-alive connections to golmi are reused across rooms. Golmi
+    binds a socket to the room it joined, every board keeps its own
+    socket, but `spare` sockets are connected in advance and a new
+    room only has to join its boards.
+    """
+
+    pools = dict()
+
+    def __init__(self, address, auth, spare=GOLMI_SPARE_SOCKETS):
+        """
+        :param address: Address of the golmi server
+        :type address: str
+        :param auth: Password of the golmi server
+        :type auth: str
+        :param spare: Sockets kept connected for new rooms
+        :type spare: int
+        """
+        self.address = address
+        self.auth = auth
+        self.spare = spare
+        self.http = None
+        self.sockets = list()
+        self.connecting = set()
+
+    @classmethod
+    def get(cls, address, auth):
+        """Shared pool of a golmi server."""
+        pool = cls.pools.get((address, auth))
+        if pool is None:
+            pool = cls.pools[(address, auth)] = cls(address, auth)
+        return pool
+
+    def session(self):
+        if self.http is None or self.http.closed:
+            self.http = aiohttp.ClientSession()
+        return self.http
+
+    async def connect(self):
+        socket = socketio.AsyncClient()
+        await socket.connect(self.address, auth={"password": self.auth})
+        return socket
+
+    async def acquire(self):
+        """A connected socket, a spare one if available."""
+        while self.sockets:
+            socket = self.sockets.pop()
+            if socket.connected:
+                break
+        else:
+            socket = await self.connect()
+        return socket
+
+    def refill(self):
+        """Connect sockets in the background up to `spare`, once the
+        sockets of a room joined so they do not slow it down."""
+        missing = self.spare - len(self.sockets) - len(self.connecting)
+        for _ in range(missing):
+            task = asyncio.ensure_future(self.connect())
+            self.connecting.add(task)
+            task.add_done_callback(self.connected)
+
+    def connected(self, task):
+        self.connecting.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logging.warning(f"Could not connect spare golmi socket: {task.exception()}")
+            return
+        self.sockets.append(task.result())
+
+    async def close(self):
+        for task in list(self.connecting):
+            task.cancel()
+        sockets, self.sockets = self.sockets, list()
+        for socket in sockets:
+            await socket.disconnect()
+        if self.http is not None:
+            await self.http.close()
+
+
 class QuadrupleClient:
-    def __init__(self, room_id, golmi_address):
+    """Clients of the four golmi boards of a room.
+
+    With `mirror` the state, cells, grippers and gripped objects are
+    read from the local copies of the boards instead of requesting
+    them from golmi. A board is requested once if its copy is outdated.
+    With `check_consistency` every read from a copy is also requested
+    from golmi, differences are logged and counted in `inconsistencies`
+    and golmi's answer is used. With a `GolmiPool` the connections of
+    the pool are used.
+    """
+
+    def __init__(
+        self,
+        room_id,
+        golmi_address,
+        mirror=True,
+        check_consistency=False,
+        pool=None,
+    ):
         self.golmi_address = golmi_address
+        self.pool = pool
+        self.mirror = mirror
+        self.check_consistency = check_consistency
+        self.inconsistencies = Counter()
         self.room_id = room_id
         self.target = GolmiClient()
         self.player_working = GolmiClient()
@@ -61,6 +446,7 @@ class QuadrupleClient:
             wizard_working=f"{self.room_id}_ww",
             selector=f"{self.room_id}_selector",
         )
+        self.http = None
 
     def get_client(self, board):
         mapping = {
@@ -74,67 +460,146 @@ class QuadrupleClient:
     def get_room_id(self, board):
         return asdict(self.rooms)[board]
 
-    def run(self, auth):
-        self.target.run(self.golmi_address, self.rooms.target, auth)
-        self.player_working.run(self.golmi_address, self.rooms.player_working, auth)
-        self.wizard_working.run(self.golmi_address, self.rooms.wizard_working, auth)
-        self.selector.run(self.golmi_address, self.rooms.selector, auth)
+    def get_mirror(self, board):
+        """Local state of a board or None if golmi must be asked."""
+        client = self.get_client(board)
+        client.check_pending()
+        if self.mirror and client.state is not None and not client.stale:
+            return client.state
+        return None
+
+    def get_cell_index(self, board):
+        """`CellIndex` of the local copy of a board or None if golmi
+        must be asked."""
+        if self.check_consistency or self.get_mirror(board) is None:
+            return None
+        return self.get_client(board).cells
+
+    def get_fingerprint(self, board):
+        """`BoardFingerprint` of the local copy of a board or None if
+        golmi must be asked."""
+        cells = self.get_cell_index(board)
+        return cells.fingerprint if cells is not None else None
+
+    def compare(self, board, what, local, remote):
+        """Golmi's answer, counting a difference to the local copy."""
+        if local != remote:
+            self.inconsistencies[board] += 1
+            logging.warning(f"Local copy of {board} differs from golmi: {what}")
+        return remote
+
+    async def change(self, board, method, path, **kwargs):
+        """Send a request changing a board, golmi answers with an update."""
+        client = self.get_client(board)
+        client.expect_update()
+        response = await self.request(method, path, **kwargs)
+        if not response.ok:
+            client.cancel_update()
+        return response
+
+    async def request(self, method, path, **kwargs):
+        async with self.http.request(
+            method, f"{self.golmi_address}/slurk/{path}", **kwargs
+        ) as response:
+            body = await response.json(content_type=None) if response.ok else None
+            return Response(response, body)
+
+    async def run(self, auth):
+        if self.pool is not None:
+            self.http = self.pool.session()
+        else:
+            self.http = aiohttp.ClientSession()
+        # the four boards connect concurrently
+        await asyncio.gather(
+            *(
+                self.get_client(board).run(
+                    self.golmi_address, self.get_room_id(board), auth, self.pool
+                )
+                for board in asdict(self.rooms)
+            )
+        )
+        if self.pool is not None:
+            self.pool.refill()
 
-    def disconnect(self):
+    async def disconnect(self):
         sockets = [self.target, self.wizard_working, self.player_working, self.selector]
         for socket in sockets:
-            socket.disconnect()
+            await socket.disconnect()
+        if self.http is not None and self.pool is None:
+            await self.http.close()
 
-    def load_config(self, config):
+    async def load_config(self, config):
         sockets = [self.target, self.wizard_working, self.player_working]
         for socket in sockets:
-            socket.load_config(config)
+            await socket.load_config(config)
 
-        self.selector.load_config(
+        await self.selector.load_config(
             {"width": 10.0, "height": 10.0, "move_step": 1, "prevent_overlap": False}
         )
 
-    def load_state(self, state, board):
+    async def load_state(self, state, board):
         room = self.get_client(board)
-        room.load_state(state)
+        await room.load_state(state)
 
-    def clear_state(self, board):
+    async def clear_state(self, board):
         room = self.get_client(board)
-        room.load_state(EMPTYSTATE)
+        await room.load_state(EMPTYSTATE)
 
-    def get_state(self, board):
+    async def get_state(self, board):
+        state = self.get_mirror(board)
+        if state is None:
+            return await self.fetch_state(board)
+
+        state = copy.deepcopy(state)
+        if self.check_consistency:
+            return self.compare(board, "state", state, await self.fetch_state(board))
+        return state
+
+    async def fetch_state(self, board):
         room = self.get_room_id(board)
-        req = requests.get(
-            f"{self.golmi_address}/slurk/{room}/state"
-        )
+        req = await self.request("GET", f"{room}/state")
         if req.ok is not True:
-            print("Could not retrieve state")
+            logging.warning("Could not retrieve state")
+        elif self.mirror:
+            self.get_client(board).resync(req.json())
 
         return req.json()
 
-    def copy_working_state(self):
-        state = self.get_state("wizard_working")
+    async def copy_working_state(self):
+        state = await self.get_state("wizard_working")
         state["grippers"] = dict()
-        self.player_working.load_state(state)
+        await self.player_working.load_state(state)
 
-    def grip_object(self, x, y, block_size, board):
+    async def grip_object(self, x, y, block_size, board):
         room = self.get_room_id(board)
-        req = requests.get(
-            f"{self.golmi_address}/slurk/grip/{room}/{x}/{y}/{block_size}"
-        )
+        req = await self.change(board, "GET", f"grip/{room}/{x}/{y}/{block_size}")
+        # golmi decides what is gripped
+        self.get_client(board).stale = True
         if req.ok is not True:
-            print("Could not retrieve gripped piece")
+            logging.warning("Could not retrieve gripped piece")
 
         return req.json()
 
-    def get_gripped_object(self, board):
+    async def get_gripped_object(self, board):
+        state = self.get_mirror(board)
+        if state is None:
+            return await self.fetch_gripped_object(board)
+
+        gripped = dict()
+        for gripper in state["grippers"].values():
+            gripped.update(copy.deepcopy(gripper.get("gripped") or dict()))
+        if self.check_consistency:
+            return self.compare(
+                board, "gripped", gripped, await self.fetch_gripped_object(board)
+            )
+        return gripped
+
+    async def fetch_gripped_object(self, board):
         room = self.get_room_id(board)
-        req = requests.get(
-            f"{self.golmi_address}/slurk/{room}/gripped"
-        )
+        req = await self.request("GET", f"{room}/gripped")
         return req.json() if req.ok else None
 
-    def get_entire_cell(self, x, y, block_size, board):
+    async def get_entire_cell(self, x, y, block_size, board):
         mapping = {
             "wizard_working": self.rooms.wizard_working,
             "target": self.rooms.target,
@@ -142,98 +607,136 @@ class QuadrupleClient:
 
         room = mapping[board]
 
-        req = requests.get(
-            f"{self.golmi_address}/slurk/cell/{room}/{x}/{y}/{block_size}"
-        )
+        state = self.get_mirror(board)
+        if state is None:
+            return await self.fetch_entire_cell(x, y, block_size, room)
+
+        cells = self.get_client(board).cells
+        cell = copy.deepcopy(cells.cell(x // block_size, y // block_size))
+        if self.check_consistency:
+            return self.compare(
+                board,
+                f"cell {x // block_size}:{y // block_size}",
+                cell,
+                await self.fetch_entire_cell(x, y, block_size, room),
+            )
+        return cell
+
+    async def fetch_entire_cell(self, x, y, block_size, room):
+        req = await self.request("GET", f"cell/{room}/{x}/{y}/{block_size}")
         return req.json() if req.ok else None
 
-    def add_object(self, obj):
+    async def add_object(self, obj):
         """
         only wizard can add an object to his working
         """
-        response = requests.post(
-            f"{self.golmi_address}/slurk/{self.rooms.wizard_working}/object",
-            json=obj,
+        response = await self.change(
+            "wizard_working", "POST", f"{self.rooms.wizard_working}/object", json=obj
         )
         if not response.ok:
-            logging.error(f"Could not post new object: {response.status_code}")
+            logging.error(f"Could not post new object: {response.status}")
             response.raise_for_status()
             return False, None
 
+        self.wizard_working.add_object(obj)
         return "add", obj
 
-    def get_gripper(self, gripper_id, board):
+    async def get_gripper(self, gripper_id, board):
+        state = self.get_mirror(board)
+        if state is None:
+            return await self.fetch_gripper(gripper_id, board)
+
+        gripper = copy.deepcopy(state["grippers"].get(gripper_id))
+        if self.check_consistency:
+            return self.compare(
+                board,
+                f"gripper {gripper_id}",
+                gripper,
+                await self.fetch_gripper(gripper_id, board),
+            )
+        return gripper
+
+    async def fetch_gripper(self, gripper_id, board):
         room = self.get_room_id(board)
-        req = requests.get(
-            f"{self.golmi_address}/slurk/gripper/{room}/{gripper_id}"
-        )
+        req = await self.request("GET", f"gripper/{room}/{gripper_id}")
         return req.json() if req.ok else None
 
-    def remove_gripper(self, gripper_id, board):
+    async def remove_gripper(self, gripper_id, board):
         room = self.get_room_id(board)
-        req = requests.delete(
-            f"{self.golmi_address}/slurk/gripper/{room}/{gripper_id}"
-        )
+        req = await self.change(board, "DELETE", f"gripper/{room}/{gripper_id}")
+        if req.ok:
+            self.get_client(board).remove_gripper(gripper_id)
         return req.json() if req.ok else None
 
-    def add_gripper(self, gripper, x, y, block_size, board):
+    async def add_gripper(self, gripper, x, y, block_size, board):
         room = self.get_room_id(board)
-        req = requests.post(
-            f"{self.golmi_address}/slurk/gripper/{room}/{gripper}",
+        req = await self.change(
+            board,
+            "POST",
+            f"gripper/{room}/{gripper}",
             json={"x": x, "y": y, "block_size": block_size}
         )
+        # golmi decides where the gripper is placed
+        self.get_client(board).stale = True
         return req.json() if req.ok else None
 
-    def remove_cell_grippers(self):
-        current_state = self.get_state("wizard_working")
-        for gr_id in current_state["grippers"].keys():
-            if "cell" in gr_id:
-                req = requests.delete(
-                    f"{self.golmi_address}/slurk/gripper/{self.rooms.wizard_working}/{gr_id}"
-                )
+    async def remove_cell_grippers(self):
+        current_state = await self.get_state("wizard_working")
+        await asyncio.gather(
+            *[
+                self.remove_gripper(gr_id, "wizard_working")
+                for gr_id in current_state["grippers"].keys()
+                if "cell" in gr_id
+            ]
+        )
 
-    def delete_object(self, obj):
+    async def delete_object(self, obj):
         """
         remove an object from the wizard working board
         """
         # bridges can span over 2 blocks, make sure that no
         # other piece is placed on this bridge
         if obj["type"] in {"vbridge", "hbridge"}:
-            state = self.get_state("wizard_working")
-            this_obj = obj["id_n"]
-            for tile in state["objs_grid"].values():
-                if this_obj in tile:
-                    if tile[-1] != this_obj:
-                        return False, None
-
-        response = requests.delete(
-            f"{self.golmi_address}/slurk/{self.rooms.wizard_working}/object",
-            json=obj,
+            cells = self.get_cell_index("wizard_working")
+            if cells is not None:
+                if cells.is_covered(obj["id_n"]):
+                    return False, None
+            else:
+                state = await self.get_state("wizard_working")
+                this_obj = obj["id_n"]
+                for tile in state["objs_grid"].values():
+                    if this_obj in tile:
+                        if tile[-1] != this_obj:
+                            return False, None
+
+        response = await self.change(
+            "wizard_working", "DELETE", f"{self.rooms.wizard_working}/object", json=obj
         )
         if not response.ok:
-            logging.error(f"Could not post new object: {response.status_code}")
+            logging.error(f"Could not post new object: {response.status}")
             response.raise_for_status()
             return False, None
 
+        self.wizard_working.delete_object(obj)
         if "gripped" in obj:
             obj.pop("gripped")
         return "delete", obj
 
-    def remove_selection(self, room, gripper_id):
+    async def remove_selection(self, room, gripper_id):
         rooms = {
             "wizard_selection": self.rooms.selector,
             "wizard_working": self.rooms.wizard_working,
         }
 
-        response = requests.delete(
-            f"{self.golmi_address}/slurk/gripper/{rooms[room]}/{gripper_id}"
+        board = {"wizard_selection": "selector"}.get(room, room)
+        response = await self.change(
+            board, "DELETE", f"gripper/{rooms[room]}/{gripper_id}"
         )
         if not response.ok:
-            logging.error(f"Could not post new object: {response.status_code}")
+            logging.error(f"Could not post new object: {response.status}")
             response.raise_for_status()
 
-    def get_mouse_gripper(self):
-        req = requests.get(
-            f"{self.golmi_address}/slurk/gripper/{self.rooms.wizard_working}/mouse"
-        )
-        return req.json() if req.ok else None
+        self.get_client(board).remove_gripper(gripper_id)
+
+    async def get_mouse_gripper(self):
+        return await self.get_gripper("mouse", "wizard_working")
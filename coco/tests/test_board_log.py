@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+# University of Potsdam
+"""BoardLog and replay test cases."""
+
+import copy
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from coco.board_log import BoardLog, replay, room_logs
+from coco.config import EMPTYSTATE
+from coco.golmi_client import CellIndex
+
+
+def obj(obj_id, x, y, obj_type="nut"):
+    return {
+        "block_matrix": [[1, 1]] if obj_type == "hbridge" else [[1]],
+        "color": ["red", "#ff0000", [255, 0, 0]],
+        "id_n": str(obj_id),
+        "rotation": 0,
+        "type": obj_type,
+        "x": float(x),
+        "y": float(y),
+        "gripped": None,
+    }
+
+
+class TestBoardLog(unittest.TestCase):
+    def log_random_session(self, rng, snapshot_every):
+        state = copy.deepcopy(EMPTYSTATE)
+        cells = CellIndex(state)
+        board_log = BoardLog(snapshot_every)
+        entries, states = list(), list()
+
+        def change(action=None, changed=None):
+            if action is not None and not board_log.snapshot_due():
+                event, data = "working_board_delta", board_log.delta(action, changed)
+            else:
+                event = "working_board_snapshot"
+                data = board_log.snapshot(copy.deepcopy(state))
+            entries.append({"event": event, "data": data})
+            states.append(copy.deepcopy(state))
+
+        change()
+        for obj_id in range(rng.randrange(1, 80)):
+            if cells.objs and rng.random() < 0.3:
+                removed = cells.objs[rng.choice(sorted(cells.objs))]
+                if not cells.is_covered(removed["id_n"]):
+                    cells.remove(removed["id_n"])
+                    change("delete", removed)
+            elif rng.random() < 0.05:
+                # cleared or reverted board
+                state = copy.deepcopy(EMPTYSTATE)
+                cells = CellIndex(state)
+                change()
+            else:
+                added = obj(
+                    obj_id,
+                    rng.randrange(7),
+                    rng.randrange(8),
+                    rng.choice(["nut", "washer", "hbridge"]),
+                )
+                cells.add(copy.deepcopy(added))
+                change("add", added)
+        return entries, states
+
+    def test_replay_reconstructs_states(self):
+        for seed in range(30):
+            rng = random.Random(seed)
+            entries, states = self.log_random_session(rng, rng.randrange(1, 10))
+            replayed = [copy.deepcopy(state) for _, state in replay(entries)]
+            self.assertEqual(len(replayed), len(states))
+            for expected, state in zip(states, replayed):
+                self.assertEqual(expected["objs"], state["objs"])
+                self.assertEqual(expected["objs_grid"], state["objs_grid"])
+
+    def test_rooms_are_replayed_separately(self):
+        rng = random.Random(0)
+        rooms = dict()
+        for room_id in (1, 2):
+            entries, states = self.log_random_session(rng, 3)
+            for entry in entries:
+                entry["room_id"] = room_id
+            rooms[room_id] = entries, states
+
+        # the entries of both rooms in one log, their seq numbers overlap
+        mixed = rooms[1][0] + rooms[2][0]
+        rng.shuffle(mixed)
+
+        split = room_logs(mixed)
+        self.assertEqual(sorted(split), [1, 2])
+        for room_id, (_, states) in rooms.items():
+            replayed = [copy.deepcopy(state) for _, state in replay(split[room_id])]
+            self.assertEqual(
+                [state["objs"] for state in replayed],
+                [state["objs"] for state in states],
+            )
+
+    def test_snapshot_every(self):
+        board_log = BoardLog(snapshot_every=2)
+        self.assertTrue(board_log.snapshot_due())
+        board_log.snapshot(EMPTYSTATE)
+        self.assertFalse(board_log.snapshot_due())
+        board_log.delta("add", obj(0, 0, 0))
+        board_log.delta("add", obj(1, 0, 0))
+        self.assertTrue(board_log.snapshot_due())
+        self.assertEqual(board_log.seq, 3)
+
+    def test_replay_of_full_state_logs(self):
+        state = copy.deepcopy(EMPTYSTATE)
+        CellIndex(state).add(obj(0, 1, 1))
+        entries = [
+            {"event": "target_board_log", "data": EMPTYSTATE},
+            {"event": "working_board_log", "data": state},
+        ]
+        replayed = list(replay(entries))
+        self.assertEqual(len(replayed), 1)
+        self.assertEqual(replayed[0][1], state)
+
+    def test_delta_before_snapshot(self):
+        entries = [
+            {
+                "event": "working_board_delta",
+                "data": {"seq": 1, "action": "add", "obj": obj(0, 0, 0)},
+            }
+        ]
+        with self.assertRaises(ValueError):
+            list(replay(entries))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+
+# University of Potsdam
+"""CellIndex test cases, checked against the boards golmi serves."""
+
+import asyncio
+import copy
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from coco.config import CONFIG, EMPTYSTATE, RULES
+from coco.golmi_client import CellIndex, QuadrupleClient, build_objs_grid
+from coco.utils import MoveEvaluator
+
+BLOCK_SIZE = 20
+SHAPES = {
+    "screw": [[1]],
+    "nut": [[1]],
+    "washer": [[1]],
+    "hbridge": [[1, 1]],
+    "vbridge": [[1], [1]],
+}
+
+
+def random_obj(rng, obj_id):
+    obj_type = rng.choice(sorted(SHAPES))
+    return {
+        "block_matrix": SHAPES[obj_type],
+        "color": ["red", "#ff0000", [255, 0, 0]],
+        "id_n": str(obj_id),
+        "rotation": 0,
+        "type": obj_type,
+        "x": float(rng.randrange(int(CONFIG["width"]))),
+        "y": float(rng.randrange(int(CONFIG["height"]))),
+        "gripped": None,
+    }
+
+
+class Answer:
+    def __init__(self, body):
+        self.ok = True
+        self.status = 200
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+class GolmiBoard(QuadrupleClient):
+    """Answers the cell requests from a state, as golmi does."""
+
+    def __init__(self, state):
+        super().__init__("room", "http://golmi", mirror=False)
+        self.state = state
+
+    async def request(self, method, path, **kwargs):
+        _, _, x, y, block_size = path.split("/")
+        x = int(float(x) // float(block_size))
+        y = int(float(y) // float(block_size))
+        stack = self.state["objs_grid"].get(f"{y}:{x}", list())
+        return Answer([self.state["objs"][obj_id] for obj_id in stack])
+
+
+class MirroredBoard(QuadrupleClient):
+    def __init__(self, state):
+        super().__init__("room", "http://golmi", mirror=True)
+        self.wizard_working.set_state(state)
+
+    async def request(self, method, path, **kwargs):
+        raise AssertionError(f"golmi was asked: {method} {path}")
+
+
+class TestCellIndex(unittest.TestCase):
+    def setUp(self):
+        self.evaluator = MoveEvaluator(RULES)
+
+    def random_board(self, rng, moves):
+        """Board built from random placements and removals."""
+        state = copy.deepcopy(EMPTYSTATE)
+        cells = CellIndex(state)
+        for obj_id in range(moves):
+            if cells.objs and rng.random() < 0.25:
+                obj_id = rng.choice(sorted(cells.objs))
+                if not cells.is_covered(obj_id):
+                    cells.remove(obj_id)
+                continue
+            obj = random_obj(rng, obj_id)
+            allowed, _ = self.evaluator.is_allowed_on(
+                obj, cells, int(obj["x"]), int(obj["y"])
+            )
+            if allowed:
+                cells.add(obj)
+        return state, cells
+
+    def test_grid_matches_rebuilt_grid(self):
+        for seed in range(50):
+            rng = random.Random(seed)
+            state, cells = self.random_board(rng, rng.randrange(1, 120))
+            self.assertEqual(state["objs_grid"], build_objs_grid(state["objs"]))
+            rebuilt = CellIndex(state).covered
+            self.assertEqual(
+                {obj_id: sorted(keys) for obj_id, keys in rebuilt.items()},
+                {obj_id: sorted(keys) for obj_id, keys in cells.covered.items()},
+            )
+            for x in range(int(CONFIG["width"])):
+                for y in range(int(CONFIG["height"])):
+                    self.assertEqual(
+                        cells.height(x, y), len(state["objs_grid"].get(f"{y}:{x}", []))
+                    )
+
+    def test_is_allowed_matches_golmi(self):
+        for seed in range(50):
+            rng = random.Random(seed)
+            state, _ = self.random_board(rng, rng.randrange(1, 120))
+            golmi = GolmiBoard(state)
+            mirrored = MirroredBoard(state)
+
+            for obj_id in range(40):
+                obj = random_obj(rng, 1000 + obj_id)
+                # also try cells on the edge and outside of the board
+                x = rng.randrange(-1, int(CONFIG["width"]) + 1) * BLOCK_SIZE
+                y = rng.randrange(-1, int(CONFIG["height"]) + 1) * BLOCK_SIZE
+                x += rng.randrange(BLOCK_SIZE)
+                y += rng.randrange(BLOCK_SIZE)
+
+                expected = asyncio.run(
+                    self.evaluator.is_allowed(obj, golmi, x, y, BLOCK_SIZE)
+                )
+                actual = asyncio.run(
+                    self.evaluator.is_allowed(obj, mirrored, x, y, BLOCK_SIZE)
+                )
+                self.assertEqual(expected, actual, (seed, obj, x, y))
+
+    def test_is_covered_matches_grid_scan(self):
+        for seed in range(50):
+            rng = random.Random(seed)
+            state, cells = self.random_board(rng, rng.randrange(1, 120))
+            for obj_id in state["objs"]:
+                covered = any(
+                    stack[-1] != obj_id
+                    for stack in state["objs_grid"].values()
+                    if obj_id in stack
+                )
+                self.assertEqual(covered, cells.is_covered(obj_id))
+
+    def test_undo_redo_keeps_index(self):
+        rng = random.Random(0)
+        state, cells = self.random_board(rng, 80)
+        before = copy.deepcopy(state)
+        for obj_id in list(state["objs"]):
+            if not cells.is_covered(obj_id):
+                obj = state["objs"][obj_id]
+                # undo and redo of an added object
+                cells.remove(obj_id)
+                cells.add(obj)
+        self.assertEqual(state["objs_grid"], build_objs_grid(state["objs"]))
+        self.assertEqual(sorted(state["objs"]), sorted(before["objs"]))
+
+
+class ResyncedBoard(QuadrupleClient):
+    """Answers state requests with golmi's state of the board."""
+
+    def __init__(self, state):
+        super().__init__("room", "http://golmi", mirror=True)
+        self.golmi_state = state
+        self.requests = list()
+
+    async def request(self, method, path, **kwargs):
+        self.requests.append(path)
+        return Answer(copy.deepcopy(self.golmi_state))
+
+
+class TestMirrorResync(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        self.state = copy.deepcopy(EMPTYSTATE)
+        cells = CellIndex(self.state)
+        for obj_id in range(10):
+            cells.add(random_obj(rng, obj_id))
+        self.board = ResyncedBoard(self.state)
+        self.client = self.board.wizard_working
+        self.client.set_state(EMPTYSTATE)
+
+    def test_merged_updates_resync_after_timeout(self):
+        # two changes, golmi sends one update for both
+        self.client.expect_update()
+        self.client.expect_update()
+        asyncio.run(self.client.on_update_state(self.state))
+        self.assertEqual(self.client.pending, 1)
+        self.assertEqual(
+            asyncio.run(self.board.get_state("wizard_working"))["objs"], {}
+        )
+
+        self.client.pending_since -= 60
+        state = asyncio.run(self.board.get_state("wizard_working"))
+        self.assertEqual(state["objs"], self.state["objs"])
+        self.assertEqual(self.board.requests, ["room_ww/state"])
+        self.assertEqual(self.client.pending, 0)
+
+        # updates are applied again
+        asyncio.run(self.client.on_update_state(EMPTYSTATE))
+        self.assertEqual(self.client.state["objs"], {})
+
+    def test_fetch_resyncs(self):
+        self.client.expect_update()
+        asyncio.run(self.board.fetch_state("wizard_working"))
+        self.assertEqual(self.client.pending, 0)
+        self.assertEqual(self.client.state["objs"], self.state["objs"])
+        self.assertFalse(self.client.stale)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+
+# University of Potsdam
+"""compare_boards and BoardFingerprint test cases."""
+
+import copy
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from coco.config import EMPTYSTATE
+from coco.golmi_client import BoardFingerprint, CellIndex
+from coco.utils import compare_boards
+
+COLORS = ["red", "blue", "green"]
+TYPES = ["screw", "nut", "washer"]
+
+
+def scanned_equality(board1, board2):
+    """Equality as compare_boards decided it by scanning objs_grid."""
+    if len(board1["objs_grid"]) != len(board2["objs_grid"]):
+        return False
+    for loc, shapes1 in board1["objs_grid"].items():
+        shapes2 = board2["objs_grid"].get(loc)
+        if shapes2 is None or len(shapes1) != len(shapes2):
+            return False
+        for shape1, shape2 in zip(shapes1, shapes2):
+            values1, values2 = board1["objs"][shape1], board2["objs"][shape2]
+            if (values1["type"], values1["color"][0]) != (
+                values2["type"],
+                values2["color"][0],
+            ):
+                return False
+    return True
+
+
+def random_board(rng, size, objs):
+    state = copy.deepcopy(EMPTYSTATE)
+    cells = CellIndex(state)
+    for obj_id in range(objs):
+        shape = rng.choice([[[1]], [[1]], [[1, 1]], [[1], [1]]])
+        cells.add(
+            {
+                "block_matrix": shape,
+                "color": [rng.choice(COLORS), "#000000", [0, 0, 0]],
+                "id_n": str(obj_id),
+                "rotation": 0,
+                "type": rng.choice(TYPES),
+                "x": float(rng.randrange(size - 1)),
+                "y": float(rng.randrange(size - 1)),
+            }
+        )
+    return state, cells
+
+
+class TestCompareBoards(unittest.TestCase):
+    def test_matches_scanned_equality(self):
+        for seed in range(200):
+            rng = random.Random(seed)
+            size = rng.choice([2, 3, 4])
+            board1, _ = random_board(rng, size, rng.randrange(6))
+            board2, _ = random_board(rng, size, rng.randrange(6))
+            equal, _ = compare_boards(board1, board2)
+            self.assertEqual(equal, scanned_equality(board1, board2))
+
+    def test_object_ids_do_not_matter(self):
+        board, _ = random_board(random.Random(0), 8, 40)
+        renamed = copy.deepcopy(EMPTYSTATE)
+        cells = CellIndex(renamed)
+        for obj in board["objs"].values():
+            cells.add({**obj, "id_n": str(1000 + int(obj["id_n"]))})
+        self.assertEqual(compare_boards(board, renamed), (True, "Equal boards"))
+
+    def test_incremental_fingerprint(self):
+        rng = random.Random(1)
+        state, cells = random_board(rng, 8, 60)
+        for obj_id in sorted(cells.objs, key=int)[::3]:
+            if not cells.is_covered(obj_id):
+                cells.remove(obj_id)
+        self.assertEqual(cells.fingerprint, BoardFingerprint.of(state))
+        self.assertEqual(cells.fingerprint.cells, BoardFingerprint.of(state).cells)
+
+    def test_reason_names_first_difference(self):
+        board, cells = random_board(random.Random(2), 8, 20)
+        target = copy.deepcopy(board)
+        top = cells.top(3, 3)
+        if top is not None and not cells.is_covered(top["id_n"]):
+            cells.remove(top["id_n"])
+        cells.add(
+            {
+                "block_matrix": [[1]],
+                "color": ["purple", "#000000", [0, 0, 0]],
+                "id_n": "999",
+                "rotation": 0,
+                "type": "nut",
+                "x": 3.0,
+                "y": 3.0,
+            }
+        )
+        equal, reason = compare_boards(board, target)
+        self.assertFalse(equal)
+        self.assertIn("3:3", reason)
+
+    def test_digests_without_differing_cells(self):
+        board, cells = random_board(random.Random(4), 8, 20)
+        fingerprint = BoardFingerprint.of(board)
+        fingerprint.digest += 1
+        self.assertEqual(
+            compare_boards(fingerprint, cells.fingerprint), (True, "Equal boards")
+        )
+
+    def test_reference_from_dataloader(self):
+        board, _ = random_board(random.Random(3), 8, 10)
+        reference = (copy.deepcopy(board), {"player": [], "wizard": []})
+        self.assertTrue(compare_boards(board, reference)[0])
+        self.assertEqual(compare_boards(board, dict()), (False, "No objs_grid"))
+
+
+if __name__ == "__main__":
+    unittest.main()
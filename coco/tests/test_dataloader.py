@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+# University of Potsdam
+"""SequenceIndex and Dataloader test cases."""
+
+from collections import defaultdict
+import json
+import os
+from pathlib import Path
+import random
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from coco.config import STATES
+from coco.dataloader import Dataloader, SequenceIndex
+
+
+def parsed_levels(sequence):
+    """Boards of a sequence file by level, parsed line by line."""
+    levels = defaultdict(list)
+    with sequence.open(encoding="utf-8") as infile:
+        for line in infile:
+            board = json.loads(line)
+            levels[int(board["level"])].append(board)
+    return dict(sorted(levels.items()))
+
+
+class TestSequenceIndex(unittest.TestCase):
+    def test_index_matches_parsed_boards(self):
+        index = SequenceIndex(STATES)
+        for sequence, levels in index.sequences().items():
+            expected = parsed_levels(sequence)
+            self.assertEqual(list(levels), list(expected))
+            for level, offsets in levels.items():
+                boards = [index.read(sequence, offset) for offset in offsets]
+                self.assertEqual(boards, expected[level])
+
+    def test_changed_file_is_indexed_again(self):
+        with tempfile.TemporaryDirectory() as directory:
+            sequence = Path(directory) / "states_seq.jsonl"
+            lines = [
+                json.dumps({"state": {"n": i}, "instructions": {}, "level": i % 2})
+                for i in range(4)
+            ]
+            sequence.write_text("\n".join(lines[:2]) + "\n")
+            index = SequenceIndex(Path(directory))
+            self.assertEqual(
+                {
+                    level: len(offsets)
+                    for level, offsets in index.levels(sequence).items()
+                },
+                {0: 1, 1: 1},
+            )
+
+            sequence.write_text("\n".join(lines) + "\n")
+            os.utime(sequence, ns=(0, 0))
+            index.sequences()
+            self.assertEqual(
+                [
+                    index.read(sequence, offset)["state"]
+                    for offset in index.levels(sequence)[1]
+                ],
+                [{"n": 1}, {"n": 3}],
+            )
+
+    def test_dataloader_samples_one_board_per_level(self):
+        random.seed(0)
+        boards = Dataloader(STATES)
+        sequence_levels = [len(parsed_levels(path)) for path in STATES.iterdir()]
+        self.assertIn(len(boards), sequence_levels)
+        for state, instructions in boards:
+            self.assertIn("objs", state)
+            self.assertIn("wizard", instructions)
+
+
+if __name__ == "__main__":
+    unittest.main()
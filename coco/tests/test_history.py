@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+# University of Potsdam
+"""ActionHistory test cases, checked against a list of all actions."""
+
+import json
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from coco.utils import ActionHistory, ActionRecord
+
+
+def obj(obj_id, x=0.0):
+    return {
+        "block_matrix": [[1]],
+        "color": ["red", "#ff0000", [255, 0, 0]],
+        "id_n": obj_id,
+        "rotation": 0,
+        "type": "nut",
+        "x": x,
+        "y": 0.0,
+    }
+
+
+def actions(history):
+    return [
+        (history.record(i).action, history.record(i).obj) for i in range(len(history))
+    ]
+
+
+class TestActionHistory(unittest.TestCase):
+    def test_same_actions_as_list(self):
+        for seed in range(50):
+            rng = random.Random(seed)
+            depth = rng.randrange(1, 20)
+            history = ActionHistory(depth)
+            expected = list()
+            position = 0
+            for _ in range(200):
+                choice = rng.random()
+                if choice < 0.5:
+                    item = (rng.choice(["add", "delete"]), obj(str(rng.randrange(5))))
+                    expected = expected[:position] + [item]
+                    expected = expected[-depth:]
+                    position = len(expected)
+                    history.add(*item)
+                elif choice < 0.75:
+                    record = history.undo()
+                    if position == 0:
+                        self.assertIsNone(record)
+                    else:
+                        position -= 1
+                        self.assertEqual(
+                            (record.action, record.obj), expected[position]
+                        )
+                else:
+                    record = history.redo()
+                    if position == len(expected):
+                        self.assertIsNone(record)
+                    else:
+                        self.assertEqual(
+                            (record.action, record.obj), expected[position]
+                        )
+                        position += 1
+
+                self.assertEqual(actions(history), expected)
+                self.assertEqual(history.position, position)
+                self.assertLessEqual(len(history.records), depth)
+                # only the objects of the kept actions are referenced
+                self.assertEqual(
+                    sum(count for _, count in history.objs.values()), len(expected)
+                )
+
+    def test_records_share_objects(self):
+        history = ActionHistory()
+        history.add("add", obj("0"))
+        history.add("delete", obj("0"))
+        history.add("add", obj("0", x=1.0))
+        self.assertIs(history.record(0).obj, history.record(1).obj)
+        self.assertIsNot(history.record(0).obj, history.record(2).obj)
+        self.assertEqual(len(history.objs), 2)
+
+    def test_changed_object_is_released(self):
+        history = ActionHistory(2)
+        moved = obj("0")
+        history.add("add", moved)
+        moved["x"] = 5.0
+        history.add("add", obj("1"))
+        history.add("add", obj("2"))
+        self.assertEqual(len(history.objs), 2)
+        self.assertEqual(repr(history.records[0]), "ActionRecord(add, nut)")
+
+        history.clear()
+        history.add("add", obj("0"))
+        history.undo()
+        history.add("add", obj("1"))
+        self.assertEqual(len(history.objs), 1)
+
+    def test_released_record_repr(self):
+        history = ActionHistory()
+        history.add("add", obj("0"))
+        history.undo()
+        history.add("add", obj("1"))
+        # the undone record was released and is reused
+        self.assertEqual(repr(ActionRecord()), "ActionRecord(None, None)")
+        self.assertEqual(repr(history.record(0)), "ActionRecord(add, nut)")
+
+    def test_json(self):
+        history = ActionHistory(4)
+        for i in range(6):
+            history.add("add", obj(str(i % 3)))
+        history.undo()
+        data = json.loads(json.dumps(history.to_json()))
+        self.assertEqual(len(data["objs"]), 3)
+        self.assertEqual(data["position"], 3)
+
+        restored = ActionHistory.from_json(data)
+        self.assertEqual(actions(restored), actions(history))
+        self.assertEqual(restored.redo().obj, obj("2"))
+
+    def test_clear(self):
+        history = ActionHistory()
+        history.add("add", obj("0"))
+        history.clear()
+        self.assertIsNone(history.last())
+        self.assertIsNone(history.redo())
+        self.assertEqual(history.objs, dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
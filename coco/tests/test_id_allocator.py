@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+# University of Potsdam
+"""IdAllocator test cases, checked against the former id choices."""
+
+import asyncio
+import copy
+import os
+import random
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from coco.config import EMPTYSTATE
+from coco.golmi_client import CellIndex, IdAllocator
+from coco.utils import new_obj_name, next_obj_name, smallest_free_id
+
+
+def sorted_obj_name(state):
+    """new_obj_name before the allocator."""
+    objs = [int(i) for i in state["objs"].keys()]
+    objs.sort()
+
+    if not objs:
+        return "0"
+
+    highest = objs[-1]
+    possible = set(range(highest + 2))
+    new_ids = list(possible - set(objs))
+    new_ids.sort()
+
+    return str(new_ids[0])
+
+
+def sorted_gripper_id(grippers):
+    """Id of a new cell gripper before the allocator."""
+    taken = [int(i.split("_")[-1]) for i in grippers]
+    taken.sort()
+
+    if not taken:
+        return 0
+    highest = taken[-1]
+    possible = set(range(highest + 2))
+    new_ids = list(possible - set(taken))
+    new_ids.sort()
+    return new_ids[0]
+
+
+def obj(obj_id, rng):
+    return {
+        "block_matrix": [[1]],
+        "color": ["red", "#ff0000", [255, 0, 0]],
+        "id_n": obj_id,
+        "rotation": 0,
+        "type": "nut",
+        "x": float(rng.randrange(8)),
+        "y": float(rng.randrange(8)),
+    }
+
+
+class StateClient:
+    """Counts the states requested from golmi."""
+
+    def __init__(self, state):
+        self.state = state
+        self.cells = None
+        self.requests = 0
+
+    def get_cell_index(self, board):
+        return self.cells
+
+    async def get_state(self, board):
+        self.requests += 1
+        return copy.deepcopy(self.state)
+
+
+class TestIdAllocator(unittest.TestCase):
+    def test_same_ids_as_sorting(self):
+        for seed in range(100):
+            rng = random.Random(seed)
+            state = copy.deepcopy(EMPTYSTATE)
+            cells = CellIndex(state)
+            for _ in range(rng.randrange(1, 200)):
+                expected = sorted_obj_name(state)
+                self.assertEqual(new_obj_name(state), expected)
+                self.assertEqual(new_obj_name(state, cells), expected)
+
+                if cells.objs and rng.random() < 0.4:
+                    cells.remove(rng.choice(sorted(cells.objs)))
+                elif rng.random() < 0.1:
+                    # objects of a loaded state keep their ids
+                    cells.add(obj(str(rng.randrange(300)), rng))
+                else:
+                    cells.add(obj(expected, rng))
+
+    def test_index_of_loaded_state(self):
+        rng = random.Random(0)
+        state = copy.deepcopy(EMPTYSTATE)
+        for obj_id in rng.sample(range(100), 60):
+            CellIndex(state).add(obj(str(obj_id), rng))
+        self.assertEqual(new_obj_name(state, CellIndex(state)), sorted_obj_name(state))
+
+    def test_state_only_requested_without_index(self):
+        rng = random.Random(0)
+        state = copy.deepcopy(EMPTYSTATE)
+        for obj_id in rng.sample(range(100), 60):
+            CellIndex(state).add(obj(str(obj_id), rng))
+        client = StateClient(state)
+
+        client.cells = CellIndex(state)
+        name = asyncio.run(next_obj_name(client, "wizard_working"))
+        self.assertEqual(name, sorted_obj_name(state))
+        self.assertEqual(client.requests, 0)
+
+        client.cells = None
+        name = asyncio.run(next_obj_name(client, "wizard_working"))
+        self.assertEqual(name, sorted_obj_name(state))
+        self.assertEqual(client.requests, 1)
+
+    def test_same_gripper_ids_as_sorting(self):
+        for seed in range(100):
+            rng = random.Random(seed)
+            grippers = {
+                f"cell_{i}": dict() for i in rng.sample(range(20), rng.randrange(15))
+            }
+            self.assertEqual(
+                smallest_free_id(int(i.split("_")[-1]) for i in grippers),
+                sorted_gripper_id(grippers),
+            )
+
+    def test_allocate_and_release(self):
+        ids = IdAllocator([0, 1, 2, 5])
+        self.assertEqual([ids.allocate() for _ in range(3)], [3, 4, 6])
+        ids.release(1)
+        ids.release(4)
+        self.assertEqual(ids.allocate(), 1)
+        ids.reserve(4)
+        ids.release(4)
+        ids.release(4)
+        self.assertEqual([ids.allocate() for _ in range(2)], [4, 7])
+
+
+if __name__ == "__main__":
+    unittest.main()
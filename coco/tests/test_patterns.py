@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+# University of Potsdam
+"""Pattern and PatternDetector test cases."""
+
+import copy
+import json
+import os
+from pathlib import Path
+import random
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from coco.config import EMPTYSTATE
+from coco.golmi_client import CellIndex, object_cells
+from coco.utils import PATTERNS, PatternDetector
+
+PATTERN_FILES = Path(f"{ROOT}/coco/data/patterns")
+
+
+def pattern_objs(name, dx=0, dy=0):
+    """Objects of a pattern file, moved and in their stacking order."""
+    state = json.loads((PATTERN_FILES / f"{name}.json").read_text())
+    level = dict()
+    for stack in state["objs_grid"].values():
+        for height, obj_id in enumerate(stack):
+            level[obj_id] = height
+    order = sorted(level, key=lambda obj_id: (level[obj_id], obj_id))
+    objs = list()
+    for obj_id in order:
+        obj = copy.deepcopy(state["objs"][obj_id])
+        obj["x"] += dx
+        obj["y"] += dy
+        objs.append(obj)
+    return objs
+
+
+def board(objs):
+    state = copy.deepcopy(EMPTYSTATE)
+    cells = CellIndex(state)
+    for i, obj in enumerate(objs):
+        cells.add({**obj, "id_n": str(i)})
+    return state, cells
+
+
+class TestPattern(unittest.TestCase):
+    def test_patterns_match_their_files(self):
+        self.assertEqual(
+            [pattern.name for pattern in PATTERNS],
+            ["type-1 connector", "type-2 bridge", "type-3 screw"],
+        )
+        for pattern in PATTERNS:
+            state, _ = board(pattern_objs(pattern.name, dx=-1, dy=2))
+            matches = [(other.name, len(other.detect(state))) for other in PATTERNS]
+            self.assertIn((pattern.name, 1), matches)
+            ids = list(pattern.detect(state).values())[0]
+            self.assertEqual(sorted(ids), sorted(state["objs"]))
+
+    def test_incomplete_or_extended_pattern(self):
+        for pattern in PATTERNS:
+            objs = pattern_objs(pattern.name)
+            state, _ = board(objs[:-1])
+            self.assertEqual(pattern.detect(state), dict())
+
+            # another piece on top is no longer the pattern
+            state, _ = board(objs + [{**objs[0], "type": "nut"}])
+            self.assertEqual(pattern.detect(state), dict())
+
+    def test_pieces_must_be_shared(self):
+        # two separate screws next to each other are not a connector
+        connector = PATTERNS[0]
+        objs = pattern_objs(connector.name)
+        bridge = objs[0]
+        halves = [
+            {**bridge, "block_matrix": [[1]]},
+            {**bridge, "block_matrix": [[1]], "x": bridge["x"] + 1},
+        ]
+        state, _ = board(halves + objs[1:])
+        self.assertEqual(connector.detect(state), dict())
+
+
+class TestPatternDetector(unittest.TestCase):
+    def test_update_matches_scan(self):
+        pieces = list()
+        for pattern in PATTERNS:
+            pieces.extend(pattern_objs(pattern.name))
+
+        for seed in range(30):
+            rng = random.Random(seed)
+            state = copy.deepcopy(EMPTYSTATE)
+            cells = CellIndex(state)
+            detector = PatternDetector(PATTERNS)
+            next_id = 0
+            for _ in range(150):
+                if cells.objs and rng.random() < 0.3:
+                    obj = cells.objs[rng.choice(sorted(cells.objs))]
+                    cells.remove(obj["id_n"])
+                else:
+                    obj = {
+                        **rng.choice(pieces),
+                        "id_n": str(next_id),
+                        "x": float(rng.randrange(4)),
+                        "y": float(rng.randrange(4)),
+                    }
+                    next_id += 1
+                    cells.add(obj)
+
+                completed = detector.update(state, object_cells(obj))
+                found = dict(detector.found)
+                new = detector.scan(state)
+                self.assertEqual(found, detector.found)
+                self.assertEqual(new, list())
+                if obj["id_n"] in cells.objs:
+                    # a placed piece is part of the patterns it completes
+                    for name, ids in completed:
+                        self.assertIn(obj["id_n"], ids)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+# University of Potsdam
+"""TypingIndicator test cases."""
+
+import asyncio
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from coco.utils import TypingIndicator
+from templates import AsyncTimer
+
+DELAY = 0.05
+
+
+class TestTypingIndicator(unittest.TestCase):
+    def run_clicks(self, gaps):
+        """Typing events sent for clicks `gaps` seconds apart."""
+        events = list()
+
+        async def send(value, room_id):
+            events.append((value, room_id))
+
+        async def clicks():
+            typing = TypingIndicator(send, args=["room"], delay=DELAY)
+            for gap in gaps:
+                await asyncio.sleep(gap)
+                await typing.click()
+            await asyncio.sleep(DELAY * 3)
+            return typing
+
+        typing = asyncio.run(clicks())
+        return events, typing.stats
+
+    def test_burst_sends_one_start_and_stop(self):
+        events, stats = self.run_clicks([0] + [DELAY / 5] * 20)
+        self.assertEqual(events, [(True, "room"), (False, "room")])
+        self.assertEqual(stats, {"clicks": 21, "start": 1, "stop": 1})
+
+    def test_pause_starts_new_burst(self):
+        events, stats = self.run_clicks([0, DELAY / 5, DELAY * 3, DELAY / 5])
+        self.assertEqual([value for value, _ in events], [True, False, True, False])
+        self.assertEqual(stats["clicks"], 4)
+
+    def test_stop_is_delayed_by_last_click(self):
+        stopped = list()
+
+        async def send(value):
+            stopped.append((value, loop.time()))
+
+        async def clicks():
+            typing = TypingIndicator(send, delay=DELAY)
+            for _ in range(5):
+                await typing.click()
+                last = loop.time()
+                await asyncio.sleep(DELAY / 2)
+            await asyncio.sleep(DELAY * 2)
+            return last
+
+        loop = asyncio.new_event_loop()
+        last = loop.run_until_complete(clicks())
+        loop.close()
+        self.assertEqual([value for value, _ in stopped], [True, False])
+        self.assertGreaterEqual(stopped[1][1], last + DELAY * 0.9)
+
+    def test_stop_is_sent_once(self):
+        events = list()
+
+        async def send(value):
+            events.append(value)
+
+        async def clicks():
+            typing = TypingIndicator(send, delay=DELAY)
+            await typing.click()
+            # a stop scheduled twice only ends the burst once
+            await typing.stop()
+            await asyncio.sleep(DELAY * 3)
+            return typing
+
+        typing = asyncio.run(clicks())
+        self.assertEqual(events, [True, False])
+        self.assertEqual(typing.stats["stop"], 1)
+
+
+class TestAsyncTimer(unittest.TestCase):
+    def test_restart_replaces_pending_call(self):
+        calls = list()
+
+        async def run():
+            timer = AsyncTimer(DELAY, calls.append, args=["fired"])
+            timer.start()
+            timer.start()
+            await asyncio.sleep(DELAY * 3)
+
+        asyncio.run(run())
+        self.assertEqual(calls, ["fired"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,14 @@
-import copy
+from collections import Counter
 import json
 import itertools
 from pathlib import Path
-from threading import Timer
+
+from templates import AsyncTimer
 
 from .config import *
 from .golmi_client import *
 from .dataloader import Dataloader
+from .board_log import BoardLog
 
 
 class RoomTimer:
@@ -14,11 +16,11 @@ class RoomTimer:
         self.function = function
         self.room_id = room_id
         self.start_timer()
-        self.typing_timer = None
+        self.typing = None
         self.left_room = dict()
 
     def start_timer(self):
-        self.timer = Timer(
+        self.timer = AsyncTimer(
             TIMEOUT_TIMER * 60, self.function, args=[self.room_id, "timeout"]
         )
         self.timer.start()
@@ -33,7 +35,8 @@ class RoomTimer:
 
     def cancel_all_timers(self):
         self.timer.cancel()
-        self.typing_timer.cancel()
+        if self.typing is not None:
+            self.typing.cancel()
         for timer in self.left_room.values():
             timer.cancel()
 
@@ -43,50 +46,199 @@ class RoomTimer:
             self.left_room[user].cancel()
 
     def user_left(self, user):
-        self.left_room[user] = Timer(
+        self.left_room[user] = AsyncTimer(
             LEAVE_TIMER * 60, self.function, args=[self.room_id, "user_left"]
         )
         self.left_room[user].start()
 
 
-class ActionNode:
-    """Base class for the linked list representing
-    the action history, every action performed by the wizard
-    if saved as a node in this linked list to allow for
-    the redo and undo button
+class TypingIndicator:
+    """Typing state of the wizard in a room: a burst of clicks sends
+    one start event and, `delay` seconds after its last click, one
+    stop event. A single timer is reset by the clicks of a burst.
     """
 
-    def __init__(self, action, obj):
-        self.action = action
-        self.obj = obj
-        self.parent = None
-        self.child = None
+    def __init__(self, function, args=None, delay=TYPING_TIMER):
+        """
+        :param function: Coroutine function sending a typing event,
+            called with True or False followed by `args`
+        :type function: callable
+        :param delay: Seconds without a click until the stop event
+        :type delay: float
+        """
+        self.function = function
+        self.args = args if args is not None else []
+        self.timer = AsyncTimer(delay, self.stop)
+        self.typing = False
+        # clicks received and typing events sent
+        self.stats = Counter()
+
+    async def click(self):
+        self.stats["clicks"] += 1
+        if self.typing:
+            self.timer.reset()
+            return
+
+        self.typing = True
+        self.timer.start()
+        self.stats["start"] += 1
+        await self.function(True, *self.args)
 
-    def __str__(self):
-        return f"Node({self.action}, {self.obj['type']})"
+    async def stop(self):
+        if not self.typing:
+            return
 
-    def __repr__(self):
-        return self.__str__()
+        self.typing = False
+        self.stats["stop"] += 1
+        await self.function(False, *self.args)
 
-    def next_state(self):
-        if self.child is not None:
-            return self.child
-        return None
+    def cancel(self):
+        self.timer.cancel()
 
-    def previous_state(self):
-        if self.parent is not None:
-            return self.parent
-        return None
 
-    def add_action(self, action, object):
-        new_node = ActionNode(action, object)
-        new_node.parent = self
-        self.child = new_node
-        return new_node
+class ActionRecord:
+    """An action of the wizard in the `ActionHistory`"""
+
+    __slots__ = ("action", "obj", "key")
+
+    def __init__(self, action=None, obj=None, key=None):
+        self.action = action
+        self.obj = obj
+        # `obj_key` of the object when it was added to the history
+        self.key = key
+
+    def __repr__(self):
+        obj_type = self.obj["type"] if self.obj is not None else None
+        return f"ActionRecord({self.action}, {obj_type})"
+
+
+def obj_key(obj):
+    """Content of an object that identifies it in the action history"""
+    color = obj.get("color")
+    return (
+        obj["id_n"],
+        obj.get("type"),
+        color[0] if color else None,
+        obj.get("x"),
+        obj.get("y"),
+        obj.get("rotation"),
+    )
+
+
+class ActionHistory:
+    """History of the actions performed by the wizard to allow for
+    the redo and undo button. The last `depth` actions are kept in a
+    ring of records that are reused once it is full, records of the
+    same object share a single copy of it.
+    """
+
+    def __init__(self, depth=HISTORY_DEPTH):
+        """
+        :param depth: Number of actions that can be undone
+        :type depth: int
+        """
+        self.depth = depth
+        self.records = list()
+        self.start = 0  # ring index of the oldest action
+        self.size = 0  # actions in the ring
+        self.position = 0  # actions done, the rest can be redone
+        # object key: [object, number of records]
+        self.objs = dict()
+
+    def __len__(self):
+        return self.size
+
+    def record(self, index):
+        return self.records[(self.start + index) % self.depth]
+
+    def intern(self, key, obj):
+        entry = self.objs.get(key)
+        if entry is None:
+            entry = self.objs[key] = [obj, 0]
+        entry[1] += 1
+        return entry[0]
+
+    def release(self, record):
+        # the object may have changed since, its key is kept
+        entry = self.objs[record.key]
+        entry[1] -= 1
+        if entry[1] == 0:
+            self.objs.pop(record.key)
+        record.action = record.obj = record.key = None
+
+    def add(self, action, obj):
+        """Register a new action, the undone actions can
+        no longer be redone
+        :param action: "add" or "delete"
+        :type action: str
+        """
+        for index in range(self.position, self.size):
+            self.release(self.record(index))
+        self.size = self.position
+
+        if self.size == self.depth:
+            # forget the oldest action
+            self.release(self.record(0))
+            self.start = (self.start + 1) % self.depth
+            self.size -= 1
+            self.position -= 1
+
+        if len(self.records) < self.depth:
+            self.records.append(ActionRecord())
+        record = self.record(self.size)
+        record.action = action
+        record.key = obj_key(obj)
+        record.obj = self.intern(record.key, obj)
+        self.size += 1
+        self.position += 1
+
+    def last(self):
+        """The action an undo reverts, None if there is none"""
+        if self.position == 0:
+            return None
+        return self.record(self.position - 1)
+
+    def undo(self):
+        """Move back before the last action and return it"""
+        record = self.last()
+        if record is not None:
+            self.position -= 1
+        return record
+
+    def redo(self):
+        """Move forward after the next undone action and return it"""
+        if self.position == self.size:
+            return None
+        self.position += 1
+        return self.record(self.position - 1)
+
+    def clear(self):
+        self.records = list()
+        self.start = self.size = self.position = 0
+        self.objs = dict()
+
+    def to_json(self):
+        """Actions for the logs, objects are referenced by their index
+        in `objs`
+        """
+        refs = dict()
+        objs = list()
+        actions = list()
+        for index in range(self.size):
+            record = self.record(index)
+            if record.key not in refs:
+                refs[record.key] = len(objs)
+                objs.append(record.obj)
+            actions.append([record.action, refs[record.key]])
+        return {"position": self.position, "objs": objs, "actions": actions}
 
     @classmethod
-    def new_tree(cls):
-        return cls("root", None)
+    def from_json(cls, data, depth=HISTORY_DEPTH):
+        history = cls(max(depth, len(data["actions"])))
+        for action, ref in data["actions"]:
+            history.add(action, data["objs"][ref])
+        history.position = data["position"]
+        return history
 
 
 class Session:
@@ -95,7 +247,10 @@ class Session:
         self.submited_survey = dict()
         self.timer = None
         self.golmi_client = None
-        self.current_action = ActionNode.new_tree()
+        self.history = ActionHistory()
+        self.board_log = BoardLog()
+        self.patterns = PatternDetector(PATTERNS)
+        self.target_fingerprint = None
         self.states = Dataloader(STATES)
         self.checkpoint = EMPTYSTATE
         self.game_over = False
@@ -107,9 +262,9 @@ class Session:
         self.players.append(user)
         self.submited_survey[user["id"]] = False
 
-    def close(self):
+    async def close(self):
         try:
-            self.golmi_client.disconnect()
+            await self.golmi_client.disconnect()
             self.timer.cancel_all_timers()
         except:
             pass
@@ -121,9 +276,9 @@ class SessionManager(dict):
     def create_session(self, room_id):
         self[room_id] = Session()
 
-    def clear_session(self, room_id):
+    async def clear_session(self, room_id):
         if room_id in self:
-            self[room_id].close()
+            await self[room_id].close()
             self.pop(room_id)
 
 
@@ -151,17 +306,22 @@ class MoveEvaluator:
 
         return True, ""
 
-    def is_allowed(self, this_obj, client, x, y, block_size):
+    async def is_allowed(self, this_obj, client, x, y, block_size):
         # coordinates must be on the board
         board_x = x // block_size
         board_y = y // block_size
 
+        # the local copy of the board answers without asking golmi
+        cells = client.get_cell_index("wizard_working")
+        if cells is not None:
+            return self.is_allowed_on(this_obj, cells, board_x, board_y)
+
         allowed, reason = self.on_board(board_x, board_y)
         if allowed is False:
             return False, reason
 
         # last item on cell cannot be a screw
-        cell_objs = client.get_entire_cell(
+        cell_objs = await client.get_entire_cell(
             x=x, y=y, block_size=block_size, board="wizard_working"
         )
 
@@ -188,7 +348,7 @@ class MoveEvaluator:
             if allowed is False:
                 return False, reason
 
-            other_cell_objs = client.get_entire_cell(
+            other_cell_objs = await client.get_entire_cell(
                 x=x, y=y, block_size=block_size, board="wizard_working"
             )
             other_cell_height = len(other_cell_objs)
@@ -205,177 +365,269 @@ class MoveEvaluator:
                     return False, reason
         return True, ""
 
+    def is_allowed_on(self, this_obj, cells, x, y):
+        """Same rules as `is_allowed` for a cell given in board
+        coordinates, looked up in a `CellIndex`."""
+        allowed, reason = self.on_board(x, y)
+        if allowed is False:
+            return False, reason
+
+        top_obj = cells.top(x, y)
+        if top_obj is not None:
+            valid_placement, reason = self.can_place_on_top(this_obj, top_obj)
+            if valid_placement is False:
+                return False, reason
+
+        if "bridge" in this_obj["type"]:
+            if this_obj["type"] == "hbridge":
+                other_x, other_y = x + 1, y
+            elif this_obj["type"] == "vbridge":
+                other_x, other_y = x, y + 1
+
+            allowed, reason = self.on_board(other_x, other_y)
+            if allowed is False:
+                return False, reason
 
-def new_obj_name(state):
+            if cells.height(x, y) != cells.height(other_x, other_y):
+                return False, "a bridge must be positioned on cells of the same height"
+
+            other_top = cells.top(other_x, other_y)
+            if other_top is not None:
+                valid_placement, reason = self.can_place_on_top(this_obj, other_top)
+                if valid_placement is False:
+                    return False, reason
+        return True, ""
+
+
+def smallest_free_id(used):
+    """Smallest non-negative integer not in `used`."""
+    used = set(used)
+    return next(i for i in itertools.count() if i not in used)
+
+
+def new_obj_name(state, cells=None):
     """
     given a state this function finds a unique numerical
-    name for a new object
+    name for a new object, with the `CellIndex` of the board
+    its id allocator answers without looking at every object
     """
-    # obtain used ids
-    objs = [int(i) for i in state["objs"].keys()]
-    objs.sort()
+    if cells is not None:
+        return str(cells.ids.peek())
+
+    return str(smallest_free_id(int(i) for i in state["objs"].keys()))
 
-    if not objs:
-        return "0"
 
-    # calculate next possible id
-    highest = objs[-1]
-    possible = set(range(highest + 2))
-    new_ids = list(possible - set(objs))
-    new_ids.sort()
+async def next_obj_name(client, board):
+    """
+    new_obj_name for a board of the golmi rooms, its state is
+    only requested when there is no local `CellIndex` to ask
+    """
+    cells = client.get_cell_index(board)
+    if cells is not None:
+        return new_obj_name(None, cells)
 
-    return str(new_ids[0])
+    return new_obj_name(await client.get_state(board))
 
 
-# PATTERN DETECTION IS CURRENTLY NOT USED!!
-# leaving this code here for future reference
-class Pattern(dict):
+class Pattern:
     """
     this class is a representation of a given
-    pattern on a golmi board and is able to detect
-    the pattern on any other golmi board with the
-    detect method
+    pattern on a golmi board, compiled into the
+    stacks of its cells relative to its first cell,
+    and is able to detect the pattern on any other
+    golmi board with the match and detect methods
     """
 
-    n_elements = 0
-    name = ""
+    def __init__(self, name, state):
+        """
+        :param name: Name of the pattern
+        :type name: str
+        :param state: golmi state containing the pattern
+        :type state: dict
+        """
+        self.name = name
+        coordinates = sorted(
+            (tuple(map(int, key.split(":"))), stack)
+            for key, stack in state["objs_grid"].items()
+        )
+        (anchor_y, anchor_x), _ = coordinates[0]
+
+        # pattern objects are referred to by their position in refs,
+        # objects covering several cells have the same ref on each
+        refs = dict()
+        self.signature = list()
+        for (y, x), stack in coordinates:
+            self.signature.append(
+                (
+                    y - anchor_y,
+                    x - anchor_x,
+                    tuple(state["objs"][i]["type"] for i in stack),
+                    tuple(refs.setdefault(i, len(refs)) for i in stack),
+                )
+            )
+        self.n_elements = len(refs)
 
     @property
     def cells(self):
-        return len(self.keys())
-
-    def detect(self, this_cell, board):
-        coor, cell = this_cell
-        objs = [board["objs"][i]["type"] for i in cell]
-        if objs in self.values():
-            for coordinate, part in self.items():
-                if objs == part:
-                    # there is a match, try to match the other cells from the pattern
-                    rest_pattern = copy.deepcopy(self)
-                    rest_pattern.pop(coordinate)
-
-                    if not rest_pattern:
-                        # pattern only has one cell
-                        return True
-                    else:
-                        # collect the other cells from the board
-                        # that could complete this pattern
-                        other_board_cells = dict()
-                        for other_c in rest_pattern.keys():
-                            # obtain the other coordinates from this pattern
-                            other_x, other_y = map(int, other_c.split(":"))
-
-                            # coordinate of this cell
-                            this_x, this_y = map(int, coordinate.split(":"))
-
-                            # calculate relative position of other cell to current cell
-                            movement = (this_x - other_x, this_y - other_y)
-
-                            # index other cells on the board
-                            board_x, board_y = map(int, coor.split(":"))
-                            other_board_coor = (
-                                f"{board_x + movement[0]}:{board_y + movement[1]}"
-                            )
-
-                            if other_board_coor in board["objs_grid"]:
-                                # get the name of the bjects on the other cell
-                                other_board_cells[other_board_coor] = board[
-                                    "objs_grid"
-                                ][other_board_coor]
-
-                        board_pattern_named = {coor: objs}
-                        board_pattern_ids = {coor: cell}
-
-                        # convert other cells from the board from obj_ids to object name
-                        for key, value in other_board_cells.items():
-                            board_pattern_named[key] = [
-                                board["objs"][i]["type"] for i in value
-                            ]
-                            board_pattern_ids[key] = value
-
-                        if len(board_pattern_named.values()) == len(self.values()):
-                            board_pieces = list(board_pattern_named.values())
-                            pattern_pieces = list(self.values())
-                            board_pieces.sort()
-                            pattern_pieces.sort()
-
-                            if pattern_pieces == board_pieces:
-                                # we have the same object names, make sure the pattern on the board
-                                # is composed by the same number of objects of this pattern
-                                flatten = itertools.chain.from_iterable(
-                                    board_pattern_ids.values()
-                                )
-                                n = len(set([i for i in flatten]))
-                                if n == self.n_elements:
-                                    return True
-        return False
+        return len(self.signature)
+
+    def match(self, board, y, x):
+        """Ids of the objects forming this pattern with its first
+        cell on y:x of the board, None if there is no match
+        """
+        ids = [None] * self.n_elements
+        for dy, dx, types, refs in self.signature:
+            stack = board["objs_grid"].get(f"{y + dy}:{x + dx}")
+            if stack is None or len(stack) != len(types):
+                return None
+            for obj_id, obj_type, ref in zip(stack, types, refs):
+                if board["objs"][obj_id]["type"] != obj_type:
+                    return None
+                if ids[ref] is None:
+                    ids[ref] = obj_id
+                elif ids[ref] != obj_id:
+                    return None
+
+        # the same object can not stand for two objects of the pattern
+        if len(set(ids)) != self.n_elements:
+            return None
+        return ids
+
+    def detect(self, board):
+        """Every match of this pattern on a board"""
+        first_types = self.signature[0][2]
+        matches = dict()
+        for key, stack in board["objs_grid"].items():
+            if len(stack) != len(first_types):
+                continue
+            y, x = map(int, key.split(":"))
+            ids = self.match(board, y, x)
+            if ids is not None:
+                matches[(y, x)] = ids
+        return matches
 
 
 def get_patterns():
     patterns = list()
-    for filename in Path(f"{ROOT}/data/patterns").iterdir():
+    for filename in sorted(Path(f"{ROOT}/data/patterns").iterdir()):
         if filename.suffix == ".json":
             pattern_dict = json.loads(filename.read_text())
+            patterns.append(Pattern(filename.stem, pattern_dict))
 
-            this_pattern = Pattern()
-            for position, objs in pattern_dict["objs_grid"].items():
-                this_pattern[position] = [pattern_dict["objs"][i]["type"] for i in objs]
+    return patterns
 
-            flatten = itertools.chain.from_iterable(pattern_dict["objs_grid"].values())
-            n = len(set([i for i in flatten]))
-            this_pattern.n_elements = n
-            this_pattern.name = filename.stem
 
-            patterns.append(this_pattern)
+PATTERNS = get_patterns()
 
-    return patterns
+
+class PatternDetector:
+    """Patterns completed on a board, updated incrementally:
+    after a change only the positions of the patterns that
+    cover a changed cell are matched again
+    """
+
+    def __init__(self, patterns):
+        self.patterns = patterns
+        # (pattern name, y, x): ids of the objects forming it
+        self.found = dict()
+
+    def scan(self, board):
+        """Match all the patterns on the whole board, returns the
+        patterns that were not completed before
+        """
+        found = dict()
+        for pattern in self.patterns:
+            for (y, x), ids in pattern.detect(board).items():
+                found[(pattern.name, y, x)] = ids
+        completed = [
+            (key[0], ids) for key, ids in found.items() if self.found.get(key) != ids
+        ]
+        self.found = found
+        return completed
+
+    def update(self, board, keys):
+        """Match the patterns covering changed cells again, returns
+        the patterns completed by the change
+        :param keys: objs_grid keys of the changed cells
+        :type keys: iterable
+        """
+        candidates = dict()
+        for key in keys:
+            y, x = map(int, key.split(":"))
+            types = tuple(
+                board["objs"][obj_id]["type"]
+                for obj_id in board["objs_grid"].get(key, ())
+            )
+            for pattern in self.patterns:
+                for dy, dx, pattern_types, _ in pattern.signature:
+                    found_key = (pattern.name, y - dy, x - dx)
+                    # the pattern may cover this cell here, or did before
+                    if pattern_types == types or found_key in self.found:
+                        candidates[found_key] = pattern
+
+        completed = list()
+        for found_key, pattern in candidates.items():
+            ids = pattern.match(board, *found_key[1:])
+            if ids is None:
+                self.found.pop(found_key, None)
+            elif self.found.get(found_key) != ids:
+                self.found[found_key] = ids
+                completed.append((pattern.name, ids))
+        return completed
+
+
+def board_fingerprint(board):
+    """`BoardFingerprint` of a state, of the state in a (state,
+    instructions) pair of the dataloader or None if there is no state."""
+    if isinstance(board, BoardFingerprint):
+        return board
+
+    if isinstance(board, (list, tuple)):
+        for item in board:
+            if isinstance(item, dict) and "grid_config" in item:
+                board = item
+                break
+
+    if not isinstance(board, dict) or "objs_grid" not in board:
+        return None
+    return BoardFingerprint.of(board)
 
 
 def compare_boards(board1, board2):
     """
     Compare two boards and return True if they are the same, False otherwise.
+    Boards can be given as states or as their fingerprints, the reason
+    for different boards names the first differing location.
     """
 
     #board1 - refers to the working board (board of the wizard)
     #board2 - refers to the reference board (target board)
-    for state_dict in board2:
-        for item in state_dict:
-            if "grid_config" in item:
-                board2 = state_dict
-                break
-
-    # Check for the existence of 'objs_grid' in both boards
-    if "objs_grid" not in board1 or "objs_grid" not in board2:
+    fingerprint1 = board_fingerprint(board1)
+    fingerprint2 = board_fingerprint(board2)
+    if fingerprint1 is None or fingerprint2 is None:
         return False, "No objs_grid"
 
-    # Check if the number of locations is the same in both boards
-    if len(board1["objs_grid"]) != len(board2["objs_grid"]):
-        return False, "Different count of objs_grid"
-
-    for loc, shapes1 in board1["objs_grid"].items():
-        # Check if the location exists in both boards
-        shapes2 = board2["objs_grid"].get(loc)
-        if shapes2 is None:
-            return False, f"Location {loc} not available in board2"
-
-        # Check if the number of shapes is the same in the location
-        if len(shapes1) != len(shapes2):
+    if fingerprint1 == fingerprint2:
+        return True, "Equal boards"
+
+    diff = fingerprint1.diff(fingerprint2)
+    if not diff:
+        # different digests of the same stacks
+        return True, "Equal boards"
+
+    loc = min(diff)
+    shapes1, shapes2 = diff[loc]
+    if not shapes2:
+        return False, f"Location {loc} not available in board2"
+    if not shapes1:
+        return False, f"Location {loc} not available in board1"
+    if len(shapes1) != len(shapes2):
+        return False, f"Different count of objs in objs_grid for the location: {loc}"
+
+    for (type1, color1), (type2, color2) in zip(shapes1, shapes2):
+        if (type1, color1) != (type2, color2):
             return (
                 False,
-                f"Different count of objs in objs_grid for the location: {loc}",
+                f"Different type {type1, type2} or color {color1, color2} in location {loc}",
             )
-
-        for shape1, shape2 in zip(shapes1, shapes2):
-            values1, values2 = board1["objs"][shape1], board2["objs"][shape2]
-
-            # Check if the type and color of each shape are the same
-            if (values1["type"], values1["color"][0]) != (
-                values2["type"],
-                values2["color"][0],
-            ):
-                return (
-                    False,
-                    f'Different type {values1["type"], values2["type"]} or color {values1["color"][0], values2["color"][0]} in location {loc}',
-                )
-
-    return True, "Equal boards"
+    return False, "Boards differ"
@@ -1,19 +1,88 @@
 import argparse
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import os
+import threading
+import time
 
 import requests
+from requests.adapters import HTTPAdapter
 import socketio
 
+from templates import UserTaskCache
 
 LOG = logging.getLogger(__name__)
 
 
+class Matchmaker:
+    """Users waiting for a task, one first come, first served queue
+    per task.
+
+    Joining, leaving and forming a group take constant time. The
+    socket.io client handles events in parallel threads, so all
+    methods are guarded by a lock.
+    """
+
+    def __init__(self, history=1000):
+        """
+        :param history: Number of recent matches kept for the
+            time-to-match statistics.
+        :type history: int
+        """
+        # task id -> user id -> (room id, time of joining)
+        self.queues = defaultdict(OrderedDict)
+        self.lock = threading.Lock()
+        self.matched = 0
+        self.waited = deque(maxlen=history)
+
+    def join(self, user_id, task, room):
+        """Queue a user for a task.
+
+        :return: Pairs of user id and waiting room of the users
+            for a new task room, `None` if more users are needed.
+        :rtype: list
+        """
+        with self.lock:
+            queue = self.queues[task["id"]]
+            queue[user_id] = (room, time.monotonic())
+            if len(queue) < task["num_users"]:
+                return None
+
+            group = [queue.popitem(last=False) for _ in range(task["num_users"])]
+            now = time.monotonic()
+            self.matched += len(group)
+            self.waited.extend(now - joined for _, (_, joined) in group)
+        return [(user_id, room) for user_id, (room, _) in group]
+
+    def leave(self, user_id, task_id):
+        """Remove a user from the queue of a task, if queued."""
+        with self.lock:
+            self.queues[task_id].pop(user_id, None)
+
+    def depth(self):
+        """Number of waiting users per task."""
+        with self.lock:
+            return {task_id: len(queue) for task_id, queue in self.queues.items()}
+
+    def stats(self):
+        """Queue depths and seconds users waited for a match."""
+        with self.lock:
+            waited = sorted(self.waited)
+        stats = {"queue_depth": self.depth(), "matched": self.matched}
+        if waited:
+            stats["time_to_match_p50"] = waited[len(waited) // 2]
+            stats["time_to_match_p95"] = waited[int(len(waited) * 0.95)]
+            stats["time_to_match_max"] = waited[-1]
+        return stats
+
+
 class ConciergeBot:
     sio = socketio.Client(logger=True)
-    tasks = dict()
+    # socket.io events are handled in parallel threads
+    http_pool_size = 32
 
-    def __init__(self, token, user, host, port, openvidu=False):
+    def __init__(self, token, user, host, port, openvidu=False, workers=8):
         """This bot lists users joining a designated
         waiting room and sends a group of users to a task room
         as soon as the minimal number of users needed for the
@@ -32,6 +101,9 @@ class ConciergeBot:
         :param openvidu: Whether slurk has an OpenVidu connection specified
             that is to be used.
         :type openvidu: bool
+        :param workers: Number of users moved to their task rooms
+            at the same time.
+        :type workers: int
         """
         self.token = token
         self.user = user
@@ -41,6 +113,18 @@ class ConciergeBot:
             self.uri += f":{port}"
         self.uri += "/slurk/api"
 
+        # keep-alive connections, shared by the handler threads
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=self.http_pool_size)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix="concierge")
+
+        self.matchmaker = Matchmaker()
+        # tasks of the users in the waiting room, requested again after
+        # the cache's ttl and once a user left
+        self.user_tasks = UserTaskCache()
+
         LOG.info(f"Running concierge bot on {self.uri} with token {self.token}")
         # register all event handlers
         self.register_callbacks()
@@ -66,6 +150,7 @@ class ConciergeBot:
             elif data["type"] == "leave":
                 user = data["user"]
                 task = self.get_user_task(user)
+                self.user_tasks.invalidate(user["id"])
                 if task:
                     self.user_task_leave(user, task)
 
@@ -95,7 +180,11 @@ class ConciergeBot:
         :param user: Holds keys `id` and `name`.
         :type user: dict
         """
-        task = requests.get(
+        cached, task = self.user_tasks.get(user["id"])
+        if cached:
+            return task
+
+        task = self.http.get(
             f'{self.uri}/users/{user["id"]}/task',
             headers={"Authorization": f"Bearer {self.token}"},
         )
@@ -103,10 +192,14 @@ class ConciergeBot:
             LOG.error(f"Could not get task: {task.status_code}")
             exit(2)
         LOG.debug("Got user task successfully.")
-        return task.json()
+        task = task.json()
+        if task:
+            # a user without a task may be assigned one later
+            self.user_tasks.put(user["id"], task)
+        return task
 
     def get_user(self, user):
-        response = requests.get(
+        response = self.http.get(
             f"{self.uri}/users/{user}",
             headers={"Authorization": f"Bearer {self.token}"}
         )
@@ -128,7 +221,7 @@ class ConciergeBot:
         if openvidu_session_id:
             json["openvidu_session_id"] = openvidu_session_id
 
-        room = requests.post(
+        room = self.http.post(
             f"{self.uri}/rooms",
             headers={"Authorization": f"Bearer {self.token}"},
             json=json,
@@ -141,7 +234,7 @@ class ConciergeBot:
 
     def create_openvidu_session(self):
         """Create OpenVidu session for a room."""
-        session = requests.post(
+        session = self.http.post(
             f"{self.uri}/openvidu/sessions",
             headers={"Authorization": f"Bearer {self.token}"}
         )
@@ -159,7 +252,7 @@ class ConciergeBot:
         :param room_id: Identifier of room.
         :type room_id: int
         """
-        response = requests.post(
+        response = self.http.post(
             f"{self.uri}/users/{user_id}/rooms/{room_id}",
             headers={"Authorization": f"Bearer {self.token}"},
         )
@@ -179,7 +272,7 @@ class ConciergeBot:
         :param etag: Used for request validation.
         :type etag: str
         """
-        response = requests.delete(
+        response = self.http.delete(
             f"{self.uri}/users/{user_id}/rooms/{room_id}",
             headers={"Authorization": f"Bearer {self.token}", "If-Match": etag},
         )
@@ -206,10 +299,9 @@ class ConciergeBot:
         task_id = task["id"]
         user_id = user["id"]
         user_name = user["name"]
-        # register task together with the user_id
-        self.tasks.setdefault(task_id, {})[user_id] = room
+        group = self.matchmaker.join(user_id, task, room)
 
-        if len(self.tasks[task_id]) == task["num_users"]:
+        if group is not None:
             session_id = None
 
             if openvidu:
@@ -217,16 +309,17 @@ class ConciergeBot:
                 session = self.create_openvidu_session()
                 session_id = session["id"]
             new_room = self.create_room(task["layout_id"], session_id)
-            # list cast necessary because the dictionary is actively altered
-            # due to parallely received "leave" events
-            for user_id, old_room_id in list(self.tasks[task_id].items()):
-                etag = self.get_user(user_id)
-                self.delete_room(user_id, old_room_id, etag)
-                self.join_room(user_id, new_room["id"])
-            del self.tasks[task_id]
+            # the users of the group are moved in parallel
+            moves = [
+                self.executor.submit(self.move_user, user_id, old_room_id, new_room)
+                for user_id, old_room_id in group
+            ]
+            for move in moves:
+                move.result()
             self.sio.emit("room_created", {"room": new_room["id"], "task": task_id})
 
             LOG.info(f"Created session {session_id}")
+            LOG.info(f"Matchmaking: {self.matchmaker.stats()}")
 
         else:
             self.sio.emit(
@@ -242,6 +335,12 @@ class ConciergeBot:
                 callback=self.message_callback,
             )
 
+    def move_user(self, user_id, old_room_id, new_room):
+        """Move a user from the waiting room to the task room."""
+        etag = self.get_user(user_id)
+        self.delete_room(user_id, old_room_id, etag)
+        self.join_room(user_id, new_room["id"])
+
     def user_task_leave(self, user, task):
         """The task entry of a disconnected user is removed.
 
@@ -251,10 +350,7 @@ class ConciergeBot:
             `layout_id`, `name` and `num_users`.
         :type task: dict
         """
-        task_id = task["id"]
-        user_id = user["id"]
-        if task_id in self.tasks and user_id in self.tasks[task_id]:
-            del self.tasks[task["id"]][user["id"]]
+        self.matchmaker.leave(user["id"], task["id"])
 
 
 if __name__ == "__main__":
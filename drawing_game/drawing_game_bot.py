@@ -8,10 +8,8 @@ import random
 import string
 from collections import defaultdict
 from pathlib import Path
-from threading import Timer
 from time import sleep
 
-import requests
 import socketio
 
 from .config import TASK_GREETING, INSTRUCTIONS_A, INSTRUCTIONS_B, \
@@ -20,7 +18,7 @@ from .config import TASK_GREETING, INSTRUCTIONS_A, INSTRUCTIONS_B, \
     COLOR_MESSAGE, STANDARD_COLOR, INSTANCES, SURVEY
 
 from .gridmanager import GridManager
-from templates import TaskBot
+from templates import ScheduledTimer, TaskBot
 
 LOG = logging.getLogger(__name__)
 
@@ -42,7 +40,7 @@ class Session:
         self.drawn_grid = None
         self.current_turn = 0
         self.game_round = 0
-        self.timer = None  # Timer()
+        self.timer = None  # ScheduledTimer()
         self.left_room_timer = dict()
         self.points = {
             "score": STARTING_POINTS,
@@ -150,14 +148,14 @@ class DrawingBot(TaskBot):
         LOG.debug('Triggered _no_partner')
 
         # get layout_id
-        response = requests.get(
+        response = self.http.get(
             f"{self.uri}/tasks/{self.task_id}",
             headers={"Authorization": f"Bearer {self.token}"},
         )
         layout_id = response.json()["layout_id"]
 
         # create a new task room for this user
-        room = requests.post(
+        room = self.http.post(
             f"{self.uri}/rooms",
             headers={"Authorization": f"Bearer {self.token}"},
             json={"layout_id": layout_id},
@@ -168,7 +166,7 @@ class DrawingBot(TaskBot):
         self.remove_user_from_room(user_id, self.waiting_room)
 
         # move user to new task room
-        response = requests.post(
+        response = self.http.post(
             f"{self.uri}/users/{user_id}/rooms/{room['id']}",
             headers={"Authorization": f"Bearer {self.token}"},
         )
@@ -241,7 +239,7 @@ class DrawingBot(TaskBot):
                 )
             LOG.debug(f"The players are {self.sessions[room_id].players}")
 
-            response = requests.post(
+            response = self.http.post(
                 f"{self.uri}/users/{self.user}/rooms/{room_id}",
                 headers={"Authorization": f"Bearer {self.token}"},
             )
@@ -274,7 +272,7 @@ class DrawingBot(TaskBot):
             self.send_individualised_instructions(room_id)
 
             # Display keyboard instructions for player_b
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.uri}/rooms/{room_id}/text/grid_title",
                 json={"text": "ATTENTION! How to type", "receiver_id": this_session.player_b["id"]},
                 headers={"Authorization": f"Bearer {self.token}"},
@@ -318,14 +316,8 @@ class DrawingBot(TaskBot):
             """Triggered if a user enters or leaves a room."""
             LOG.debug(f"Triggered status: {data['user']} did {data['type']} the room {data['room']}")
             # check whether the user is eligible to join this task
-            task = requests.get(
-                f"{self.uri}/users/{data['user']['id']}/task",
-                headers={"Authorization": f"Bearer {self.token}"},
-            )
-            if not task.ok:
-                LOG.error(f"Could not set task instruction title: {task.status_code}")
-                task.raise_for_status()
-            if not task.json() or task.json()["id"] != int(self.task_id):
+            task = self.api.get_user_task(data["user"]["id"])
+            if not task or task["id"] != int(self.task_id):
                 return
 
             room_id = data["room"]
@@ -343,7 +335,7 @@ class DrawingBot(TaskBot):
                     self.waiting_timer.cancel()
                 if data["type"] == "join":
                     LOG.debug("Waiting Timer started.")
-                    self.waiting_timer = Timer(
+                    self.waiting_timer = ScheduledTimer(
                         WAITING_PARTNER_TIMER * 60,
                         self._no_partner,
                         args=[room_id, data["user"]["id"]],
@@ -393,7 +385,7 @@ class DrawingBot(TaskBot):
                             if self.sessions[room_id].timer:
                                 self.sessions[room_id].timer.cancel()
                             LOG.debug("Start timer: user left")
-                            self.sessions[room_id].left_room_timer[curr_usr["id"]] = Timer(
+                            self.sessions[room_id].left_room_timer[curr_usr["id"]] = ScheduledTimer(
                                 LEAVE_TIMER * 60, self.user_did_not_rejoin,
                                 args=[room_id],
                             )
@@ -426,8 +418,9 @@ class DrawingBot(TaskBot):
                 # Reset timer
                 LOG.debug("Reset timeout timer after sending message")
                 if this_session.timer:
-                    this_session.timer.cancel()
-                self.start_timeout_timer(room_id)
+                    this_session.timer.reset()
+                else:
+                    self.start_timeout_timer(room_id)
 
         @self.sio.event
         def command(data):
@@ -452,8 +445,9 @@ class DrawingBot(TaskBot):
                 # Reset timer
                 LOG.debug("Reset timeout timer after sending command")
                 if this_session.timer:
-                    this_session.timer.cancel()
-                self.start_timeout_timer(room_id)
+                    this_session.timer.reset()
+                else:
+                    self.start_timeout_timer(room_id)
 
             if isinstance(data["command"], str):
                 command = data['command'].lower()
@@ -692,7 +686,7 @@ class DrawingBot(TaskBot):
         this_session = self.sessions[room_id]
 
         # Display  instructions for player_a
-        response = requests.patch(
+        response = self.http.patch(
             f"{self.uri}/rooms/{room_id}/text/instr_title",
             json={"text": "You are the describer", "receiver_id": this_session.player_a["id"]},
             headers={"Authorization": f"Bearer {self.token}"},
@@ -710,7 +704,7 @@ class DrawingBot(TaskBot):
             }
         )
         # Display  instructions for player_b
-        response = requests.patch(
+        response = self.http.patch(
             f"{self.uri}/rooms/{room_id}/text/instr_title",
             json={"text": "You have to draw the grid", "receiver_id": this_session.player_b["id"]},
             headers={"Authorization": f"Bearer {self.token}"},
@@ -737,14 +731,14 @@ class DrawingBot(TaskBot):
             LOG.error("Could not resize chat and task area: invalid parameters.")
             raise ValueError("chat_area and task_area must sum up to 100")
 
-        response = requests.patch(
+        response = self.http.patch(
             f"{self.uri}/rooms/{room_id}/attribute/id/sidebar",
             headers={"Authorization": f"Bearer {self.token}"},
             json={"attribute": "style", "value": f"width: {task_area}%"},
         )
         self.request_feedback(response, "resize sidebar")
 
-        response = requests.patch(
+        response = self.http.patch(
             f"{self.uri}/rooms/{room_id}/attribute/id/content",
             headers={"Authorization": f"Bearer {self.token}"},
             json={"attribute": "style", "value": f"width: {chat_area}%"},
@@ -776,7 +770,7 @@ class DrawingBot(TaskBot):
             )
 
             # Display on display area
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.uri}/rooms/{room_id}/text/grid_title",
                 json={"text": "Target grid", "receiver_id": this_session.player_a["id"]},
                 headers={"Authorization": f"Bearer {self.token}"},
@@ -799,7 +793,7 @@ class DrawingBot(TaskBot):
             # self._hide_game_board(room_id, this_session.player_a)
 
             # enable the grid
-            response = requests.delete(
+            response = self.http.delete(
                 f"{self.uri}/rooms/{room_id}/class/grid-area",
                 json={"class": "dis-area", "receiver_id": this_session.player_a["id"]},
                 headers={"Authorization": f"Bearer {self.token}"},
@@ -846,23 +840,7 @@ class DrawingBot(TaskBot):
         """
         change user's permission to send messages
         """
-        # get permission_id based on user_id
-        response = requests.get(
-            f"{self.uri}/users/{user_id}/permissions",
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        self.request_feedback(response, "retrieving user's permissions")
-
-        permission_id = response.json()["id"]
-        requests.patch(
-            f"{self.uri}/permissions/{permission_id}",
-            json={"send_message": value},
-            headers={
-                "If-Match": response.headers["ETag"],
-                "Authorization": f"Bearer {self.token}",
-            },
-        )
-        self.request_feedback(response, "changing user's message permission")
+        self.api.set_message_privilege(user_id, value)
 
     def check_writing_right(self, room_id, usr, writing_right):
         curr_usr, other_usr = self.sessions[room_id].players
@@ -870,7 +848,7 @@ class DrawingBot(TaskBot):
             curr_usr, other_usr = other_usr, curr_usr
         if writing_right is True:
             # assign writing rights to the user
-            response = requests.delete(
+            response = self.http.delete(
                 f"{self.uri}/rooms/{room_id}/attribute/id/text",
                 json={
                     "attribute": "readonly",
@@ -879,7 +857,7 @@ class DrawingBot(TaskBot):
                 },
                 headers={"Authorization": f"Bearer {self.token}"},
             )
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.uri}/rooms/{room_id}/attribute/id/text",
                 json={
                     "attribute": "readonly",
@@ -888,7 +866,7 @@ class DrawingBot(TaskBot):
                 },
                 headers={"Authorization": f"Bearer {self.token}"},
             )
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.uri}/rooms/{room_id}/attribute/id/text",
                 json={
                     "attribute": "placeholder",
@@ -900,7 +878,7 @@ class DrawingBot(TaskBot):
 
         elif writing_right is False:
             # make input field unresponsive
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.uri}/rooms/{room_id}/attribute/id/text",
                 json={
                     "attribute": "readonly",
@@ -909,7 +887,7 @@ class DrawingBot(TaskBot):
                 },
                 headers={"Authorization": f"Bearer {self.token}"},
             )
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.uri}/rooms/{room_id}/attribute/id/text",
                 json={
                     "attribute": "placeholder",
@@ -919,7 +897,7 @@ class DrawingBot(TaskBot):
                 headers={"Authorization": f"Bearer {self.token}"},
             )
 
-            response = requests.delete(
+            response = self.http.delete(
                 f"{self.uri}/rooms/{room_id}/attribute/id/text",
                 json={
                     "attribute": "readonly",
@@ -928,7 +906,7 @@ class DrawingBot(TaskBot):
                 },
                 headers={"Authorization": f"Bearer {self.token}"},
             )
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.uri}/rooms/{room_id}/attribute/id/text",
                 json={
                     "attribute": "placeholder",
@@ -939,7 +917,7 @@ class DrawingBot(TaskBot):
             )
 
     def make_chat_area_unresponsive(self, room_id, user_id):
-        response = requests.patch(
+        response = self.http.patch(
             f"{self.uri}/rooms/{room_id}/attribute/id/text",
             json={
                 "attribute": "readonly",
@@ -948,7 +926,7 @@ class DrawingBot(TaskBot):
             },
             headers={"Authorization": f"Bearer {self.token}"},
         )
-        response = requests.patch(
+        response = self.http.patch(
             f"{self.uri}/rooms/{room_id}/attribute/id/text",
             json={
                 "attribute": "placeholder",
@@ -983,7 +961,7 @@ class DrawingBot(TaskBot):
         elif reward == 1:
             correct += 1
 
-        response = requests.patch(
+        response = self.http.patch(
             f"{self.uri}/rooms/{room_id}/text/title",
             json={"text": f"Score: {score} 🏆 | Correct: {correct} ✅ | Wrong: {wrong} ❌"},
             headers={"Authorization": f"Bearer {self.token}"},
@@ -1012,7 +990,7 @@ class DrawingBot(TaskBot):
         # Was this the last game round?
         if self.sessions[room_id].game_round >= 4:
             # Display survey on display area
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.uri}/rooms/{room_id}/text/grid_title",
                 json={"text": "Complete the survey"},
                 headers={"Authorization": f"Bearer {self.token}"},
@@ -1106,7 +1084,7 @@ class DrawingBot(TaskBot):
             self.process_move(room_id, 1)
 
     def start_timeout_timer(self, room_id):
-        timer = Timer(
+        timer = ScheduledTimer(
             TIMEOUT_TIMER * 60, self.timeout_close_game, args=[room_id]
         )
         timer.start()
@@ -1171,25 +1149,8 @@ class DrawingBot(TaskBot):
             )
 
     def remove_user_from_room(self, user_id, room_id):
-        response = requests.get(
-            f"{self.uri}/users/{user_id}",
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            logging.error(f"Could not get user: {response.status_code}")
-            response.raise_for_status()
-        etag = response.headers["ETag"]
-
         try:
-            response = requests.delete(
-                f"{self.uri}/users/{user_id}/rooms/{room_id}",
-                headers={"If-Match": etag, "Authorization": f"Bearer {self.token}"},
-            )
-            if not response.ok:
-                LOG.error(
-                    f"Could not remove user from task room: {response.status_code}"
-                )
-                response.raise_for_status()
+            self.api.remove_user_from_room(user_id, room_id)
             LOG.debug("Removing user from task room was successful.")
         except:
             LOG.debug(f"User {user_id} not in room {room_id}")
@@ -1200,50 +1161,20 @@ class DrawingBot(TaskBot):
 
         self.send_message_from_bot(room_id, "The room is closing, see you next time 👋")
         self.sessions[room_id].set_game_over(True)
+        self.flush_logs()
         self.room_to_read_only(room_id)
         self.sessions.clear_session(room_id)
+        self.log_round_trips(room_id)
 
     def room_to_read_only(self, room_id):
         """Set room to read only."""
         LOG.debug('Triggered room read only')
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "readonly", "value": "True"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            LOG.error(f"Could not set room to read_only: {response.status_code}")
-            response.raise_for_status()
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "placeholder", "value": "This room is read-only"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            LOG.error(f"Could not set room to read_only: {response.status_code}")
-            response.raise_for_status()
+        self.api.room_to_read_only(room_id)
 
         # remove users from room to repeated avoid timeout call
         if room_id in self.sessions:
             for usr in self.sessions[room_id].players:
-                response = requests.get(
-                    f"{self.uri}/users/{usr['id']}",
-                    headers={"Authorization": f"Bearer {self.token}"},
-                )
-                if not response.ok:
-                    logging.error(f"Could not get user: {response.status_code}")
-                    response.raise_for_status()
-                etag = response.headers["ETag"]
-
-                response = requests.delete(
-                    f"{self.uri}/users/{usr['id']}/rooms/{room_id}",
-                    headers={"If-Match": etag, "Authorization": f"Bearer {self.token}"},
-                )
-                if not response.ok:
-                    logging.error(
-                        f"Could not remove user from task room: {response.status_code}"
-                    )
-                    response.raise_for_status()
-                logging.debug("Removing user from task room was successful.")
+                self.api.remove_user_from_room(usr["id"], room_id)
+                LOG.debug("Removing user from task room was successful.")
 
 
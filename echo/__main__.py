@@ -1,9 +1,7 @@
+import asyncio
 import logging
-from threading import Timer
 
-import requests
-
-from templates import TaskBot
+from templates import AsyncTaskBot, AsyncTimer
 
 
 TIMEOUT_TIMER = 60  # minutes
@@ -16,7 +14,7 @@ class RoomTimer:
         self.start_timer()
 
     def start_timer(self):
-        self.timer = Timer(
+        self.timer = AsyncTimer(
             TIMEOUT_TIMER*60,
             self.function,
             args=[self.room_id]
@@ -32,74 +30,33 @@ class RoomTimer:
         self.timer.cancel()
 
 
-class EchoBot(TaskBot):
+class EchoBot(AsyncTaskBot):
     timers_per_room = dict()
 
-    def on_task_room_creation(self, data):
+    async def on_task_room_creation(self, data):
         room_id = data["room"]
 
         self.timers_per_room[room_id] = RoomTimer(
             self.close_room, room_id
         )
 
-    def close_room(self, room_id):
-        self.room_to_read_only(room_id)
+    async def close_room(self, room_id):
+        await self.room_to_read_only(room_id)
         self.timers_per_room.pop(room_id)
+        self.log_round_trips(room_id)
 
-    def room_to_read_only(self, room_id):
+    async def room_to_read_only(self, room_id):
         """Set room to read only."""
-        # set room to read-only
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "readonly", "value": "True"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            logging.error(f"Could not set room to read_only: {response.status_code}")
-            response.raise_for_status()
-
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "placeholder", "value": "This room is read-only"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            logging.error(f"Could not set room to read_only: {response.status_code}")
-            response.raise_for_status()
-
-        response = requests.get(
-            f"{self.uri}/rooms/{room_id}/users",
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            logging.error(f"Could not get user: {response.status_code}")
+        await self.api.room_to_read_only(room_id)
 
-        users = response.json()
-        for user in users:
+        for user in await self.api.get_room_users(room_id):
             if user["id"] != self.user:
-                response = requests.get(
-                    f"{self.uri}/users/{user['id']}",
-                    headers={"Authorization": f"Bearer {self.token}"},
-                )
-                if not response.ok:
-                    logging.error(f"Could not get user: {response.status_code}")
-                    response.raise_for_status()
-                etag = response.headers["ETag"]
-
-                response = requests.delete(
-                    f"{self.uri}/users/{user['id']}/rooms/{room_id}",
-                    headers={"If-Match": etag, "Authorization": f"Bearer {self.token}"},
-                )
-                if not response.ok:
-                    logging.error(
-                        f"Could not remove user from task room: {response.status_code}"
-                    )
-                    response.raise_for_status()
+                await self.api.remove_user_from_room(user["id"], room_id)
                 logging.debug("Removing user from task room was successful.")
 
     def register_callbacks(self):
         @self.sio.event
-        def text_message(data):
+        async def text_message(data):
             if self.user == data["user"]["id"]:
                 return
             else:
@@ -121,7 +78,7 @@ class EchoBot(TaskBot):
             elif message.lower() == "ping":
                 message = "Pong!"
 
-            self.sio.emit(
+            await self.sio.emit(
                 "text",
                 {
                     "room": data["room"],
@@ -132,7 +89,7 @@ class EchoBot(TaskBot):
             )
 
         @self.sio.event
-        def image_message(data):
+        async def image_message(data):
             if self.user == data["user"]["id"]:
                 return
             else:
@@ -148,7 +105,7 @@ class EchoBot(TaskBot):
                 logging.debug("It was actually a private image o.O")
                 options["receiver_id"] = data["user"]["id"]
 
-            self.sio.emit(
+            await self.sio.emit(
                 "image",
                 {
                     "room": data["room"],
@@ -172,4 +129,4 @@ if __name__ == "__main__":
     # create bot instance
     echo_bot = EchoBot(args.token, args.user, args.task, args.host, args.port)
     # connect to chat server
-    echo_bot.run()
+    asyncio.run(echo_bot.run())
@@ -0,0 +1,240 @@
+"""Run several task bots in one process over one socket.io connection.
+
+Every bot started by `start_bot.py` is a container with its own
+interpreter, connection and imported dependencies. The bot host loads
+the bot classes listed in a configuration file into one process
+instead. All bots act as the slurk user of the host: events of a task
+room go to the bot of the room's task until the host user leaves the
+room, all other events (e.g. of the waiting room) go to every bot. A
+failing handler is logged and does not affect the other bots.
+
+The configuration file is a json list with one entry per bot:
+
+    [
+        {"bot": "testbot.__main__:EchoBot", "task": 1},
+        {
+            "bot": "taboo.__main__:TabooBot",
+            "task": 2,
+            "post_init": {"waiting_room": 1}
+        },
+        {
+            "bot": "drawing_game.drawing_game_bot:DrawingBot",
+            "task": 3,
+            "attributes": {"waiting_room": 1}
+        }
+    ]
+
+`post_init` holds the keyword arguments of the bot's `post_init`,
+`attributes` are set on the bot after creating it, as the bots'
+`__main__` blocks do with their extra command-line arguments.
+
+usage: python host_bots.py --config bots.json [-t TOKEN] [-u USER]
+"""
+
+from collections import Counter
+import importlib
+import json
+import logging
+from pathlib import Path
+
+import socketio
+
+from templates import Bot
+
+LOG = logging.getLogger(__name__)
+
+
+class BotChannel:
+    """Takes the place of the socket.io client of a hosted bot.
+
+    Handlers registered by the bot are kept here and called by the
+    host, everything else (`emit`, `call`, ...) is passed on to the
+    shared client.
+    """
+
+    def __init__(self, host, name):
+        self.host = host
+        self.name = name
+        self.handlers = dict()
+
+    def on(self, event, handler=None, namespace=None):
+        def register(handler):
+            # like socketio.Client, a later handler replaces an earlier one
+            self.handlers[event] = handler
+            self.host.listen(event)
+            return handler
+
+        if handler is None:
+            return register
+        return register(handler)
+
+    def event(self, *args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return self.on(args[0].__name__, args[0])
+        return lambda handler: self.on(handler.__name__, handler)
+
+    def __getattr__(self, name):
+        return getattr(self.host.sio, name)
+
+
+class BotHost:
+    def __init__(self, token, user, host, port):
+        """Runs several task bots with the same slurk user.
+        :param token: Token of the slurk user shared by all bots
+        :type token: str
+        :param user: ID of the `User` object created from the token
+        :type user: int
+        :param host: Full URL including protocol and hostname
+        :type host: str
+        :param port: Port used by the slurk chat server
+        :type port: int
+        """
+        self.token = token
+        self.user = user
+        self.host = host
+        self.port = port
+
+        self.uri = host
+        if port is not None:
+            self.uri += f":{port}"
+        self.uri += "/slurk/api"
+
+        self.sio = socketio.Client(logger=False)
+        self.bots = dict()
+        self.channels = dict()
+        # task room -> name of the bot moderating it
+        self.rooms = dict()
+        self.failures = Counter()
+        self._events = set()
+        # needed to forget the rooms the host user has left
+        self.listen("left_room")
+        self.listen("status")
+
+    def add(self, bot_class, task, name=None):
+        """Create a bot connected through the shared client.
+        :param bot_class: A subclass of `templates.TaskBot`
+        :type bot_class: type
+        :param task: Task ID the bot moderates
+        :type task: int
+        :param name: Unique name of the bot, used in the logs
+        :type name: str
+        """
+        name = name or f"{bot_class.__name__}-{task}"
+        if name in self.bots:
+            raise ValueError(f"A bot named {name} is already hosted")
+
+        channel = BotChannel(self, name)
+        # `sio` is a class attribute and used in `__init__` already
+        hosted_class = type(bot_class.__name__, (bot_class,), {"sio": channel})
+        bot = hosted_class(self.token, self.user, task, self.host, self.port)
+
+        self.channels[name] = channel
+        self.bots[name] = bot
+        return bot
+
+    def listen(self, event):
+        """Dispatch an event to the bots from now on."""
+        if event not in self._events:
+            self._events.add(event)
+            self.sio.on(event, lambda *args: self.dispatch(event, *args))
+
+    def _moderator(self, task_id):
+        for name, bot in self.bots.items():
+            if task_id is not None and bot.task_id == task_id:
+                return name
+        return None
+
+    def _has_left(self, event, data):
+        """Whether an event tells that the host user left a room."""
+        if event == "left_room":
+            return str(data.get("user")) == str(self.user)
+        if event == "status" and data.get("type") == "leave":
+            user = data.get("user") or dict()
+            return str(user.get("id")) == str(self.user)
+        return False
+
+    def dispatch(self, event, *args):
+        """Call the handlers of the bots concerned by an event."""
+        data = args[0] if args and isinstance(args[0], dict) else dict()
+        room_id = data.get("room")
+
+        if event == "new_task_room":
+            name = self._moderator(data.get("task"))
+            if name is not None:
+                self.rooms[room_id] = name
+            # every bot gets to see the users changing rooms
+            names = list(self.channels)
+        elif room_id in self.rooms:
+            names = [self.rooms[room_id]]
+        else:
+            names = list(self.channels)
+
+        result = None
+        for name in names:
+            handler = self.channels[name].handlers.get(event)
+            if handler is None:
+                continue
+            try:
+                result = handler(*args)
+            except Exception:
+                self.failures[name] += 1
+                LOG.exception(f"{name} could not handle `{event}`")
+
+        # the room is closed for the bots, so forget its moderator
+        if room_id in self.rooms and self._has_left(event, data):
+            del self.rooms[room_id]
+        return result
+
+    def run(self):
+        """Establish the shared connection to the slurk chat server."""
+        self.sio.connect(
+            self.uri,
+            headers={"Authorization": f"Bearer {self.token}", "user": str(self.user)},
+            namespaces="/",
+        )
+        self.sio.wait()
+        self.close()
+
+    def close(self):
+        for name, bot in self.bots.items():
+            try:
+                bot.close()
+            except Exception:
+                LOG.exception(f"Could not close {name}")
+
+
+def load_bot_class(path):
+    """Import a bot class given as `module:ClassName`."""
+    module_name, class_name = path.split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def load_config(bot_host, config):
+    """Create the bots listed in a configuration."""
+    for entry in config:
+        bot = bot_host.add(
+            load_bot_class(entry["bot"]), entry["task"], entry.get("name")
+        )
+        for key, value in entry.get("attributes", dict()).items():
+            setattr(bot, key, value)
+        if "post_init" in entry:
+            bot.post_init(**entry["post_init"])
+
+
+if __name__ == "__main__":
+    # set up logging configuration
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:%(message)s")
+
+    # create commandline parser
+    parser = Bot.create_argparser()
+    parser.description = "Run several task bots in one process."
+    parser.add_argument(
+        "--config", required=True, help="json file listing the bots to run"
+    )
+    args = parser.parse_args()
+
+    bot_host = BotHost(args.token, args.user, args.host, args.port)
+    load_config(bot_host, json.loads(Path(args.config).read_text(encoding="utf-8")))
+    LOG.info(f"Hosting {', '.join(bot_host.bots)}")
+    # connect to chat server
+    bot_host.run()
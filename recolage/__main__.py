@@ -3,14 +3,14 @@ import logging
 import os
 import random
 from time import sleep
-from threading import Timer
 import requests
 import string
 
-from templates import TaskBot
+from templates import ScheduledTimer, TaskBot
 from .config import *
 from .golmi_client import *
 from .dataloader import Dataloader
+from .shapes import ShapeTable, compact_board
 
 
 class RoomTimer:
@@ -21,14 +21,13 @@ class RoomTimer:
         self.left_room = dict()
 
     def start_timer(self):
-        self.timer = Timer(
+        self.timer = ScheduledTimer(
             TIMEOUT_TIMER * 60, self.function, args=[self.room_id, "timeout"]
         )
         self.timer.start()
 
     def reset(self):
-        self.timer.cancel()
-        self.start_timer()
+        self.timer.reset()
         logging.info("reset timer")
 
     def cancel(self):
@@ -45,7 +44,7 @@ class RoomTimer:
             self.left_room[user].cancel()
 
     def user_left(self, user):
-        self.left_room[user] = Timer(
+        self.left_room[user] = ScheduledTimer(
             LEAVE_TIMER * 60, self.function, args=[self.room_id, "user_left"]
         )
         self.left_room[user].start()
@@ -87,6 +86,8 @@ class RecolageBot(TaskBot):
         super().__init__(*args, **kwargs)
         self.received_waiting_token = set()
         self.sessions = SessionManager()
+        # block matrices of the logged boards, by shape id
+        self.shapes = ShapeTable()
 
     def post_init(self, waiting_room, golmi_server, golmi_password, version):
         """
@@ -117,7 +118,7 @@ class RecolageBot(TaskBot):
 
         if task_id is not None and task_id == self.task_id:
             # reduce height of sidebar
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.uri}/rooms/{room_id}/attribute/id/sidebar",
                 headers={"Authorization": f"Bearer {self.token}"},
                 json={"attribute": "style", "value": f"height: 90%"}
@@ -139,7 +140,7 @@ class RecolageBot(TaskBot):
                     {**usr, "role": None, "status": "joined"}
                 )
 
-            response = requests.post(
+            response = self.http.post(
                 f"{self.uri}/users/{self.user}/rooms/{room_id}",
                 headers={"Authorization": f"Bearer {self.token}"},
             )
@@ -196,16 +197,8 @@ class RecolageBot(TaskBot):
         def status(data):
             """Triggered if a user enters or leaves a room."""
             # check whether the user is eligible to join this task
-            task = requests.get(
-                f"{self.uri}/users/{data['user']['id']}/task",
-                headers={"Authorization": f"Bearer {self.token}"},
-            )
-            if not task.ok:
-                logging.error(
-                    f"Could not set task instruction title: {task.status_code}"
-                )
-                task.raise_for_status()
-            if not task.json() or task.json()["id"] != int(self.task_id):
+            task = self.api.get_user_task(data["user"]["id"])
+            if not task or task["id"] != int(self.task_id):
                 return
 
             room_id = data["room"]
@@ -353,12 +346,7 @@ class RecolageBot(TaskBot):
                 y = data["coordinates"]["y"]
                 block_size = data["coordinates"]["block_size"]
 
-                req = requests.get(
-                    f"{self.golmi_server}/slurk/{room_id}/{x}/{y}/{block_size}"
-                )
-                self.request_feedback(req, "retrieving gripped piece")
-
-                piece = req.json()
+                piece = self.get_piece(room_id, x, y, block_size)
                 target = self.sessions[room_id].boards[0]["state"]["targets"]
 
                 if piece.keys() == target.keys():
@@ -415,17 +403,15 @@ class RecolageBot(TaskBot):
                 block_size = data["coordinates"]["block_size"]
 
                 if self.version == "confirm_selection":
+                    # golmi grips the piece to show the selection
                     req = requests.get(
                         f"{self.golmi_server}/slurk/grip/{room_id}/{x}/{y}/{block_size}"
                     )
-                else:    
-                    req = requests.get(
-                        f"{self.golmi_server}/slurk/{room_id}/{x}/{y}/{block_size}"
-                    )
-
-                self.request_feedback(req, "retrieving gripped piece")
+                    self.request_feedback(req, "retrieving gripped piece")
+                    piece = req.json()
+                else:
+                    piece = self.get_piece(room_id, x, y, block_size)
 
-                piece = req.json()
                 if piece:
                     coordinates = dict(
                         type="mouse",
@@ -485,11 +471,7 @@ class RecolageBot(TaskBot):
 
                             else:
                                 # reset the gripper to its original position
-                                req = requests.get(f"{self.golmi_server}/slurk/{room_id}/state")
-                                self.request_feedback(req, "retrieving state")
-
-                                state = req.json()
-                                grippers = state["grippers"]
+                                grippers = self.get_grippers(room_id)
                                 gr_id = list(grippers.keys())[0]
 
                                 req = requests.patch(f"{self.golmi_server}/slurk/gripper/reset/{room_id}/{gr_id}")
@@ -785,23 +767,7 @@ class RecolageBot(TaskBot):
         """
         change user's permission to send messages
         """
-        # get permission_id based on user_id
-        response = requests.get(
-            f"{self.uri}/users/{user_id}/permissions",
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        self.request_feedback(response, "retrieving user's permissions")
-
-        permission_id = response.json()["id"]
-        requests.patch(
-            f"{self.uri}/permissions/{permission_id}",
-            json={"send_message": value},
-            headers={
-                "If-Match": response.headers["ETag"],
-                "Authorization": f"Bearer {self.token}",
-            },
-        )
-        self.request_feedback(response, "changing user's message permission")
+        self.api.set_message_privilege(user_id, value)
 
     def set_wizard_role(self, room_id, user_id):
         self.sessions[room_id].timer.reset()
@@ -858,6 +824,26 @@ class RecolageBot(TaskBot):
             )
 
 
+    def get_piece(self, room_id, x, y, block_size):
+        """piece under a click, from the loaded board if possible"""
+        piece = self.sessions[room_id].golmi_client.piece_at(x, y, block_size)
+        if piece is None:
+            req = requests.get(
+                f"{self.golmi_server}/slurk/{room_id}/{x}/{y}/{block_size}"
+            )
+            self.request_feedback(req, "retrieving gripped piece")
+            piece = req.json()
+        return piece
+
+    def get_grippers(self, room_id):
+        """grippers of the current board, as golmi last sent them"""
+        grippers = self.sessions[room_id].golmi_client.grippers
+        if grippers is None:
+            req = requests.get(f"{self.golmi_server}/slurk/{room_id}/state")
+            self.request_feedback(req, "retrieving state")
+            grippers = req.json()["grippers"]
+        return grippers
+
     def load_state(self, room_id, from_disconnect=False):
         """load the current board on the golmi server"""
         # load and log state
@@ -872,11 +858,7 @@ class RecolageBot(TaskBot):
                 # copy over to new board the gripper of the previous one
                 # so that the controller can still operate it
                 if not board["state"]["grippers"]:
-                    req = requests.get(f"{self.golmi_server}/slurk/{room_id}/state")
-                    self.request_feedback(req, "retrieving state")
-
-                    state = req.json()
-                    grippers = state["grippers"]
+                    grippers = deepcopy(self.get_grippers(room_id))
                     gr_id = list(grippers.keys())[0]
 
                     grippers[gr_id]["gripped"] = None
@@ -888,7 +870,10 @@ class RecolageBot(TaskBot):
         # no need to log if the board is loaded again
         # after the wizard disconnected
         if from_disconnect is False:
-            self.log_event("board_log", {"board": board}, room_id)
+            # golmi needs the block matrices, only the log is compact
+            self.log_event(
+                "board_log", {"board": compact_board(board, self.shapes)}, room_id
+            )
 
         self.sessions[room_id].golmi_client.load_config(board["config"])
         self.sessions[room_id].golmi_client.load_state(board["state"])
@@ -931,7 +916,7 @@ class RecolageBot(TaskBot):
             if board["wrong"] == 0:
                 correct += board["correct"]
 
-        response = requests.patch(
+        response = self.http.patch(
             f"{self.uri}/rooms/{room_id}/text/title",
             json={"text": f"Score: {score} 🏆 | Correct: {correct} ✅"},
             headers={"Authorization": f"Bearer {self.token}"},
@@ -946,41 +931,22 @@ class RecolageBot(TaskBot):
         )
 
         self.sessions[room_id].game_over = True
+        recorder = self.sessions[room_id].golmi_client.recorder
+        if recorder is not None:
+            self.log_event("gripper_events", recorder.close(), room_id)
+        self.flush_logs()
         self.room_to_read_only(room_id)
         self.sessions.clear_session(room_id)
+        self.log_round_trips(room_id)
 
     def room_to_read_only(self, room_id):
         """Set room to read only."""
-        # set room to read-only
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "readonly", "value": "True"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        self.request_feedback(response, "setting room to read_only")
-
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "placeholder", "value": "This room is read-only"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        self.request_feedback(response, "setting room title to read_only")
+        self.api.room_to_read_only(room_id)
 
         # remove user from room
         if room_id in self.sessions:
             for usr in self.sessions[room_id].players:
-                response = requests.get(
-                    f"{self.uri}/users/{usr['id']}",
-                    headers={"Authorization": f"Bearer {self.token}"},
-                )
-                self.request_feedback(response, "getting user")
-                etag = response.headers["ETag"]
-
-                response = requests.delete(
-                    f"{self.uri}/users/{usr['id']}/rooms/{room_id}",
-                    headers={"If-Match": etag, "Authorization": f"Bearer {self.token}"},
-                )
-                self.request_feedback(response, "removing user from task toom")
+                self.api.remove_user_from_room(usr["id"], room_id)
                 logging.debug("Removing user from task room was successful.")
 
     def timeout_close_game(self, room_id, status):
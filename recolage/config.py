@@ -28,6 +28,7 @@ BOARDS_PER_ROOM = 20  # -1 to load entire dataset
 
 TIMEOUT_TIMER = 5  # minutes of inactivity before the room is closed automatically
 LEAVE_TIMER = 3  # minutes if a user is alone in a room
+GRIPPER_LOG_INTERVAL = 5  # seconds per logged gripper trajectory, 0 logs every move
 
 
 COLOR_MESSAGE = '<a style="color:{color};">{message}</a>'
@@ -1,7 +1,8 @@
 from itertools import cycle
-import json
 import random
 
+from board_index import BoardIndex
+
 
 class Dataloader(list):
     def __init__(self, path, n):
@@ -12,44 +13,29 @@ class Dataloader(list):
     def _sample_boards(self):
         self.clear()
         board_ids = set()
+        index = BoardIndex.get(self._path)
         boards = self._read_board_file()
         images_per_level = self._n // 3
 
         for level in cycle(["easy", "medium", "hard"]):
             if boards.get(level):
-                for board in random.sample(boards[level], images_per_level):
-                    state_id = board["state"]["state_id"]
-
+                for offset, state_id in random.sample(boards[level], images_per_level):
                     if state_id not in board_ids:
-                        self.append(board)
+                        # only the sampled boards are read
+                        self.append(index.read(offset))
                         board_ids.add(state_id)
 
                     if len(self) == self._n:
                         return
 
     def _read_board_file(self):
-        """read boards and divide by level"""
-        boards = dict(
-            easy=list(),
-            medium=list(),
-            hard=list()
-        )
-        with self._path.open('r', encoding="utf-8") as infile:
-            for index, line in enumerate(infile, start=1):
-                board = json.loads(line)
-                level = board["board_info"]["difficoulty"]
-
-                # select target
-                state = board["state"]
-                target_id = str(board["target"])
-                target_obj = state["objs"][target_id]
-                state["targets"][target_id] = target_obj
-
-                boards[level].append(board)
+        """offsets and state ids of the boards divided by level"""
+        index = BoardIndex.get(self._path)
+        boards = index.boards()
 
         # load entire dataset
         if self._n == -1:
-            self._n = index        
+            self._n = index.count
 
         return boards
 
@@ -1,33 +1,196 @@
 import argparse
+from collections import Counter
 import json
 import logging
+import numpy as np
 import requests
 import socketio
+import threading
+import time
 
+from templates import ScheduledTimer
 from .config import *
+from .shapes import scale
+
+
+class PieceIndex:
+    """Top piece on every cell of a loaded board, as golmi answers the
+    clicks on it. Built from the block matrices of the objects, which
+    are stacked in the order of `objs`."""
+
+    def __init__(self, state, config):
+        self.objs = state["objs"]
+        self.ids = list(self.objs)
+        self.scale = scale(config)
+        height = int(config["height"] * self.scale)
+        width = int(config["width"] * self.scale)
+        # position in `ids` of the top object, -1 for empty cells
+        self.top = np.full((height, width), -1, dtype=np.int32)
+
+        for position, obj in enumerate(self.objs.values()):
+            for row, blocks in enumerate(obj["block_matrix"]):
+                for column, block in enumerate(blocks):
+                    if not block:
+                        continue
+                    y = int((obj["y"] + row) * self.scale)
+                    x = int((obj["x"] + column) * self.scale)
+                    # slices must not start before the board
+                    rows = slice(max(0, y), max(0, y + self.scale))
+                    columns = slice(max(0, x), max(0, x + self.scale))
+                    self.top[rows, columns] = position
+
+    @staticmethod
+    def positions(objs):
+        return {
+            obj_id: (obj["x"], obj["y"], obj["rotation"]) for obj_id, obj in objs.items()
+        }
+
+    def moved(self, objs):
+        """If the pieces of a state are not where they were indexed."""
+        return self.positions(objs) != self.positions(self.objs)
+
+    def piece(self, x, y, block_size):
+        """{id: object} of the top piece under a click in pixels,
+        empty if there is none."""
+        cell_size = float(block_size) / self.scale
+        row = int(float(y) // cell_size)
+        column = int(float(x) // cell_size)
+        height, width = self.top.shape
+        if not (0 <= row < height and 0 <= column < width):
+            return dict()
+
+        position = self.top[row, column]
+        if position < 0:
+            return dict()
+        obj_id = self.ids[position]
+        return {obj_id: self.objs[obj_id]}
+
+
+class GripperRecorder:
+    """Movements of the gripper of a room, logged as one trajectory
+    event per `interval` seconds instead of one event per update.
+
+    A trajectory starts at the first position received and stores every
+    further position as `[dx, dy, dt, repeats]`: the change of x and y,
+    the milliseconds since the previous position and how many updates
+    repeated the position afterwards. It is flushed by its timer, when a
+    piece is selected and when a new board is loaded.
+    """
+
+    def __init__(self, log, interval=GRIPPER_LOG_INTERVAL):
+        """
+        :param log: Called with the data of every trajectory event
+        :type log: callable
+        :param interval: Seconds from the first movement of a
+            trajectory until it is logged
+        :type interval: float
+        """
+        self.log = log
+        self.timer = ScheduledTimer(interval, self.flush, args=["interval"])
+        self.lock = threading.Lock()
+        self.trajectory = None
+        self.last = None
+        # updates received, positions and events logged
+        self.stats = Counter()
+
+    def record(self, x, y):
+        now = time.monotonic()
+        with self.lock:
+            self.stats["updates"] += 1
+            if self.trajectory is None:
+                self.trajectory = {
+                    "start": {"x": x, "y": y, "time": round(time.time(), 3)},
+                    "moves": [[0, 0, 0, 0]],
+                    "updates": 1,
+                }
+                self.last = (x, y, now)
+                self.stats["positions"] += 1
+                self.timer.start()
+                return
+
+            self.trajectory["updates"] += 1
+            last_x, last_y, last_time = self.last
+            if (x, y) == (last_x, last_y):
+                self.trajectory["moves"][-1][3] += 1
+                return
+
+            dt = round((now - last_time) * 1000)
+            self.trajectory["moves"].append([x - last_x, y - last_y, dt, 0])
+            self.last = (x, y, now)
+            self.stats["positions"] += 1
+
+    def flush(self, reason):
+        """Log the current trajectory, if the gripper moved."""
+        with self.lock:
+            trajectory, self.trajectory = self.trajectory, None
+            self.timer.cancel()
+            if trajectory is None:
+                return
+            # gripper_movement events the trajectory replaces
+            self.stats["events"] += 1
+            self.stats["suppressed"] += trajectory["updates"] - 1
+
+        trajectory["reason"] = reason
+        self.log(trajectory)
+
+    def close(self):
+        """Log the last trajectory, returns the counts of the room."""
+        self.flush("close")
+        return dict(self.stats)
+
+
+def decode_trajectory(trajectory):
+    """Positions of a trajectory event as [milliseconds, x, y, updates]."""
+    x, y = trajectory["start"]["x"], trajectory["start"]["y"]
+    elapsed = 0
+    points = list()
+    for dx, dy, dt, repeats in trajectory["moves"]:
+        x, y, elapsed = x + dx, y + dy, elapsed + dt
+        points.append([elapsed, x, y, repeats + 1])
+    return points
 
 
 class GolmiClient:
     def __init__(self, slurk_socket, bot, room_id):
         self.socket = socketio.Client()
-        self.demo_socket = socketio.Client()
         self.slurk_socket = slurk_socket
         self.room_id = room_id
         self.bot = bot
-        if bot.version == "show_gripper":
-            self.register_callbacks()
+        # local copies of the loaded board, None until golmi has one
+        self.config = None
+        self.pieces = None
+        self.grippers = None
+        self.recorder = None
+        if bot.version == "show_gripper" and GRIPPER_LOG_INTERVAL > 0:
+            self.recorder = GripperRecorder(self.log_trajectory)
+        # also without the gripper, the local copies follow golmi's state
+        self.register_callbacks()
+
+    def log_trajectory(self, trajectory):
+        self.bot.log_event("gripper_trajectory", trajectory, self.room_id)
 
     def register_callbacks(self):
         @self.socket.event
         def update_state(data):
+            if self.pieces is not None and "objs" in data:
+                if self.pieces.moved(data["objs"]):
+                    self.pieces = PieceIndex(data, self.config)
+
             grippers = data["grippers"]
             if not grippers:
                 return
+            self.grippers = grippers
+            if self.bot.version != "show_gripper":
+                return
 
             piece = list(grippers.values())[0]["gripped"]
             gripper = list(grippers.values())[0]
             if piece is None:
                 # record movement, no object was gripped
+                if self.recorder is not None:
+                    self.recorder.record(gripper["x"], gripper["y"])
+                    return
+
                 self.bot.log_event(
                     "gripper_movement",
                     {
@@ -39,6 +202,9 @@ class GolmiClient:
                     self.room_id
                 )
             else:
+                if self.recorder is not None:
+                    self.recorder.flush("selection")
+
                 coordinates = dict(
                     type="gripper",
                     x=gripper["x"],
@@ -50,7 +216,6 @@ class GolmiClient:
         self.socket.connect(address, auth={"password": auth})
         self.socket.call("join", {"room_id": room_id})
 
-        self.demo_socket.connect(address, auth={"password": auth})
         self.socket.call("join", {"room_id": f"{room_id}_demo"})
         self.socket.emit("load_config", DEMO_BOARD["config"])
         self.socket.emit("load_state", DEMO_BOARD["state"])
@@ -59,17 +224,31 @@ class GolmiClient:
         self.socket.emit("random_init", random_config)
 
     def load_config(self, config):
+        self.config = config
+        self.pieces = None
         self.socket.emit("load_config", config)
 
     def update_config(self, config):
         self.socket.emit("update_config", config)
 
     def disconnect(self):
+        if self.recorder is not None:
+            self.recorder.timer.cancel()
         self.socket.emit("disconnect")
         self.socket.disconnect()
 
     def load_state(self, state):
+        if self.recorder is not None:
+            self.recorder.flush("board")
+        self.pieces = PieceIndex(state, self.config) if self.config else None
         self.socket.emit("load_state", state)
 
+    def piece_at(self, x, y, block_size):
+        """Piece under a click on the loaded board, None if golmi must
+        be asked."""
+        if self.pieces is None:
+            return None
+        return self.pieces.piece(x, y, block_size)
+
     def emit(self, *args, **kwargs):
         self.socket.emit(*args, **kwargs)
@@ -0,0 +1,248 @@
+"""Compact pieces of recolage boards.
+
+Every object of a board carries a 5x5 `block_matrix`, which only
+depends on its type and rotation, and the `objs_grid` and
+`targets_grid` of the state repeat the cells the matrices cover.
+`ShapeTable` keeps one NumPy mask per distinct matrix and compact
+boards refer to it by `shape` id: `compact_board` drops the matrices
+and the grids that can be computed from them, `expand_board` restores
+them. The masks also give the `occupancy` of a board in one pass.
+
+usage: python -m recolage.shapes LOGS.json > boards.jsonl
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+GRIDS = {"objs": "objs_grid", "targets": "targets_grid"}
+
+
+class ShapeTable:
+    """Block matrices of the pieces, interned by type, rotation and
+    the matrix itself."""
+
+    def __init__(self):
+        self.ids = dict()
+        # [type, rotation] of every shape
+        self.pieces = list()
+        self.masks = list()
+        # (row, column) of the blocks of every shape
+        self.blocks = list()
+        # masks padded to the same size, built again for new shapes
+        self._stacked = np.zeros((0, 0, 0), dtype=np.uint8)
+
+    def __len__(self):
+        return len(self.masks)
+
+    def intern(self, obj):
+        """Id of the shape of an object, None if its block_matrix can
+        not be stored as a mask."""
+        try:
+            matrix = tuple(tuple(row) for row in obj["block_matrix"])
+            key = (obj["type"], obj["rotation"], matrix)
+            shape_id = self.ids.get(key)
+        except TypeError:
+            return None
+        if shape_id is not None:
+            return shape_id
+
+        try:
+            mask = np.array(matrix, dtype=np.uint8)
+        except (TypeError, ValueError):
+            return None
+        if mask.ndim != 2 or mask.tolist() != [list(row) for row in matrix]:
+            return None
+
+        shape_id = self.ids[key] = len(self.masks)
+        self.pieces.append([obj["type"], obj["rotation"]])
+        mask.setflags(write=False)
+        self.masks.append(mask)
+        self.blocks.append(list(zip(*(axis.tolist() for axis in np.nonzero(mask)))))
+        return shape_id
+
+    def stacked(self):
+        """(shapes, rows, columns) array of all masks."""
+        if len(self._stacked) != len(self.masks):
+            rows = max(
+                (mask.shape[0] for mask in self.masks if mask is not None), default=0
+            )
+            columns = max(
+                (mask.shape[1] for mask in self.masks if mask is not None), default=0
+            )
+            stacked = np.zeros((len(self.masks), rows, columns), dtype=np.uint8)
+            for shape_id, mask in enumerate(self.masks):
+                if mask is not None:
+                    stacked[shape_id, : mask.shape[0], : mask.shape[1]] = mask
+            self._stacked = stacked
+        return self._stacked
+
+    def block_matrix(self, shape_id):
+        return self.masks[shape_id].tolist()
+
+    def to_json(self, shape_ids=None):
+        """Shapes by id, all or only the given ones."""
+        if shape_ids is None:
+            shape_ids = range(len(self.masks))
+        return {
+            str(shape_id): {
+                "type": self.pieces[shape_id][0],
+                "rotation": self.pieces[shape_id][1],
+                "block_matrix": self.block_matrix(shape_id),
+            }
+            for shape_id in sorted(shape_ids)
+        }
+
+    @classmethod
+    def from_json(cls, shapes):
+        """Table of the shapes of a compact board, ids are kept."""
+        table = cls()
+        for shape_id, shape in sorted(shapes.items(), key=lambda item: int(item[0])):
+            while len(table.masks) < int(shape_id):
+                # ids not used by this board
+                table.pieces.append(None)
+                table.masks.append(None)
+                table.blocks.append(None)
+            table.intern(shape)
+        return table
+
+
+def scale(config):
+    """Cells of the objs_grid per block of a piece."""
+    return round(1 / config["move_step"])
+
+
+def build_grid(objs, table, config):
+    """objs_grid of compact objects, stacked in the order of `objs`."""
+    factor = scale(config)
+    grid = dict()
+    for obj_id, obj in objs.items():
+        for row, column in table.blocks[obj["shape"]]:
+            top = int((obj["y"] + row) * factor)
+            left = int((obj["x"] + column) * factor)
+            for y in range(top, top + factor):
+                for x in range(left, left + factor):
+                    grid.setdefault(f"{y}:{x}", list()).append(obj_id)
+    return grid
+
+
+def occupancy(board, table):
+    """Number of objects on every cell of the objs_grid of a compact
+    board, as a (height, width) array."""
+    config = board["config"]
+    factor = scale(config)
+    height = int(config["height"] * factor)
+    width = int(config["width"] * factor)
+
+    objs = list(board["state"]["objs"].values())
+    if not objs:
+        return np.zeros((height, width), dtype=np.int32)
+
+    masks = table.stacked()[[obj["shape"] for obj in objs]]
+    _, rows, columns = masks.shape
+    # pieces outside of the board are moved next to it, into a margin
+    # wide enough that none of their blocks reach the board
+    tops = [min(max(obj["y"], -rows), config["height"]) for obj in objs]
+    lefts = [min(max(obj["x"], -columns), config["width"]) for obj in objs]
+    margin = factor * max(rows, columns)
+    size = (height + 2 * margin, width + 2 * margin)
+
+    # top left cell of every block
+    tops = (np.array(tops) * factor).astype(int) + margin
+    lefts = (np.array(lefts) * factor).astype(int) + margin
+    cells = (tops * size[1])[:, None, None] + (factor * size[1]) * np.arange(rows)[
+        None, :, None
+    ]
+    cells = cells + lefts[:, None, None] + factor * np.arange(columns)[None, None, :]
+    corners = np.bincount(
+        cells.ravel(), weights=masks.ravel(), minlength=size[0] * size[1]
+    )
+    corners = corners.astype(np.int32).reshape(size)
+
+    # every block covers factor x factor cells from its corner
+    counts = np.zeros_like(corners)
+    for dy in range(factor):
+        for dx in range(factor):
+            counts[dy:, dx:] += corners[
+                : corners.shape[0] - dy, : corners.shape[1] - dx
+            ]
+    return counts[margin : margin + height, margin : margin + width]
+
+
+def compact_board(board, table):
+    """Board with the block matrices replaced by shape ids and without
+    the grids that can be computed again, see `expand_board`."""
+    state = dict(board["state"])
+    used = set()
+    derived = list()
+    for objs_key, grid_key in GRIDS.items():
+        objs = dict()
+        for obj_id, obj in state[objs_key].items():
+            shape_id = table.intern(obj)
+            if shape_id is None:
+                objs[obj_id] = obj
+                continue
+            obj = {key: value for key, value in obj.items() if key != "block_matrix"}
+            obj["shape"] = shape_id
+            objs[obj_id] = obj
+            used.add(shape_id)
+        state[objs_key] = objs
+
+        if grid_key in state and all("shape" in obj for obj in objs.values()):
+            if build_grid(objs, table, board["config"]) == state[grid_key]:
+                state.pop(grid_key)
+                derived.append(grid_key)
+
+    compact = dict(board)
+    compact["state"] = state
+    compact["shapes"] = table.to_json(used)
+    compact["derived_grids"] = derived
+    return compact
+
+
+def expand_board(compact):
+    """Board in the format of the board files from a compact board."""
+    table = ShapeTable.from_json(compact["shapes"])
+    state = dict(compact["state"])
+    for objs_key, grid_key in GRIDS.items():
+        objs = dict()
+        for obj_id, obj in state[objs_key].items():
+            if "shape" in obj:
+                obj = dict(obj)
+                obj["block_matrix"] = table.block_matrix(obj.pop("shape"))
+            objs[obj_id] = obj
+        if grid_key in compact["derived_grids"]:
+            state[grid_key] = build_grid(state[objs_key], table, compact["config"])
+        state[objs_key] = objs
+
+    board = {
+        key: value
+        for key, value in compact.items()
+        if key not in {"shapes", "derived_grids"}
+    }
+    board["state"] = state
+    return board
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Expand the compact boards of recolage's board_log events."
+    )
+    parser.add_argument("logs", help="json list or json lines of log entries")
+    args = parser.parse_args()
+
+    with open(args.logs, encoding="utf-8") as infile:
+        text = infile.read()
+    if text.lstrip().startswith("["):
+        entries = json.loads(text)
+    else:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    for entry in entries:
+        if entry.get("event") != "board_log":
+            continue
+        board = entry["data"]["board"]
+        if "shapes" in board:
+            board = expand_board(board)
+        print(json.dumps(board))
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+# University of Potsdam
+"""BoardIndex test cases."""
+
+import copy
+import gc
+import json
+import os
+from pathlib import Path
+import shutil
+import sys
+import tempfile
+import unittest
+import weakref
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from board_index import BoardIndex, select_target
+from recolage.config import BOARDS
+
+
+class TestBoardIndex(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / BOARDS.name
+        shutil.copy(BOARDS, self.path)
+        self.index = BoardIndex(self.path)
+        self.offsets = [
+            offset for level in self.index.boards().values() for offset, _ in level
+        ]
+
+    def test_boards_match_file(self):
+        lines = self.path.read_text(encoding="utf-8").splitlines()
+        boards = [self.index.read(offset) for offset in self.offsets]
+        expected = sorted(
+            (select_target(json.loads(line)) for line in lines),
+            key=lambda board: board["state"]["state_id"],
+        )
+        thawed = sorted(
+            (copy.deepcopy(board) for board in boards),
+            key=lambda board: board["state"]["state_id"],
+        )
+        self.assertEqual(thawed, expected)
+        self.assertIs(self.index.read(self.offsets[0]), boards[0])
+
+    def test_block_matrices_are_shared_within_a_board(self):
+        for offset in self.offsets:
+            matrices = dict()
+            for obj in self.index.read(offset)["state"]["objs"].values():
+                matrix = matrices.setdefault(obj["block_matrix"], obj["block_matrix"])
+                self.assertIs(obj["block_matrix"], matrix)
+
+    def test_dropped_boards_are_freed(self):
+        boards = [self.index.read(offset) for offset in self.offsets]
+        refs = [weakref.ref(board) for board in boards]
+        self.assertEqual(len(self.index.cache), len(boards))
+
+        del boards
+        gc.collect()
+        self.assertEqual(len(self.index.cache), 0)
+        self.assertTrue(all(ref() is None for ref in refs))
+
+
+if __name__ == "__main__":
+    unittest.main()
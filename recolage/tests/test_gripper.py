@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+# University of Potsdam
+"""GripperRecorder test cases."""
+
+import os
+import random
+import sys
+import time
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from recolage import golmi_client
+from recolage.golmi_client import GolmiClient, GripperRecorder, decode_trajectory
+
+
+def random_walk(rng, steps):
+    """Gripper positions of keyboard moves, often on the same cell."""
+    x, y = 12.5, 12.5
+    positions = list()
+    for _ in range(steps):
+        if rng.random() < 0.6:
+            x += rng.choice([-0.5, 0, 0.5])
+            y += rng.choice([-0.5, 0, 0.5])
+        positions.append((x, y))
+    return positions
+
+
+def updates(gripped=None, x=12.5, y=12.5):
+    return {"grippers": {"0": {"id_n": "0", "x": x, "y": y, "gripped": gripped}}}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return 1700000000 + self.now
+
+
+class TestGripperRecorder(unittest.TestCase):
+    def setUp(self):
+        self.logged = list()
+        self.clock = Clock()
+        patcher = mock.patch.object(golmi_client, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def recorder(self, interval=60):
+        recorder = GripperRecorder(self.logged.append, interval)
+        self.addCleanup(recorder.timer.cancel)
+        return recorder
+
+    def test_trajectory_round_trip(self):
+        for seed in range(30):
+            rng = random.Random(seed)
+            recorder = self.recorder()
+            self.logged.clear()
+            expected = list()
+            start = self.clock.now
+            for x, y in random_walk(rng, rng.randrange(1, 300)):
+                self.clock.now += rng.choice([0.03, 0.05, 0.1])
+                recorder.record(x, y)
+                if expected and expected[-1][1:3] == [x, y]:
+                    expected[-1][3] += 1
+                else:
+                    elapsed = round((self.clock.now - start) * 1000)
+                    expected.append([elapsed, x, y, 1])
+            recorder.flush("selection")
+
+            (trajectory,) = self.logged
+            self.assertEqual(trajectory["reason"], "selection")
+            points = decode_trajectory(trajectory)
+            # times are relative to the first position
+            first = expected[0][0]
+            self.assertEqual(
+                [[t - first, x, y, n] for t, x, y, n in expected],
+                [[t, x, y, n] for t, x, y, n in points],
+            )
+
+            count = sum(point[3] for point in points)
+            self.assertEqual(trajectory["updates"], count)
+            self.assertEqual(recorder.stats["suppressed"], count - 1)
+            self.assertEqual(recorder.stats["positions"], len(points))
+
+    def test_flush_without_movement(self):
+        recorder = self.recorder()
+        recorder.flush("board")
+        self.assertEqual(self.logged, [])
+        self.assertEqual(recorder.close(), {})
+
+    def test_unchanged_positions_are_one_move(self):
+        recorder = self.recorder()
+        for _ in range(50):
+            recorder.record(3.0, 4.5)
+        recorder.record(3.5, 4.5)
+        stats = recorder.close()
+        self.assertEqual(self.logged[0]["moves"], [[0, 0, 0, 49], [0.5, 0.0, 0, 0]])
+        self.assertEqual(self.logged[0]["reason"], "close")
+        self.assertEqual(
+            stats, {"updates": 51, "positions": 2, "events": 1, "suppressed": 50}
+        )
+
+
+class TestGolmiClientGripper(unittest.TestCase):
+    def client(self):
+        bot = mock.Mock(version="show_gripper")
+        client = GolmiClient(None, bot, "room")
+        self.addCleanup(client.recorder.timer.cancel)
+        return client, bot, client.socket.handlers["/"]["update_state"]
+
+    def test_interval(self):
+        client, bot, update_state = self.client()
+        client.recorder.timer.interval = 0.05
+        for x in range(20):
+            update_state(updates(x=x / 2))
+        self.assertEqual(bot.log_event.call_count, 0)
+
+        time.sleep(0.5)
+        bot.log_event.assert_called_once()
+        event, trajectory, room_id = bot.log_event.call_args.args
+        self.assertEqual((event, room_id), ("gripper_trajectory", "room"))
+        self.assertEqual(trajectory["reason"], "interval")
+        self.assertEqual(len(decode_trajectory(trajectory)), 20)
+
+    def test_selection_flushes_first(self):
+        client, bot, update_state = self.client()
+        for x in range(5):
+            update_state(updates(x=x))
+        piece = {"3": {"id_n": 3}}
+        update_state(updates(gripped=piece, x=4))
+
+        names = [call[0] for call in bot.method_calls]
+        self.assertEqual(names, ["log_event", "piece_selection"])
+        self.assertEqual(bot.log_event.call_args.args[1]["reason"], "selection")
+
+    def test_every_movement_without_interval(self):
+        with mock.patch.object(golmi_client, "GRIPPER_LOG_INTERVAL", 0):
+            bot = mock.Mock(version="show_gripper")
+            client = GolmiClient(None, bot, "room")
+        self.assertIsNone(client.recorder)
+        update_state = client.socket.handlers["/"]["update_state"]
+        for x in range(5):
+            update_state(updates(x=x))
+        self.assertEqual(
+            [call.args[0] for call in bot.log_event.call_args_list],
+            ["gripper_movement"] * 5,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+# University of Potsdam
+"""PieceIndex test cases, checked against the answers of a golmi stand-in."""
+
+import copy
+import json
+import os
+import random
+import sys
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from board_index import select_target
+from recolage.__main__ import RecolageBot, Session
+from recolage.config import BOARDS
+from recolage.golmi_client import GolmiClient, PieceIndex
+from recolage.shapes import scale
+
+ROOM = "room"
+GRIPPER = {"0": {"id_n": "0", "x": 3.0, "y": 4.5, "gripped": None}}
+
+
+def read_boards():
+    with BOARDS.open(encoding="utf-8") as infile:
+        return [select_target(json.loads(line)) for line in infile if line.strip()]
+
+
+class Answer:
+    def __init__(self, body):
+        self.ok = True
+        self.status_code = 200
+        self.body = body
+
+    def json(self):
+        return copy.deepcopy(self.body)
+
+
+class FakeGolmi:
+    """Answers the requests of a room from the objs_grid of its board,
+    as golmi does, and records them."""
+
+    def __init__(self, board):
+        self.config = board["config"]
+        self.state = board["state"]
+        self.requests = list()
+
+    def get(self, url):
+        path = url.split("/slurk/", 1)[1]
+        self.requests.append(path)
+        parts = path.split("/")
+        if parts == [ROOM, "state"]:
+            return Answer({**self.state, "grippers": GRIPPER})
+
+        _, x, y, block_size = parts
+        cell_size = float(block_size) / scale(self.config)
+        key = f"{int(float(y) // cell_size)}:{int(float(x) // cell_size)}"
+        stack = self.state["objs_grid"].get(key)
+        if not stack:
+            return Answer(dict())
+        return Answer({stack[-1]: self.state["objs"][stack[-1]]})
+
+
+def random_click(rng, config):
+    """Pixel coordinates of a click, also on the edges and outside."""
+    block_size = rng.choice([20, 28.8, 33.333333333333336, 40])
+    x = rng.uniform(-0.5, config["width"] + 0.5) * block_size
+    y = rng.uniform(-0.5, config["height"] + 0.5) * block_size
+    if rng.random() < 0.3:
+        # exactly on the border of a cell
+        x = rng.randrange(int(config["width"]) * 2) * block_size / 2
+    return x, y, block_size
+
+
+class TestPieceIndex(unittest.TestCase):
+    def setUp(self):
+        self.boards = read_boards()
+
+    def test_clicks_match_golmi(self):
+        rng = random.Random(0)
+        for board in self.boards:
+            golmi = FakeGolmi(board)
+            clicks = [random_click(rng, board["config"]) for _ in range(500)]
+            recorded = [
+                golmi.get(f"http://golmi/slurk/{ROOM}/{x}/{y}/{block_size}").json()
+                for x, y, block_size in clicks
+            ]
+
+            index = PieceIndex(board["state"], board["config"])
+            for (x, y, block_size), expected in zip(clicks, recorded):
+                self.assertEqual(index.piece(x, y, block_size), expected, (x, y))
+            self.assertTrue(any(recorded))
+
+    def test_every_cell_matches_golmi(self):
+        for board in self.boards:
+            golmi = FakeGolmi(board)
+            index = PieceIndex(board["state"], board["config"])
+            height, width = index.top.shape
+            for row in range(height):
+                for column in range(width):
+                    x, y = (column + 0.5) * 10, (row + 0.5) * 10
+                    expected = golmi.get(f"/slurk/{ROOM}/{x}/{y}/20").json()
+                    self.assertEqual(index.piece(x, y, 20), expected)
+
+    def test_moved_piece(self):
+        board = copy.deepcopy(self.boards[0])
+        index = PieceIndex(board["state"], board["config"])
+        self.assertFalse(index.moved(copy.deepcopy(board["state"]["objs"])))
+
+        moved = copy.deepcopy(board["state"]["objs"])
+        next(iter(moved.values()))["x"] += 1
+        self.assertTrue(index.moved(moved))
+
+
+class TestBotClicks(unittest.TestCase):
+    """The bot only asks golmi before a board is loaded."""
+
+    def setUp(self):
+        self.board = read_boards()[0]
+        self.golmi = FakeGolmi(self.board)
+
+        self.bot = RecolageBot.__new__(RecolageBot)
+        self.bot.golmi_server = "http://golmi"
+        self.bot.version = "show_gripper"
+        self.bot.log_event = mock.Mock()
+        session = Session.__new__(Session)
+        session.golmi_client = GolmiClient(None, self.bot, ROOM)
+        self.bot.sessions = {ROOM: session}
+        self.client = session.golmi_client
+
+        patcher = mock.patch("recolage.__main__.requests.get", self.golmi.get)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fallback_before_loading(self):
+        rng = random.Random(1)
+        for _ in range(50):
+            x, y, block_size = random_click(rng, self.board["config"])
+            self.bot.get_piece(ROOM, x, y, block_size)
+        self.assertEqual(len(self.golmi.requests), 50)
+        self.assertEqual(self.bot.get_grippers(ROOM), GRIPPER)
+        self.assertEqual(len(self.golmi.requests), 51)
+
+    def test_loaded_board_is_used(self):
+        with mock.patch.object(self.client.socket, "emit"):
+            self.client.load_config(self.board["config"])
+            self.client.load_state(copy.deepcopy(self.board["state"]))
+        self.client.grippers = GRIPPER
+
+        rng = random.Random(2)
+        clicks = [random_click(rng, self.board["config"]) for _ in range(200)]
+        recorded = [
+            self.golmi.get(f"/slurk/{ROOM}/{x}/{y}/{block_size}").json()
+            for x, y, block_size in clicks
+        ]
+        self.golmi.requests.clear()
+
+        for (x, y, block_size), expected in zip(clicks, recorded):
+            self.assertEqual(self.bot.get_piece(ROOM, x, y, block_size), expected)
+        self.assertEqual(self.bot.get_grippers(ROOM), GRIPPER)
+        self.assertEqual(self.golmi.requests, [])
+
+    def test_update_state_moves_pieces(self):
+        with mock.patch.object(self.client.socket, "emit"):
+            self.client.load_config(self.board["config"])
+            self.client.load_state(copy.deepcopy(self.board["state"]))
+        index = self.client.pieces
+        update_state = self.client.socket.handlers["/"]["update_state"]
+
+        state = copy.deepcopy(self.board["state"])
+        update_state({**state, "grippers": GRIPPER})
+        self.assertIs(self.client.pieces, index)
+        self.assertEqual(self.client.grippers, GRIPPER)
+
+        obj_id, obj = next(iter(state["objs"].items()))
+        obj["x"] += 1
+        update_state({**state, "grippers": GRIPPER})
+        self.assertIsNot(self.client.pieces, index)
+        self.assertEqual(self.client.pieces.objs[obj_id]["x"], obj["x"])
+
+    def test_update_state_without_gripper(self):
+        self.bot.version = "no_feedback"
+        client = GolmiClient(None, self.bot, ROOM)
+        with mock.patch.object(client.socket, "emit"):
+            client.load_config(self.board["config"])
+            client.load_state(copy.deepcopy(self.board["state"]))
+        update_state = client.socket.handlers["/"]["update_state"]
+
+        state = copy.deepcopy(self.board["state"])
+        obj_id, obj = next(iter(state["objs"].items()))
+        obj["x"] += 1
+        update_state({**state, "grippers": GRIPPER})
+        self.assertEqual(client.pieces.objs[obj_id]["x"], obj["x"])
+        self.assertEqual(client.grippers, GRIPPER)
+        self.bot.log_event.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
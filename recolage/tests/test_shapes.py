@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+# University of Potsdam
+"""ShapeTable, compact_board and expand_board test cases."""
+
+import copy
+import json
+import os
+from pathlib import Path
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+
+from board_index import BoardIndex, select_target
+from recolage.config import BOARDS
+from recolage.shapes import (
+    ShapeTable,
+    build_grid,
+    compact_board,
+    expand_board,
+    occupancy,
+)
+
+
+def read_boards():
+    with BOARDS.open(encoding="utf-8") as infile:
+        return [select_target(json.loads(line)) for line in infile if line.strip()]
+
+
+class TestShapes(unittest.TestCase):
+    def setUp(self):
+        self.boards = read_boards()
+        self.table = ShapeTable()
+
+    def test_round_trip(self):
+        for board in self.boards:
+            compact = compact_board(copy.deepcopy(board), self.table)
+            # through json, as the logs are read
+            compact = json.loads(json.dumps(compact))
+            self.assertEqual(expand_board(compact), board)
+
+    def test_compact_board(self):
+        board = self.boards[0]
+        compact = compact_board(board, self.table)
+        self.assertEqual(compact["derived_grids"], ["objs_grid"])
+        self.assertNotIn("objs_grid", compact["state"])
+        for obj in compact["state"]["objs"].values():
+            self.assertNotIn("block_matrix", obj)
+            self.assertIn(str(obj["shape"]), compact["shapes"])
+        self.assertLess(len(json.dumps(compact)), len(json.dumps(board)) / 2)
+        # the board itself is not changed
+        self.assertIn("objs_grid", board["state"])
+
+    def test_shapes_are_shared(self):
+        for board in self.boards:
+            compact_board(board, self.table)
+        self.assertEqual(len(self.table), 48)
+
+        obj = next(iter(self.boards[0]["state"]["objs"].values()))
+        shape_id = self.table.intern(obj)
+        self.assertEqual(self.table.intern(copy.deepcopy(obj)), shape_id)
+        self.assertEqual(self.table.block_matrix(shape_id), obj["block_matrix"])
+        self.assertNotEqual(self.table.intern({**obj, "rotation": -1}), shape_id)
+
+    def test_frozen_board(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / BOARDS.name
+            shutil.copy(BOARDS, path)
+            index = BoardIndex(path)
+            offset = index.boards()["easy"][0][0]
+            frozen = index.read(offset)
+
+        compact = json.loads(json.dumps(compact_board(frozen, self.table)))
+        self.assertEqual(expand_board(compact), copy.deepcopy(frozen))
+
+    def test_irregular_objects_are_kept(self):
+        board = copy.deepcopy(self.boards[0])
+        obj_id, obj = next(iter(board["state"]["objs"].items()))
+        obj["block_matrix"] = [[1, 1], [1]]
+        compact = compact_board(board, self.table)
+        self.assertEqual(compact["state"]["objs"][obj_id], obj)
+        self.assertEqual(compact["derived_grids"], [])
+        self.assertEqual(expand_board(compact), board)
+
+    def test_changed_grid_is_kept(self):
+        board = copy.deepcopy(self.boards[0])
+        board["state"]["objs_grid"].popitem()
+        compact = compact_board(board, self.table)
+        self.assertEqual(compact["derived_grids"], [])
+        self.assertEqual(expand_board(compact), board)
+
+    def test_occupancy(self):
+        for board in self.boards:
+            counts = occupancy(compact_board(board, self.table), self.table)
+            expected = counts.copy()
+            expected[:] = 0
+            for cell, stack in board["state"]["objs_grid"].items():
+                y, x = map(int, cell.split(":"))
+                expected[y, x] = len(stack)
+            self.assertTrue((counts == expected).all())
+
+    def test_occupancy_outside_board(self):
+        compact = compact_board(copy.deepcopy(self.boards[0]), self.table)
+        objs = list(compact["state"]["objs"].values())
+        objs[0]["x"] = -2
+        objs[1]["y"] = compact["config"]["height"] - 1
+        objs[2]["x"] = 100
+        counts = occupancy(compact, self.table)
+
+        grid = build_grid(compact["state"]["objs"], self.table, compact["config"])
+        expected = counts.copy()
+        expected[:] = 0
+        for cell, stack in grid.items():
+            y, x = map(int, cell.split(":"))
+            if 0 <= y < counts.shape[0] and 0 <= x < counts.shape[1]:
+                expected[y, x] = len(stack)
+        self.assertTrue((counts == expected).all())
+        self.assertEqual(counts.shape, (50, 50))
+
+
+if __name__ == "__main__":
+    unittest.main()
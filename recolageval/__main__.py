@@ -2,10 +2,9 @@ import logging
 import os
 import json
 from time import sleep
-from threading import Timer
 
 import requests
-from templates import TaskBot
+from templates import ScheduledTimer, TaskBot
 from .config import *
 from .golmi_client import *
 from .dataloader import Dataloader
@@ -19,12 +18,13 @@ class RoomTimer:
         self.start_timer()
 
     def start_timer(self):
-        self.timer = Timer(self.time * 60, self.function, args=[self.room_id])
+        self.timer = ScheduledTimer(
+            self.time * 60, self.function, args=[self.room_id]
+        )
         self.timer.start()
 
     def snooze(self):
-        self.timer.cancel()
-        self.start_timer()
+        self.timer.reset()
         logging.debug("snooze")
 
     def cancel(self):
@@ -91,7 +91,7 @@ class RecolagEval(TaskBot):
                         {**usr, "role": None, "status": "joined"}
                     )
 
-                response = requests.post(
+                response = self.http.post(
                     f"{self.uri}/users/{self.user}/rooms/{room_id}",
                     headers={"Authorization": f"Bearer {self.token}"},
                 )
@@ -117,7 +117,7 @@ class RecolagEval(TaskBot):
 
             if room_id in self.sessions:
                 # add description title
-                response = requests.patch(
+                response = self.http.patch(
                     f"{self.uri}/rooms/{room_id}/text/instr_title",
                     json={"text": "Please wait for the roles to be assigned"},
                     headers={"Authorization": f"Bearer {self.token}"},
@@ -154,16 +154,8 @@ class RecolagEval(TaskBot):
         def status(data):
             """Triggered if a user enters or leaves a room."""
             # check whether the user is eligible to join this task
-            task = requests.get(
-                f"{self.uri}/users/{data['user']['id']}/task",
-                headers={"Authorization": f"Bearer {self.token}"},
-            )
-            if not task.ok:
-                logging.error(
-                    f"Could not set task instruction title: {task.status_code}"
-                )
-                task.raise_for_status()
-            if not task.json() or task.json()["id"] != int(self.task_id):
+            task = self.api.get_user_task(data["user"]["id"])
+            if not task or task["id"] != int(self.task_id):
                 return
 
             room_id = data["room"]
@@ -334,52 +326,21 @@ class RecolagEval(TaskBot):
             "text",
             {"message": "The room is closing, see you next time 👋", "room": room_id},
         )
+        self.flush_logs()
         self.room_to_read_only(room_id)
 
         # clear session
         self.sessions.clear_session(room_id)
+        self.log_round_trips(room_id)
 
     def room_to_read_only(self, room_id):
         """Set room to read only."""
-        # set room to read-only
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "readonly", "value": "True"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            logging.error(f"Could not set room to read_only: {response.status_code}")
-            response.raise_for_status()
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "placeholder", "value": "This room is read-only"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            logging.error(f"Could not set room to read_only: {response.status_code}")
-            response.raise_for_status()
+        self.api.room_to_read_only(room_id)
 
         # remove user from room
         if room_id in self.sessions:
             for usr in self.sessions[room_id].players:
-                response = requests.get(
-                    f"{self.uri}/users/{usr['id']}",
-                    headers={"Authorization": f"Bearer {self.token}"},
-                )
-                if not response.ok:
-                    logging.error(f"Could not get user: {response.status_code}")
-                    response.raise_for_status()
-                etag = response.headers["ETag"]
-
-                response = requests.delete(
-                    f"{self.uri}/users/{usr['id']}/rooms/{room_id}",
-                    headers={"If-Match": etag, "Authorization": f"Bearer {self.token}"},
-                )
-                if not response.ok:
-                    logging.error(
-                        f"Could not remove user from task room: {response.status_code}"
-                    )
-                    response.raise_for_status()
+                self.api.remove_user_from_room(usr["id"], room_id)
                 logging.debug("Removing user from task room was successful.")
 
 
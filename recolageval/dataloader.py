@@ -1,7 +1,8 @@
 from itertools import cycle
-import json
 import random
 
+from board_index import BoardIndex
+
 
 class Dataloader(list):
     def __init__(self, path, n):
@@ -14,42 +15,23 @@ class Dataloader(list):
         images_per_level = self._n // 3
         sample = list()
         for level in cycle(["easy", "medium", "hard"]):
-            for index in random.sample(baords[level], images_per_level):
-                sample.append(index)
+            for offset, _ in random.sample(baords.get(level, []), images_per_level):
+                sample.append(offset)
 
                 if len(sample) == self._n:
                     return set(sample)
 
     def _read_board_file(self):
-        """read boards and divide by level"""
-        boards = dict(
-            easy=list(),
-            medium=list(),
-            hard=list()
-        )
-        with self._path.open('r', encoding="utf-8") as infile:
-            for i, line in enumerate(infile):
-                board = json.loads(line)
-                level = board["board_info"]["difficoulty"]
-
-                boards[level].append(i)
-
-        return boards
+        """offsets and state ids of the boards divided by level"""
+        return BoardIndex.get(self._path).boards()
 
     def get_boards(self):
         """sample random boards for a room"""
-        indeces = self._sample_boards()
-
-        with self._path.open('r', encoding="utf-8") as infile:
-            for i, line in enumerate(infile):
-                if i in indeces:
-                    board = json.loads(line)
-                    # select target
-                    state = board["state"]
-                    target_id = str(board["target"])
-                    target_obj = state["objs"][target_id]
-                    state["targets"][target_id] = target_obj
-
-                    self.append(board)
+        index = BoardIndex.get(self._path)
+        offsets = self._sample_boards()
+
+        # read the sampled boards in the order of the file
+        for offset in sorted(offsets):
+            self.append(index.read(offset))
 
         random.shuffle(self)
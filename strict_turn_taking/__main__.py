@@ -1,10 +1,7 @@
 import logging
 import random
-from threading import Timer
 
-import requests
-
-from templates import TaskBot
+from templates import ScheduledTimer, TaskBot
 
 
 TIMEOUT_TIMER = 60  # minutes
@@ -17,12 +14,13 @@ class RoomTimer:
         self.start_timer()
 
     def start_timer(self):
-        self.timer = Timer(TIMEOUT_TIMER * 60, self.function, args=[self.room_id])
+        self.timer = ScheduledTimer(
+            TIMEOUT_TIMER * 60, self.function, args=[self.room_id]
+        )
         self.timer.start()
 
     def reset(self):
-        self.timer.cancel()
-        self.start_timer()
+        self.timer.reset()
         logging.debug("reset timer")
 
     def cancel(self):
@@ -67,7 +65,7 @@ class StrictTurnTakingBot(TaskBot):
                 )
 
                 # make input field unresponsive
-                response = requests.patch(
+                response = self.http.patch(
                     f"{self.uri}/rooms/{room_id}/attribute/id/text",
                     json={
                         "attribute": "readonly",
@@ -76,7 +74,7 @@ class StrictTurnTakingBot(TaskBot):
                     },
                     headers={"Authorization": f"Bearer {self.token}"},
                 )
-                response = requests.patch(
+                response = self.http.patch(
                     f"{self.uri}/rooms/{room_id}/attribute/id/text",
                     json={
                         "attribute": "placeholder",
@@ -90,75 +88,21 @@ class StrictTurnTakingBot(TaskBot):
         self.room_to_read_only(room_id)
         self.timers_per_room.pop(room_id)
         self.users_per_room.pop(room_id)
+        self.log_round_trips(room_id)
 
     def set_message_privilege(self, user_id, value):
         """
         change user's permission to send messages
         """
-        # get permission_id based on user_id
-        response = requests.get(
-            f"{self.uri}/users/{user_id}/permissions",
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        self.request_feedback(response, "retrieving user's permissions")
-
-        permission_id = response.json()["id"]
-        requests.patch(
-            f"{self.uri}/permissions/{permission_id}",
-            json={"send_message": value},
-            headers={
-                "If-Match": response.headers["ETag"],
-                "Authorization": f"Bearer {self.token}",
-            },
-        )
-        self.request_feedback(response, "changing user's message permission")
+        self.api.set_message_privilege(user_id, value)
 
     def room_to_read_only(self, room_id):
         """Set room to read only."""
-        # set room to read-only by disabling the text input field
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "readonly", "value": "True"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        self.request_feedback(response, "Could not set room to read_only")
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "placeholder", "value": "This room is read-only"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        self.request_feedback(response, "Could not set room to read_only")
+        self.api.room_to_read_only(room_id)
 
-        # get users in this room
-        response = requests.get(
-            f"{self.uri}/rooms/{room_id}/users",
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            logging.error(f"Could not get user: {response.status_code}")
-
-        users = response.json()
-        for user in users:
+        for user in self.api.get_room_users(room_id):
             if user["id"] != self.user:
-                # get current user
-                response = requests.get(
-                    f"{self.uri}/users/{user['id']}",
-                    headers={"Authorization": f"Bearer {self.token}"},
-                )
-                self.request_feedback(
-                    response, f"Could not get user: {response.status_code}"
-                )
-                etag = response.headers["ETag"]
-
-                # remove this user from this room
-                response = requests.delete(
-                    f"{self.uri}/users/{user['id']}/rooms/{room_id}",
-                    headers={"If-Match": etag, "Authorization": f"Bearer {self.token}"},
-                )
-                self.request_feedback(
-                    response,
-                    f"Could not remove user from task room: {response.status_code}",
-                )
+                self.api.remove_user_from_room(user["id"], room_id)
                 logging.debug("Removing user from task room was successful.")
 
     def register_callbacks(self):
@@ -179,7 +123,7 @@ class StrictTurnTakingBot(TaskBot):
 
             # revoke writing rights to current user
             self.set_message_privilege(curr_usr["id"], False)
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.uri}/rooms/{room_id}/attribute/id/text",
                 json={
                     "attribute": "readonly",
@@ -188,7 +132,7 @@ class StrictTurnTakingBot(TaskBot):
                 },
                 headers={"Authorization": f"Bearer {self.token}"},
             )
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.uri}/rooms/{room_id}/attribute/id/text",
                 json={
                     "attribute": "placeholder",
@@ -200,7 +144,7 @@ class StrictTurnTakingBot(TaskBot):
 
             # assign writing rights to other user
             self.set_message_privilege(other_usr["id"], True)
-            response = requests.delete(
+            response = self.http.delete(
                 f"{self.uri}/rooms/{room_id}/attribute/id/text",
                 json={
                     "attribute": "readonly",
@@ -209,7 +153,7 @@ class StrictTurnTakingBot(TaskBot):
                 },
                 headers={"Authorization": f"Bearer {self.token}"},
             )
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.uri}/rooms/{room_id}/attribute/id/text",
                 json={
                     "attribute": "placeholder",
@@ -1,8 +1,6 @@
 from collections import defaultdict
 import logging
-from threading import Timer
 
-import requests
 from time import sleep
 import random
 import os
@@ -22,7 +20,7 @@ EN_STEMMER = SnowballStemmer("english")
 from taboo.dataloader import Dataloader
 from taboo.config import EXPLAINER_PROMPT, GUESSER_PROMPT, LEVEL_WORDS, WORDS_PER_ROOM, COLOR_MESSAGE, STANDARD_COLOR, \
     STARTING_POINTS, TIMEOUT_TIMER, LEAVE_TIMER, WAITING_PARTNER_TIMER
-from templates import TaskBot
+from templates import ScheduledTimer, TaskBot
 
 LOG = logging.getLogger(__name__)
 
@@ -138,7 +136,7 @@ class TabooBot(TaskBot):
                 )
 
             # join the newly created room
-            response = requests.post(
+            response = self.http.post(
                 f"{self.uri}/users/{self.user}/rooms/{room_id}",
                 headers={"Authorization": f"Bearer {self.token}"},
             )
@@ -198,14 +196,8 @@ class TabooBot(TaskBot):
             """Triggered when a user enters or leaves a room."""
             LOG.debug(f"Triggered status: {data['user']} did {data['type']} the room {data['room']}")
             # check whether the user is eligible to join this task
-            task = requests.get(
-                f"{self.uri}/users/{data['user']['id']}/task",
-                headers={"Authorization": f"Bearer {self.token}"},
-            )
-            if not task.ok:
-                LOG.error(f"Could not set task instruction title: {task.status_code}")
-                task.raise_for_status()
-            if not task.json() or task.json()["id"] != int(self.task_id):
+            task = self.api.get_user_task(data["user"]["id"])
+            if not task or task["id"] != int(self.task_id):
                 return
 
             room_id = data["room"]
@@ -222,7 +214,7 @@ class TabooBot(TaskBot):
                     self.waiting_timer.cancel()
                 if data["type"] == "join":
                     LOG.debug("Waiting Timer started.")
-                    self.waiting_timer = Timer(
+                    self.waiting_timer = ScheduledTimer(
                         WAITING_PARTNER_TIMER * 60,
                         self._no_partner,
                         args=[room_id, data["user"]["id"]],
@@ -277,7 +269,7 @@ class TabooBot(TaskBot):
                             if self.sessions[room_id].timer:
                                 self.sessions[room_id].timer.cancel()
                             LOG.debug("Start timer: user left")
-                            self.sessions[room_id].left_room_timer[curr_usr["id"]] = Timer(
+                            self.sessions[room_id].left_room_timer[curr_usr["id"]] = ScheduledTimer(
                                 LEAVE_TIMER * 60, self.user_did_not_rejoin,
                                 args=[room_id],
                             )
@@ -311,8 +303,9 @@ class TabooBot(TaskBot):
                 # Reset timer
                 LOG.debug("Reset timeout timer after sending command")
                 if this_session.timer:
-                    this_session.timer.cancel()
-                self.start_timeout_timer(room_id)
+                    this_session.timer.reset()
+                else:
+                    self.start_timeout_timer(room_id)
 
             if isinstance(data["command"], dict):
                 # commands from interface
@@ -552,8 +545,9 @@ class TabooBot(TaskBot):
                 # Reset timer
                 LOG.debug("Reset timeout timer after sending message")
                 if this_session.timer:
-                    this_session.timer.cancel()
-                self.start_timeout_timer(room_id)
+                    this_session.timer.reset()
+                else:
+                    self.start_timeout_timer(room_id)
 
     def _command_ready(self, room_id, user_id):
         """Must be sent to begin a conversation."""
@@ -720,7 +714,7 @@ class TabooBot(TaskBot):
             )
 
     def start_timeout_timer(self, room_id):
-        timer = Timer(
+        timer = ScheduledTimer(
             TIMEOUT_TIMER * 60, self.timeout_close_game, args=[room_id]
         )
         timer.start()
@@ -759,14 +753,14 @@ class TabooBot(TaskBot):
         LOG.debug('Triggered _no_partner')
 
         # get layout_id
-        response = requests.get(
+        response = self.http.get(
             f"{self.uri}/tasks/{self.task_id}",
             headers={"Authorization": f"Bearer {self.token}"},
         )
         layout_id = response.json()["layout_id"]
 
         # create a new task room for this user
-        room = requests.post(
+        room = self.http.post(
             f"{self.uri}/rooms",
             headers={"Authorization": f"Bearer {self.token}"},
             json={"layout_id": layout_id},
@@ -777,7 +771,7 @@ class TabooBot(TaskBot):
         self.remove_user_from_room(user_id, self.waiting_room)
 
         # move user to new task room
-        response = requests.post(
+        response = self.http.post(
             f"{self.uri}/users/{user_id}/rooms/{room['id']}",
             headers={"Authorization": f"Bearer {self.token}"},
         )
@@ -827,25 +821,8 @@ class TabooBot(TaskBot):
         self.close_game(room_id)
 
     def remove_user_from_room(self, user_id, room_id):
-        response = requests.get(
-            f"{self.uri}/users/{user_id}",
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            logging.error(f"Could not get user: {response.status_code}")
-            response.raise_for_status()
-        etag = response.headers["ETag"]
-
         try:
-            response = requests.delete(
-                f"{self.uri}/users/{user_id}/rooms/{room_id}",
-                headers={"If-Match": etag, "Authorization": f"Bearer {self.token}"},
-            )
-            if not response.ok:
-                LOG.error(
-                    f"Could not remove user from task room: {response.status_code}"
-                )
-                response.raise_for_status()
+            self.api.remove_user_from_room(user_id, room_id)
             LOG.debug("Removing user from task room was successful.")
         except:
             LOG.debug(f"User {user_id} not in room {room_id}")
@@ -862,9 +839,11 @@ class TabooBot(TaskBot):
                 }
             )
             self.sessions[room_id].set_game_over(True)
+        self.flush_logs()
         self.room_to_read_only(room_id)
         # remove any task room specific objects
         self.sessions.clear_session(room_id)
+        self.log_round_trips(room_id)
 
     def update_reward(self, room_id, reward):
         score = self.sessions[room_id].points["score"]
@@ -882,7 +861,7 @@ class TabooBot(TaskBot):
         elif reward == 1:
             correct += 1
 
-        response = requests.patch(
+        response = self.http.patch(
             f"{self.uri}/rooms/{room_id}/text/title",
             json={
                 "text": f"Score: {score} 🏆 | Correct: {correct} ✅ | Wrong: {wrong} ❌"
@@ -899,25 +878,11 @@ class TabooBot(TaskBot):
 
         # remove any task room specific objects
         self.sessions.clear_session(room_id)
+        self.log_round_trips(room_id)
 
     def room_to_read_only(self, room_id):
         """Set room to read only."""
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "readonly", "value": "True"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            LOG.error(f"Could not set room to read_only: {response.status_code}")
-            response.raise_for_status()
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "placeholder", "value": "This room is read-only"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            LOG.error(f"Could not set room to read_only: {response.status_code}")
-            response.raise_for_status()
+        self.api.room_to_read_only(room_id)
 
     def send_message_to_user(self, message, room, receiver=None):
         if receiver:
@@ -936,7 +901,7 @@ class TabooBot(TaskBot):
         this_session = self.sessions[room_id]
 
         # Send explainer_ instructions to explainer
-        response = requests.patch(
+        response = self.http.patch(
             f"{self.uri}/rooms/{room_id}/text/instr_title",
             json={
                 "text": "Explain the taboo word",
@@ -948,7 +913,7 @@ class TabooBot(TaskBot):
             LOG.error(f"Could not set task instruction title: {response.status_code}")
             response.raise_for_status()
 
-        response = requests.patch(
+        response = self.http.patch(
             f"{self.uri}/rooms/{room_id}/text/instr",
             json={"text": f"{EXPLAINER_PROMPT}", "receiver_id": this_session.explainer},
             headers={"Authorization": f"Bearer {self.token}"},
@@ -958,7 +923,7 @@ class TabooBot(TaskBot):
             response.raise_for_status()
 
         # Send guesser_instructions to guesser
-        response = requests.patch(
+        response = self.http.patch(
             f"{self.uri}/rooms/{room_id}/text/instr_title",
             json={"text": "Guess the taboo word", "receiver_id": this_session.guesser},
             headers={"Authorization": f"Bearer {self.token}"},
@@ -967,7 +932,7 @@ class TabooBot(TaskBot):
             LOG.error(f"Could not set task instruction title: {response.status_code}")
             response.raise_for_status()
 
-        response = requests.patch(
+        response = self.http.patch(
             f"{self.uri}/rooms/{room_id}/text/instr",
             json={"text": f"{GUESSER_PROMPT}", "receiver_id": this_session.guesser},
             headers={"Authorization": f"Bearer {self.token}"},
@@ -980,26 +945,10 @@ class TabooBot(TaskBot):
         """
         change user's permission to send messages
         """
-        # get permission_id based on user_id
-        response = requests.get(
-            f"{self.uri}/users/{user_id}/permissions",
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        self.request_feedback(response, "retrieving user's permissions")
-
-        permission_id = response.json()["id"]
-        requests.patch(
-            f"{self.uri}/permissions/{permission_id}",
-            json={"send_message": value},
-            headers={
-                "If-Match": response.headers["ETag"],
-                "Authorization": f"Bearer {self.token}",
-            },
-        )
-        self.request_feedback(response, "changing user's message permission")
+        self.api.set_message_privilege(user_id, value)
 
     def make_input_field_unresponsive(self, room_id, user_id):
-        response = requests.patch(
+        response = self.http.patch(
             f"{self.uri}/rooms/{room_id}/attribute/id/text",
             json={
                 "attribute": "readonly",
@@ -1008,7 +957,7 @@ class TabooBot(TaskBot):
             },
             headers={"Authorization": f"Bearer {self.token}"},
         )
-        response = requests.patch(
+        response = self.http.patch(
             f"{self.uri}/rooms/{room_id}/attribute/id/text",
             json={
                 "attribute": "placeholder",
@@ -1019,7 +968,7 @@ class TabooBot(TaskBot):
         )
 
     def give_writing_rights(self, room_id, user_id):
-        response = requests.delete(
+        response = self.http.delete(
             f"{self.uri}/rooms/{room_id}/attribute/id/text",
             json={
                 "attribute": "readonly",
@@ -1028,7 +977,7 @@ class TabooBot(TaskBot):
             },
             headers={"Authorization": f"Bearer {self.token}"},
         )
-        response = requests.patch(
+        response = self.http.patch(
             f"{self.uri}/rooms/{room_id}/attribute/id/text",
             json={
                 "attribute": "placeholder",
@@ -2,21 +2,731 @@
 
 from abc import ABC, abstractmethod
 import argparse
+import asyncio
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import itertools
+import json
 import logging
 import os
+import queue
+import threading
+import time
 
 import requests  # NOQA
+from requests.adapters import HTTPAdapter
 import socketio
+from urllib3.util.retry import Retry
+
+try:
+    import aiohttp
+except ImportError:  # only required by the asyncio based bots
+    aiohttp = None
 
 
 # limit logging of every http call, comment to allow more logging
 logging.getLogger("urllib3").setLevel(logging.WARNING)
 
 
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter applying a default timeout to every request
+    that does not specify one explicitly.
+    """
+
+    def __init__(self, *args, timeout=None, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def create_http_session(
+    token=None, pool_size=10, retries=3, backoff_factor=0.3, timeout=10
+):
+    """Create a keep-alive http session with a connection pool.
+    Connections to the same host are reused across calls instead of
+    opening a new TCP/TLS connection for every request.
+    :param token: slurk token added as `Authorization` header, if given
+    :type token: str
+    :param pool_size: Number of connections kept alive per host
+    :type pool_size: int
+    :param retries: How often failed connections, idempotent requests
+        and 502/503/504 responses are retried
+    :type retries: int
+    :param backoff_factor: Exponential backoff between retries in seconds
+    :type backoff_factor: float
+    :param timeout: Default timeout for every request in seconds
+    :type timeout: float
+    :return: Configured session
+    :rtype: requests.Session
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(502, 503, 504),
+        raise_on_status=False,
+    )
+    adapter = TimeoutHTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=retry,
+        timeout=timeout,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if token is not None:
+        session.headers["Authorization"] = f"Bearer {token}"
+    return session
+
+
+class SlurkApi:
+    """Client for the slurk REST api shared by all bots.
+
+    Every request is counted per action and, if a room is given,
+    per room, so the round-trips of a room lifecycle can be inspected.
+    ETags of users and permissions are cached: conditional requests
+    reuse the last known ETag and only fetch the resource again if
+    the server rejects it.
+    """
+
+    def __init__(self, uri, session):
+        """
+        :param uri: Base url of the api, e.g. `http://localhost/slurk/api`
+        :type uri: str
+        :param session: Session used to perform the requests
+        :type session: requests.Session
+        """
+        self.uri = uri
+        self.session = session
+        self.etags = dict()
+        self.permissions = dict()
+        self.calls = Counter()
+        self.room_calls = Counter()
+        # optional `UserTaskCache` consulted by `get_user_task`
+        self.task_cache = None
+
+    def request(self, method, path, action, room_id=None, **kwargs):
+        """Perform a single round-trip to the api.
+        :param method: http method
+        :type method: str
+        :param path: Path relative to the api base url
+        :type path: str
+        :param action: Name of the operation, used as counter key
+        :type action: str
+        :param room_id: Room the request is performed for, if any
+        :type room_id: int
+        :rtype: requests.models.Response
+        """
+        self.calls[action] += 1
+        if room_id is not None:
+            self.room_calls[room_id] += 1
+        return self.session.request(method, f"{self.uri}/{path}", **kwargs)
+
+    def round_trips(self, room_id):
+        """Number of requests performed for a room so far."""
+        return self.room_calls[room_id]
+
+    def forget_room(self, room_id):
+        """Drop the counter of a closed room and return its value."""
+        return self.room_calls.pop(room_id, 0)
+
+    def _remember_etag(self, resource, response):
+        etag = response.headers.get("ETag")
+        if response.ok and etag is not None:
+            self.etags[resource] = etag
+        else:
+            # the resource may have changed, the old tag is not reliable
+            self.etags.pop(resource, None)
+
+    def fetch_etag(self, resource, room_id=None):
+        """Retrieve the current ETag of a resource and cache it.
+        :param resource: Path of the resource, e.g. `users/1`
+        :type resource: str
+        """
+        response = self.request(
+            "GET", resource, f"get_{resource.split('/')[0].rstrip('s')}", room_id
+        )
+        Bot.request_feedback(response, f"retrieving {resource}")
+        self._remember_etag(resource, response)
+        return response.headers["ETag"]
+
+    def conditional_request(
+        self, method, path, resource, action, room_id=None, **kwargs
+    ):
+        """Perform a request guarded by the ETag of `resource`.
+        The cached ETag is tried first, the resource is only fetched
+        if no ETag is cached or the cached one is outdated.
+        """
+        headers = kwargs.pop("headers", dict())
+        etag = self.etags.get(resource)
+        if etag is not None:
+            response = self.request(
+                method,
+                path,
+                action,
+                room_id,
+                headers={**headers, "If-Match": etag},
+                **kwargs,
+            )
+            # 412: precondition failed, the cached ETag is outdated
+            if response.status_code != 412:
+                self._remember_etag(resource, response)
+                return response
+
+        etag = self.fetch_etag(resource, room_id)
+        response = self.request(
+            method,
+            path,
+            action,
+            room_id,
+            headers={**headers, "If-Match": etag},
+            **kwargs,
+        )
+        self._remember_etag(resource, response)
+        return response
+
+    def get_user(self, user_id):
+        """Retrieve a user and cache its ETag.
+        :rtype: dict
+        """
+        response = self.request("GET", f"users/{user_id}", "get_user")
+        Bot.request_feedback(response, "getting user")
+        self._remember_etag(f"users/{user_id}", response)
+        return response.json()
+
+    def get_user_task(self, user_id):
+        """Retrieve the task assigned to a user.
+        Answered from `task_cache` if the task is cached.
+        :return: The task or `None` if the user has no task
+        :rtype: dict
+        """
+        if self.task_cache is not None:
+            cached, task = self.task_cache.get(user_id)
+            if cached:
+                return task
+
+        response = self.request("GET", f"users/{user_id}/task", "get_user_task")
+        Bot.request_feedback(response, "getting user task")
+        task = response.json()
+        if self.task_cache is not None:
+            self.task_cache.put(user_id, task)
+        return task
+
+    def rename_user(self, user_id, name, room_id=None):
+        response = self.conditional_request(
+            "PATCH",
+            f"users/{user_id}",
+            f"users/{user_id}",
+            "rename_user",
+            room_id,
+            json={"name": name},
+        )
+        Bot.request_feedback(response, "renaming user")
+
+    def join_room(self, user_id, room_id):
+        response = self.request(
+            "POST", f"users/{user_id}/rooms/{room_id}", "join_room", room_id
+        )
+        Bot.request_feedback(response, "letting user join room")
+        self._remember_etag(f"users/{user_id}", response)
+
+    def remove_user_from_room(self, user_id, room_id):
+        response = self.conditional_request(
+            "DELETE",
+            f"users/{user_id}/rooms/{room_id}",
+            f"users/{user_id}",
+            "remove_user_from_room",
+            room_id,
+        )
+        Bot.request_feedback(response, "removing user from room")
+
+    def get_room_users(self, room_id):
+        """
+        :rtype: list
+        """
+        response = self.request(
+            "GET", f"rooms/{room_id}/users", "get_room_users", room_id
+        )
+        Bot.request_feedback(response, "getting users of room")
+        return response.json()
+
+    def set_attribute(self, room_id, element_id, attribute, value, receiver_id=None):
+        """Set an html attribute of an element in the room layout."""
+        receiver = {"receiver_id": receiver_id} if receiver_id is not None else {}
+        response = self.request(
+            "PATCH",
+            f"rooms/{room_id}/attribute/id/{element_id}",
+            "set_attribute",
+            room_id,
+            json={"attribute": attribute, "value": value, **receiver},
+        )
+        Bot.request_feedback(response, f"setting {attribute} of {element_id}")
+
+    def set_text(self, room_id, element_id, text, receiver_id=None):
+        """Set the text of an element in the room layout."""
+        receiver = {"receiver_id": receiver_id} if receiver_id is not None else {}
+        response = self.request(
+            "PATCH",
+            f"rooms/{room_id}/text/{element_id}",
+            "set_text",
+            room_id,
+            json={"text": text, **receiver},
+        )
+        Bot.request_feedback(response, f"setting text of {element_id}")
+
+    def room_to_read_only(self, room_id, status_message="This room is read-only"):
+        """Disable the text input field of a room."""
+        self.set_attribute(room_id, "text", "readonly", "True")
+        self.set_attribute(room_id, "text", "placeholder", status_message)
+
+    def set_message_privilege(self, user_id, value):
+        """Change a user's permission to send messages.
+        The permission id is cached, so after the first call
+        only the PATCH request is needed.
+        """
+        permission_id = self.permissions.get(user_id)
+        if permission_id is None:
+            response = self.request(
+                "GET", f"users/{user_id}/permissions", "get_permissions"
+            )
+            Bot.request_feedback(response, "retrieving user's permissions")
+            permission_id = response.json()["id"]
+            self.permissions[user_id] = permission_id
+            self._remember_etag(f"permissions/{permission_id}", response)
+
+        response = self.conditional_request(
+            "PATCH",
+            f"permissions/{permission_id}",
+            f"permissions/{permission_id}",
+            "set_message_privilege",
+            json={"send_message": value},
+        )
+        Bot.request_feedback(response, "changing user's message permission")
+
+    def log_event(self, event, data, room_id):
+        response = self.request(
+            "POST",
+            "logs",
+            "log_event",
+            room_id,
+            json={"event": event, "room_id": room_id, "data": data},
+        )
+        Bot.request_feedback(response, event)
+
+
+class UserTaskCache:
+    """Tasks of users, each kept for `ttl` seconds.
+
+    Every status event is only relevant to the bot of the user's task,
+    so without a cache every join or leave costs a request in every
+    running bot. Users without a task are cached as `None`.
+    """
+
+    def __init__(self, ttl=300):
+        """
+        :param ttl: Seconds a task is used before it is requested
+            again, `None` keeps tasks until they are invalidated
+        :type ttl: float
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # user id -> (task, time of caching)
+        self._tasks = dict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def get(self, user_id):
+        """Look up the task of a user.
+        :return: Whether the task is cached and the task
+        :rtype: tuple
+        """
+        with self._lock:
+            entry = self._tasks.get(user_id)
+            if entry is not None:
+                task, cached = entry
+                if self.ttl is None or time.monotonic() - cached < self.ttl:
+                    self.hits += 1
+                    return True, task
+                del self._tasks[user_id]
+            self.misses += 1
+            return False, None
+
+    def put(self, user_id, task):
+        with self._lock:
+            self._tasks[user_id] = (task, time.monotonic())
+
+    def invalidate(self, user_id=None):
+        """Forget the task of a user or, without `user_id`, of all users."""
+        with self._lock:
+            if user_id is None:
+                self._tasks.clear()
+            else:
+                self._tasks.pop(user_id, None)
+
+    def stats(self):
+        """Hits, misses and number of cached users."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._tasks)}
+
+
+class LogShipper:
+    """Ships log events to slurk from a background thread.
+
+    Events are serialized when they are queued, so callers may keep
+    mutating the logged data. The worker sends a batch as soon as
+    `batch_size` events are queued or the oldest queued event waited
+    `flush_interval` seconds. Batches are sent in one request to
+    `bulk_path`; if the server does not offer this endpoint, bulk mode
+    is switched off and every event is posted on its own.
+    If the queue is full the caller sends the event synchronously,
+    which slows down the producer instead of losing logs.
+    """
+
+    # responses meaning that the server has no bulk endpoint
+    NO_BULK_ENDPOINT = {400, 404, 405, 422}
+
+    def __init__(
+        self,
+        api,
+        batch_size=50,
+        flush_interval=0.5,
+        max_queue=10000,
+        bulk_path="logs/bulk",
+    ):
+        """
+        :param api: Client used to post the events
+        :type api: SlurkApi
+        :param batch_size: Maximal number of events per request
+        :type batch_size: int
+        :param flush_interval: Seconds an event waits at most in the queue
+        :type flush_interval: float
+        :param max_queue: Number of events buffered before producers block
+        :type max_queue: int
+        :param bulk_path: Api path accepting a list of events, `None`
+            disables bulk mode
+        :type bulk_path: str
+        """
+        self.api = api
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.bulk_path = bulk_path
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.stats = Counter()
+        self.max_depth = 0
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def depth(self):
+        """Number of events waiting to be shipped."""
+        return self.queue.qsize()
+
+    def put(self, event, data, room_id):
+        """Queue an event for shipping."""
+        item = json.dumps({"event": event, "room_id": room_id, "data": data})
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            # backpressure: ship in the caller's thread
+            self.stats["overflow"] += 1
+            self._ship_single(item)
+            return
+
+        self.stats["queued"] += 1
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    def flush(self, timeout=None):
+        """Block until all events queued so far have been shipped.
+        :return: `True` if everything was shipped in time
+        :rtype: bool
+        """
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        """Ship all pending events and stop the worker."""
+        self.queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        batch = list()
+        deadline = None
+        while True:
+            timeout = None
+            if batch:
+                timeout = max(0, deadline - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                # the oldest event waited long enough
+                self._ship(batch)
+                batch = list()
+                continue
+
+            if item is None or isinstance(item, threading.Event):
+                self._ship(batch)
+                batch = list()
+                if item is None:
+                    return
+                item.set()
+                continue
+
+            if not batch:
+                deadline = time.monotonic() + self.flush_interval
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._ship(batch)
+                batch = list()
+
+    def _ship(self, batch):
+        if not batch:
+            return
+
+        if self.bulk_path is not None and len(batch) > 1:
+            try:
+                response = self.api.request(
+                    "POST",
+                    self.bulk_path,
+                    "log_bulk",
+                    data=f"[{','.join(batch)}]",
+                    headers={"Content-Type": "application/json"},
+                )
+            except requests.exceptions.RequestException as error:
+                logging.error(f"Could not ship {len(batch)} log events: {error}")
+                self.stats["failed"] += len(batch)
+                return
+
+            if response.ok:
+                self.stats["bulk_requests"] += 1
+                self.stats["shipped"] += len(batch)
+                return
+
+            if response.status_code not in self.NO_BULK_ENDPOINT:
+                logging.error(f"Could not ship log events: {response.status_code}")
+                self.stats["failed"] += len(batch)
+                return
+
+            logging.info("Bulk log endpoint not available, posting events one by one")
+            self.bulk_path = None
+
+        for item in batch:
+            self._ship_single(item)
+
+    def _ship_single(self, item):
+        try:
+            response = self.api.request(
+                "POST",
+                "logs",
+                "log_event",
+                data=item,
+                headers={"Content-Type": "application/json"},
+            )
+        except requests.exceptions.RequestException as error:
+            logging.error(f"Could not ship log event: {error}")
+            self.stats["failed"] += 1
+            return
+
+        if not response.ok:
+            logging.error(f"Could not ship log event: {response.status_code}")
+            self.stats["failed"] += 1
+            return
+        self.stats["single_requests"] += 1
+        self.stats["shipped"] += 1
+
+
+class TimerScheduler:
+    """Runs the timers of a process on one scheduler thread.
+
+    Timers are kept in a heap ordered by deadline. Cancelling, resetting
+    and snoozing only update the timer: a timer whose deadline moved
+    back is pushed again once its old heap entry comes due, a cancelled
+    one is dropped at that point. Due callbacks are run by a small pool
+    of worker threads, so a slow callback does not delay other timers.
+    """
+
+    _default = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, workers=8):
+        """
+        :param workers: Number of threads running due callbacks
+        :type workers: int
+        """
+        self._heap = list()
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="timer"
+        )
+        self.stats = Counter()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def default(cls):
+        """Scheduler shared by all timers that do not name one."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def __len__(self):
+        """Number of entries in the heap, including outdated ones."""
+        return len(self._heap)
+
+    def schedule(self, timer, deadline):
+        """(Re)schedule `timer` to fire at `deadline`."""
+        with self._condition:
+            timer._deadline = deadline
+            timer._cancelled = False
+            queued = timer._entry
+            if queued is not None and queued[0] <= deadline:
+                # postponed: the entry is pushed again when it comes due
+                self.stats["postponed"] += 1
+                return
+
+            entry = [deadline, next(self._sequence), timer]
+            timer._entry = entry
+            heapq.heappush(self._heap, entry)
+            self.stats["scheduled"] += 1
+            if self._heap[0] is entry:
+                self._condition.notify()
+
+    def cancel(self, timer):
+        with self._condition:
+            timer._cancelled = True
+            self.stats["cancelled"] += 1
+
+    def _next_due(self):
+        """Wait for and pop the next timer that has to fire."""
+        with self._condition:
+            while True:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+
+                deadline, _, timer = self._heap[0]
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+
+                entry = heapq.heappop(self._heap)
+                if timer._entry is not entry:
+                    # superseded by an entry with an earlier deadline
+                    continue
+                timer._entry = None
+                if timer._cancelled:
+                    continue
+                if timer._deadline > deadline:
+                    entry = [timer._deadline, next(self._sequence), timer]
+                    timer._entry = entry
+                    heapq.heappush(self._heap, entry)
+                    continue
+
+                timer._running += 1
+                self.stats["fired"] += 1
+                return timer
+
+    def _run(self):
+        while True:
+            timer = self._next_due()
+            self._executor.submit(timer._fire)
+
+
+class ScheduledTimer:
+    """Replacement for `threading.Timer` on a shared `TimerScheduler`.
+
+    Keeps the `start`, `cancel` and `is_alive` interface of
+    `threading.Timer` and adds `reset` and `snooze`, which restart or
+    extend the countdown without creating a new timer.
+    """
+
+    def __init__(self, interval, function, args=None, kwargs=None, scheduler=None):
+        """
+        :param interval: Seconds until `function` is called
+        :type interval: float
+        :param function: Called with `args` and `kwargs` once due
+        :type function: callable
+        :param scheduler: Scheduler to run on, the shared default if omitted
+        :type scheduler: TimerScheduler
+        """
+        self.interval = interval
+        self.function = function
+        self.args = args if args is not None else []
+        self.kwargs = kwargs if kwargs is not None else {}
+        self.scheduler = scheduler or TimerScheduler.default()
+
+        # maintained by the scheduler
+        self._deadline = None
+        self._entry = None
+        self._cancelled = False
+        self._running = 0
+
+    def start(self):
+        self.scheduler.schedule(self, time.monotonic() + self.interval)
+
+    def cancel(self):
+        self.scheduler.cancel(self)
+
+    def reset(self, interval=None):
+        """Restart the countdown, also if the timer already fired.
+        :param interval: New interval in seconds, if it changes
+        :type interval: float
+        """
+        if interval is not None:
+            self.interval = interval
+        self.start()
+
+    def snooze(self, seconds):
+        """Delay a pending timer by `seconds`."""
+        if self._deadline is None:
+            return
+        self.scheduler.schedule(self, self._deadline + seconds)
+
+    def remaining(self):
+        """Seconds until the timer fires, `None` if it is not pending."""
+        if not self.is_pending():
+            return None
+        return max(0, self._deadline - time.monotonic())
+
+    def is_pending(self):
+        return self._entry is not None and not self._cancelled
+
+    def is_alive(self):
+        """`True` while the timer is pending or its function runs."""
+        return self.is_pending() or self._running > 0
+
+    def _fire(self):
+        try:
+            self.function(*self.args, **self.kwargs)
+        except Exception:
+            logging.exception(f"Timer callback {self.function} failed")
+        finally:
+            with self.scheduler._condition:
+                self._running -= 1
+
+
 class Bot(ABC):
     # set logger=True for extensive logging of events
     sio = socketio.Client(logger=False)
 
+    # configuration of the pooled http session used for every REST call
+    http_pool_size = 10
+    http_retries = 3
+    http_backoff_factor = 0.3
+    http_timeout = 10
+
     def __init__(self, token, user, host, port):
         """Serves as a template for bots.
         :param token: A universally unique identifier (UUID);
@@ -40,6 +750,15 @@ class Bot(ABC):
         self.uri += "/slurk/api"
         logging.info(f"Running {self.__class__.__name__} on {self.uri} with token: {self.token} ...")
 
+        self.http = create_http_session(
+            self.token,
+            pool_size=self.http_pool_size,
+            retries=self.http_retries,
+            backoff_factor=self.http_backoff_factor,
+            timeout=self.http_timeout,
+        )
+        self.api = SlurkApi(self.uri, self.http)
+
         self.register_callbacks()
 
     @abstractmethod
@@ -55,6 +774,11 @@ class Bot(ABC):
             namespaces="/",
         )
         self.sio.wait()
+        self.close()
+
+    def close(self):
+        """Release resources once the connection has ended."""
+        self.http.close()
 
     @staticmethod
     def message_callback(success, error_msg="Unknown Error"):
@@ -127,6 +851,14 @@ class Bot(ABC):
 
 
 class TaskBot(Bot):
+    # configuration of the background shipping of log events
+    log_batch_size = 50
+    log_flush_interval = 0.5
+    log_queue_size = 10000
+    log_bulk_path = "logs/bulk"
+    # seconds the task of a user is cached, `None` caches until invalidated
+    task_cache_ttl = 300
+
     def __init__(self, token, user, task, host, port):
         """Serves as a template for task bots.
         :param task: Task ID
@@ -134,6 +866,15 @@ class TaskBot(Bot):
         """
         super().__init__(token, user, host, port)
         self.task_id = task
+        self.log_shipper = LogShipper(
+            self.api,
+            batch_size=self.log_batch_size,
+            flush_interval=self.log_flush_interval,
+            max_queue=self.log_queue_size,
+            bulk_path=self.log_bulk_path,
+        )
+        self.task_cache = UserTaskCache(self.task_cache_ttl)
+        self.api.task_cache = self.task_cache
         self.sio.on("new_task_room", self.join_task_room())
 
     def on_task_room_creation(self, data):
@@ -145,14 +886,14 @@ class TaskBot(Bot):
         """Let the bot join an assigned task room."""
 
         def join(data):
+            # users changed rooms, their tasks are requested again
+            for user in data.get("users", []):
+                self.task_cache.invalidate(user["id"])
+
             if self.task_id is None or data["task"] != self.task_id:
                 return
 
-            response = requests.post(
-                f"{self.uri}/users/{self.user}/rooms/{data['room']}",
-                headers={"Authorization": f"Bearer {self.token}"},
-            )
-            self.request_feedback(response, f"let {self.__class__.__name__}  join room")
+            self.api.join_room(self.user, data["room"])
             self.on_task_room_creation(data)
 
         return join
@@ -165,29 +906,657 @@ class TaskBot(Bot):
             logging.error("could not resize chat and task area: invalid parameters")
             raise ValueError("chat_area and task_area must sum up to 100")
 
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/sidebar",
-            headers={"Authorization": f"Bearer {self.token}"},
-            json={"attribute": "style", "value": f"width: {task_area}%"}
+        self.api.set_attribute(room_id, "sidebar", "style", f"width: {task_area}%")
+        self.api.set_attribute(room_id, "content", "style", f"width: {chat_area}%")
+
+    def log_event(self, event, data, room_id):
+        """Queue an event, it is posted to slurk in the background."""
+        self.log_shipper.put(event, data, room_id)
+
+    def flush_logs(self, timeout=10):
+        """Wait until all queued log events have been posted.
+        Call before closing a room so that no events are lost.
+        """
+        if not self.log_shipper.flush(timeout):
+            logging.error("Could not ship all log events in time")
+
+    def log_round_trips(self, room_id):
+        """Log the api requests performed for a closed room.
+        The counter of the room is dropped, so call it once the room
+        is closed.
+        """
+        count = self.api.forget_room(room_id)
+        logging.info(f"{count} api round-trips for room {room_id}")
+        return count
+
+    def close(self):
+        self.log_shipper.close()
+        super().close()
+
+    @classmethod
+    def create_argparser(cls):
+        # inherit from parent's argparser
+        parser = argparse.ArgumentParser(
+            description=f"Run {cls.__name__}.",
+            parents=[super().create_argparser()],
+            add_help=False,
         )
 
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/content",
-            headers={"Authorization": f"Bearer {self.token}"},
-            json={"attribute": "style", "value": f"width: {chat_area}%"}
+        parser.add_argument(
+            "--task",
+            type=int,
+            default=os.environ.get(f"TASK_ID"),
+            help="slurk task ID the bot should moderate",
         )
+        return parser
 
-    def log_event(self, event, data, room_id):
-        response = requests.post(
-            f"{self.uri}/logs",
-            json={
-                "event": event,
-                "room_id": room_id,
-                "data": data,
-            },
+
+class AsyncTimer:
+    """Counterpart of `threading.Timer` running on the event loop.
+
+    No thread is started per timer, the call is scheduled on the
+    running loop. Coroutine functions are run as a task. Like
+    `ScheduledTimer` it can be `reset`, which only moves the deadline of
+    a pending timer: it is scheduled again once the old one comes due.
+    """
+
+    def __init__(self, interval, function, args=None, kwargs=None):
+        self.interval = interval
+        self.function = function
+        self.args = args if args is not None else []
+        self.kwargs = kwargs if kwargs is not None else {}
+        self._handle = None
+        self._task = None
+        self._deadline = None
+        self._moved = False
+
+    def start(self):
+        # a pending call would fire as well
+        self.cancel()
+        loop = asyncio.get_running_loop()
+        self._deadline = loop.time() + self.interval
+        self._moved = False
+        self._handle = loop.call_at(self._deadline, self._run)
+
+    def reset(self):
+        """Restart the countdown, also if the timer already fired."""
+        if self._handle is None:
+            self.start()
+            return
+        self._deadline = asyncio.get_running_loop().time() + self.interval
+        self._moved = True
+
+    def _run(self):
+        if self._moved:
+            self._moved = False
+            loop = asyncio.get_running_loop()
+            self._handle = loop.call_at(self._deadline, self._run)
+            return
+
+        self._handle = None
+        result = self.function(*self.args, **self.kwargs)
+        if asyncio.iscoroutine(result):
+            self._task = asyncio.ensure_future(result)
+
+    def cancel(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def is_alive(self):
+        """`True` while the timer is pending or its coroutine runs."""
+        if self._handle is not None:
+            return True
+        return self._task is not None and not self._task.done()
+
+
+class AsyncSlurkApi(SlurkApi):
+    """asyncio counterpart of `SlurkApi` based on aiohttp.
+
+    Offers the same operations as coroutines. The client session
+    has to be opened inside the running event loop.
+    """
+
+    IDEMPOTENT = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+    RETRY_STATUS = {502, 503, 504}
+
+    def __init__(
+        self, uri, token, pool_size=100, retries=3, backoff_factor=0.3, timeout=10
+    ):
+        """
+        :param uri: Base url of the api, e.g. `http://localhost/slurk/api`
+        :type uri: str
+        :param token: slurk token added as `Authorization` header
+        :type token: str
+        :param pool_size: Number of connections kept alive
+        :type pool_size: int
+        :param retries: How often failed connections of idempotent
+            requests and 502/503/504 responses are retried
+        :type retries: int
+        :param backoff_factor: Exponential backoff between retries in seconds
+        :type backoff_factor: float
+        :param timeout: Timeout for every request in seconds
+        :type timeout: float
+        """
+        super().__init__(uri, None)
+        self.token = token
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.timeout = timeout
+
+    async def open(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
             headers={"Authorization": f"Bearer {self.token}"},
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def request(self, method, path, action, room_id=None, **kwargs):
+        """Perform a single round-trip to the api.
+        The body is read before returning, so the response can be
+        inspected after the connection was given back to the pool.
+        :rtype: aiohttp.ClientResponse
+        """
+        self.calls[action] += 1
+        if room_id is not None:
+            self.room_calls[room_id] += 1
+
+        retries = self.retries if method in self.IDEMPOTENT else 0
+        for attempt in range(retries + 1):
+            if attempt > 0:
+                await asyncio.sleep(self.backoff_factor * 2 ** (attempt - 1))
+            try:
+                async with self.session.request(
+                    method, f"{self.uri}/{path}", **kwargs
+                ) as response:
+                    await response.read()
+            except aiohttp.ClientConnectionError:
+                if attempt == retries:
+                    raise
+                continue
+
+            if response.status not in self.RETRY_STATUS:
+                break
+        return response
+
+    async def fetch_etag(self, resource, room_id=None):
+        response = await self.request(
+            "GET", resource, f"get_{resource.split('/')[0].rstrip('s')}", room_id
+        )
+        AsyncBot.request_feedback(response, f"retrieving {resource}")
+        self._remember_etag(resource, response)
+        return response.headers["ETag"]
+
+    async def conditional_request(
+        self, method, path, resource, action, room_id=None, **kwargs
+    ):
+        headers = kwargs.pop("headers", dict())
+        etag = self.etags.get(resource)
+        if etag is not None:
+            response = await self.request(
+                method,
+                path,
+                action,
+                room_id,
+                headers={**headers, "If-Match": etag},
+                **kwargs,
+            )
+            # 412: precondition failed, the cached ETag is outdated
+            if response.status != 412:
+                self._remember_etag(resource, response)
+                return response
+
+        etag = await self.fetch_etag(resource, room_id)
+        response = await self.request(
+            method,
+            path,
+            action,
+            room_id,
+            headers={**headers, "If-Match": etag},
+            **kwargs,
+        )
+        self._remember_etag(resource, response)
+        return response
+
+    async def get_user(self, user_id):
+        response = await self.request("GET", f"users/{user_id}", "get_user")
+        AsyncBot.request_feedback(response, "getting user")
+        self._remember_etag(f"users/{user_id}", response)
+        return await response.json()
+
+    async def get_user_task(self, user_id):
+        if self.task_cache is not None:
+            cached, task = self.task_cache.get(user_id)
+            if cached:
+                return task
+
+        response = await self.request("GET", f"users/{user_id}/task", "get_user_task")
+        AsyncBot.request_feedback(response, "getting user task")
+        task = await response.json()
+        if self.task_cache is not None:
+            self.task_cache.put(user_id, task)
+        return task
+
+    async def rename_user(self, user_id, name, room_id=None):
+        response = await self.conditional_request(
+            "PATCH",
+            f"users/{user_id}",
+            f"users/{user_id}",
+            "rename_user",
+            room_id,
+            json={"name": name},
+        )
+        AsyncBot.request_feedback(response, "renaming user")
+
+    async def join_room(self, user_id, room_id):
+        response = await self.request(
+            "POST", f"users/{user_id}/rooms/{room_id}", "join_room", room_id
+        )
+        AsyncBot.request_feedback(response, "letting user join room")
+        self._remember_etag(f"users/{user_id}", response)
+
+    async def remove_user_from_room(self, user_id, room_id):
+        response = await self.conditional_request(
+            "DELETE",
+            f"users/{user_id}/rooms/{room_id}",
+            f"users/{user_id}",
+            "remove_user_from_room",
+            room_id,
+        )
+        AsyncBot.request_feedback(response, "removing user from room")
+
+    async def get_room_users(self, room_id):
+        response = await self.request(
+            "GET", f"rooms/{room_id}/users", "get_room_users", room_id
+        )
+        AsyncBot.request_feedback(response, "getting users of room")
+        return await response.json()
+
+    async def set_attribute(
+        self, room_id, element_id, attribute, value, receiver_id=None
+    ):
+        receiver = {"receiver_id": receiver_id} if receiver_id is not None else {}
+        response = await self.request(
+            "PATCH",
+            f"rooms/{room_id}/attribute/id/{element_id}",
+            "set_attribute",
+            room_id,
+            json={"attribute": attribute, "value": value, **receiver},
+        )
+        AsyncBot.request_feedback(response, f"setting {attribute} of {element_id}")
+
+    async def set_text(self, room_id, element_id, text, receiver_id=None):
+        receiver = {"receiver_id": receiver_id} if receiver_id is not None else {}
+        response = await self.request(
+            "PATCH",
+            f"rooms/{room_id}/text/{element_id}",
+            "set_text",
+            room_id,
+            json={"text": text, **receiver},
+        )
+        AsyncBot.request_feedback(response, f"setting text of {element_id}")
+
+    async def room_to_read_only(self, room_id, status_message="This room is read-only"):
+        await self.set_attribute(room_id, "text", "readonly", "True")
+        await self.set_attribute(room_id, "text", "placeholder", status_message)
+
+    async def set_message_privilege(self, user_id, value):
+        permission_id = self.permissions.get(user_id)
+        if permission_id is None:
+            response = await self.request(
+                "GET", f"users/{user_id}/permissions", "get_permissions"
+            )
+            AsyncBot.request_feedback(response, "retrieving user's permissions")
+            permission_id = (await response.json())["id"]
+            self.permissions[user_id] = permission_id
+            self._remember_etag(f"permissions/{permission_id}", response)
+
+        response = await self.conditional_request(
+            "PATCH",
+            f"permissions/{permission_id}",
+            f"permissions/{permission_id}",
+            "set_message_privilege",
+            json={"send_message": value},
+        )
+        AsyncBot.request_feedback(response, "changing user's message permission")
+
+    async def log_event(self, event, data, room_id):
+        response = await self.request(
+            "POST",
+            "logs",
+            "log_event",
+            room_id,
+            json={"event": event, "room_id": room_id, "data": data},
+        )
+        AsyncBot.request_feedback(response, event)
+
+
+class AsyncLogShipper:
+    """asyncio counterpart of `LogShipper`.
+
+    The worker is a task on the event loop of the bot, it batches
+    events the same way as `LogShipper`. The queue is unbounded as
+    queueing never blocks the loop.
+    """
+
+    NO_BULK_ENDPOINT = LogShipper.NO_BULK_ENDPOINT
+
+    def __init__(self, api, batch_size=50, flush_interval=0.5, bulk_path="logs/bulk"):
+        """
+        :param api: Client used to post the events
+        :type api: AsyncSlurkApi
+        :param batch_size: Maximal number of events per request
+        :type batch_size: int
+        :param flush_interval: Seconds an event waits at most in the queue
+        :type flush_interval: float
+        :param bulk_path: Api path accepting a list of events, `None`
+            disables bulk mode
+        :type bulk_path: str
+        """
+        self.api = api
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.bulk_path = bulk_path
+        self.queue = None
+        self.stats = Counter()
+        self.max_depth = 0
+        self._task = None
+
+    @property
+    def depth(self):
+        """Number of events waiting to be shipped."""
+        return self.queue.qsize() if self.queue is not None else 0
+
+    def start(self):
+        """Start the worker, must be called inside the running loop."""
+        self.queue = asyncio.Queue()
+        self._task = asyncio.ensure_future(self._run())
+
+    def put(self, event, data, room_id):
+        """Queue an event for shipping."""
+        item = json.dumps({"event": event, "room_id": room_id, "data": data})
+        self.queue.put_nowait(item)
+        self.stats["queued"] += 1
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    async def flush(self, timeout=None):
+        """Wait until all events queued so far have been shipped.
+        :return: `True` if everything was shipped in time
+        :rtype: bool
+        """
+        done = asyncio.Event()
+        self.queue.put_nowait(done)
+        try:
+            await asyncio.wait_for(done.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def close(self, timeout=None):
+        """Ship all pending events and stop the worker."""
+        if self._task is None:
+            return
+        self.queue.put_nowait(None)
+        try:
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            logging.error("Could not ship all log events before closing")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        batch = list()
+        deadline = None
+        while True:
+            try:
+                if batch:
+                    timeout = max(0, deadline - loop.time())
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                else:
+                    item = await self.queue.get()
+            except asyncio.TimeoutError:
+                # the oldest event waited long enough
+                await self._ship(batch)
+                batch = list()
+                continue
+
+            if item is None or isinstance(item, asyncio.Event):
+                await self._ship(batch)
+                batch = list()
+                if item is None:
+                    return
+                item.set()
+                continue
+
+            if not batch:
+                deadline = loop.time() + self.flush_interval
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                await self._ship(batch)
+                batch = list()
+
+    async def _ship(self, batch):
+        if not batch:
+            return
+
+        if self.bulk_path is not None and len(batch) > 1:
+            try:
+                response = await self.api.request(
+                    "POST",
+                    self.bulk_path,
+                    "log_bulk",
+                    data=f"[{','.join(batch)}]",
+                    headers={"Content-Type": "application/json"},
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                logging.error(f"Could not ship {len(batch)} log events: {error}")
+                self.stats["failed"] += len(batch)
+                return
+
+            if response.ok:
+                self.stats["bulk_requests"] += 1
+                self.stats["shipped"] += len(batch)
+                return
+
+            if response.status not in self.NO_BULK_ENDPOINT:
+                logging.error(f"Could not ship log events: {response.status}")
+                self.stats["failed"] += len(batch)
+                return
+
+            logging.info("Bulk log endpoint not available, posting events one by one")
+            self.bulk_path = None
+
+        for item in batch:
+            await self._ship_single(item)
+
+    async def _ship_single(self, item):
+        try:
+            response = await self.api.request(
+                "POST",
+                "logs",
+                "log_event",
+                data=item,
+                headers={"Content-Type": "application/json"},
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            logging.error(f"Could not ship log event: {error}")
+            self.stats["failed"] += 1
+            return
+
+        if not response.ok:
+            logging.error(f"Could not ship log event: {response.status}")
+            self.stats["failed"] += 1
+            return
+        self.stats["single_requests"] += 1
+        self.stats["shipped"] += 1
+
+
+class AsyncBot(Bot):
+    """Template for bots running on asyncio.
+
+    Every event handler is executed as a task on one event loop, so
+    a handler waiting for slurk, golmi or a delay does not hold up the
+    handlers of other rooms. Handlers are defined with `async def`,
+    use `await self.sio.emit(...)`, `await self.api....` and
+    `await asyncio.sleep(...)`. Requires aiohttp.
+    """
+
+    http_pool_size = 100
+
+    def __init__(self, token, user, host, port):
+        if aiohttp is None:
+            raise ImportError(f"{self.__class__.__name__} requires aiohttp")
+
+        self.token = token
+        self.user = user
+
+        self.uri = host
+        if port is not None:
+            self.uri += f":{port}"
+        self.uri += "/slurk/api"
+        logging.info(f"Running {self.__class__.__name__} on {self.uri} with token: {self.token} ...")
+
+        # one client per bot, the class-level client of `Bot` is synchronous
+        self.sio = socketio.AsyncClient(logger=False)
+        self.api = AsyncSlurkApi(
+            self.uri,
+            self.token,
+            pool_size=self.http_pool_size,
+            retries=self.http_retries,
+            backoff_factor=self.http_backoff_factor,
+            timeout=self.http_timeout,
+        )
+
+        self.register_callbacks()
+
+    async def open(self):
+        """Acquire resources bound to the running event loop."""
+        await self.api.open()
+
+    async def run(self):
+        """Establish a connection to the slurk chat server.
+        Start the bot with `asyncio.run(bot.run())`.
+        """
+        await self.open()
+        await self.sio.connect(
+            self.uri,
+            headers={"Authorization": f"Bearer {self.token}", "user": str(self.user)},
+            namespaces="/",
+        )
+        await self.sio.wait()
+        await self.close()
+
+    async def close(self):
+        """Release resources once the connection has ended."""
+        await self.api.close()
+
+    @staticmethod
+    def request_feedback(response, action):
+        """Verify whether a request was successful.
+        :param response: Response to request
+        :type response: aiohttp.ClientResponse
+        :param action: Action meant to be performed
+        :type action: str
+        """
+        if not response.ok:
+            logging.error(f"`{action}` unsuccessful: {response.status}")
+            response.raise_for_status()
+        logging.debug(f"`{action}` successful.")
+
+
+class AsyncTaskBot(AsyncBot):
+    # configuration of the background shipping of log events
+    log_batch_size = 50
+    log_flush_interval = 0.5
+    log_bulk_path = "logs/bulk"
+    # seconds the task of a user is cached, `None` caches until invalidated
+    task_cache_ttl = 300
+
+    def __init__(self, token, user, task, host, port):
+        """Serves as a template for task bots running on asyncio.
+        :param task: Task ID
+        :type task: str
+        """
+        super().__init__(token, user, host, port)
+        self.task_id = task
+        self.log_shipper = AsyncLogShipper(
+            self.api,
+            batch_size=self.log_batch_size,
+            flush_interval=self.log_flush_interval,
+            bulk_path=self.log_bulk_path,
         )
-        self.request_feedback(response, event)
+        self.task_cache = UserTaskCache(self.task_cache_ttl)
+        self.api.task_cache = self.task_cache
+        self.sio.on("new_task_room", self.join_task_room())
+
+    async def open(self):
+        await super().open()
+        self.log_shipper.start()
+
+    async def on_task_room_creation(self, data):
+        """Each bot can define some actions to be performed upon
+        task room creation."""
+        pass
+
+    def join_task_room(self):
+        """Let the bot join an assigned task room."""
+
+        async def join(data):
+            # users changed rooms, their tasks are requested again
+            for user in data.get("users", []):
+                self.task_cache.invalidate(user["id"])
+
+            if self.task_id is None or data["task"] != self.task_id:
+                return
+
+            await self.api.join_room(self.user, data["room"])
+            await self.on_task_room_creation(data)
+
+        return join
+
+    async def move_divider(self, room_id, chat_area=50, task_area=50):
+        """move the central divider and resize chat and task area
+        the sum of char_area and task_area must sum up to 100
+        """
+        if chat_area + task_area != 100:
+            logging.error("could not resize chat and task area: invalid parameters")
+            raise ValueError("chat_area and task_area must sum up to 100")
+
+        await self.api.set_attribute(
+            room_id, "sidebar", "style", f"width: {task_area}%"
+        )
+        await self.api.set_attribute(
+            room_id, "content", "style", f"width: {chat_area}%"
+        )
+
+    def log_event(self, event, data, room_id):
+        """Queue an event, it is posted to slurk in the background."""
+        self.log_shipper.put(event, data, room_id)
+
+    async def flush_logs(self, timeout=10):
+        """Wait until all queued log events have been posted.
+        Call before closing a room so that no events are lost.
+        """
+        if not await self.log_shipper.flush(timeout):
+            logging.error("Could not ship all log events in time")
+
+    def log_round_trips(self, room_id):
+        """Log the api requests performed for a closed room.
+        The counter of the room is dropped, so call it once the room
+        is closed.
+        """
+        count = self.api.forget_room(room_id)
+        logging.info(f"{count} api round-trips for room {room_id}")
+        return count
+
+    async def close(self):
+        await self.log_shipper.close()
+        await super().close()
 
     @classmethod
     def create_argparser(cls):
@@ -1,9 +1,6 @@
 import logging
-from threading import Timer
 
-import requests
-
-from templates import TaskBot
+from templates import ScheduledTimer, TaskBot
 
 
 TIMEOUT_TIMER = 60  # minutes
@@ -16,7 +13,7 @@ class RoomTimer:
         self.start_timer()
 
     def start_timer(self):
-        self.timer = Timer(
+        self.timer = ScheduledTimer(
             TIMEOUT_TIMER*60,
             self.function,
             args=[self.room_id]
@@ -24,8 +21,7 @@ class RoomTimer:
         self.timer.start()
 
     def reset(self):
-        self.timer.cancel()
-        self.start_timer()
+        self.timer.reset()
         logging.debug("reset timer")
 
     def cancel(self):
@@ -45,56 +41,15 @@ class EchoBot(TaskBot):
     def close_room(self, room_id):
         self.room_to_read_only(room_id)
         self.timers_per_room.pop(room_id)
+        self.log_round_trips(room_id)
 
     def room_to_read_only(self, room_id):
         """Set room to read only."""
-        # set room to read-only
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "readonly", "value": "True"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            logging.error(f"Could not set room to read_only: {response.status_code}")
-            response.raise_for_status()
-
-        response = requests.patch(
-            f"{self.uri}/rooms/{room_id}/attribute/id/text",
-            json={"attribute": "placeholder", "value": "This room is read-only"},
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            logging.error(f"Could not set room to read_only: {response.status_code}")
-            response.raise_for_status()
-
-        response = requests.get(
-            f"{self.uri}/rooms/{room_id}/users",
-            headers={"Authorization": f"Bearer {self.token}"},
-        )
-        if not response.ok:
-            logging.error(f"Could not get user: {response.status_code}")
+        self.api.room_to_read_only(room_id)
 
-        users = response.json()
-        for user in users:
+        for user in self.api.get_room_users(room_id):
             if user["id"] != self.user:
-                response = requests.get(
-                    f"{self.uri}/users/{user['id']}",
-                    headers={"Authorization": f"Bearer {self.token}"},
-                )
-                if not response.ok:
-                    logging.error(f"Could not get user: {response.status_code}")
-                    response.raise_for_status()
-                etag = response.headers["ETag"]
-
-                response = requests.delete(
-                    f"{self.uri}/users/{user['id']}/rooms/{room_id}",
-                    headers={"If-Match": etag, "Authorization": f"Bearer {self.token}"},
-                )
-                if not response.ok:
-                    logging.error(
-                        f"Could not remove user from task room: {response.status_code}"
-                    )
-                    response.raise_for_status()
+                self.api.remove_user_from_room(user["id"], room_id)
                 logging.debug("Removing user from task room was successful.")
 
     def register_callbacks(self):
@@ -105,7 +60,7 @@ class EchoBot(TaskBot):
             if self.user == user_id:
                 return
 
-            response = requests.patch(
+            response = self.http.patch(
                 f"{self.uri}/rooms/{room_id}/text/text_to_modify",
                 headers={"Authorization": f"Bearer {self.token}"},
                 json={"text": data["message"]}